@@ -0,0 +1,256 @@
+from time import monotonic, time
+from typing import Any
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from classes.classScheduler import MsScheduler
+from classes.classSingleFlight import MsSingleFlight
+from config.config import settings
+from models.service_membership.modelMembershipAuth import AccessTokenClaims, VerifyEndpointServiceResult
+from utils.util_http_client import HttpClientDefault, IsJsonResponse
+from utils.util_http_exception import MsHTTPUnauthorizedException
+from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
+from utils.util_logger import msLogger
+from utils.security.ms_jwt import MsJwt, MsJwtInvalid
+
+
+class AuthToken:
+    """
+    Verify signed access token (JWT RSA) locally.
+    - Public key set (JWKS) is fetched once at startup and refreshed periodically
+    - Return `None` when the token can not be verified locally, caller must fallback to auth service
+    """
+
+    Keys: dict[str, RSAPublicKey] = {}
+    KeysRefreshedAt: float | None = None
+    KeysFlight: MsSingleFlight[bool] = MsSingleFlight()
+    RefreshScheduler: MsScheduler | None = None
+
+    Invalidations: dict[tuple[str, str], float] = {}
+    """
+    Time of the last account/company change per (claim name, id), oldest first.
+    Token issued before it carry stale claims and must be verified by auth service.
+    Only expire after `invalidationTtlSeconds`, never evicted (an evicted entry would let a stale token through)
+    """
+    InvalidatedAllAt: float | None = None
+    """
+    Set when `Invalidations` overflow `invalidationMaxSize`: every token issued before it is verified by auth service
+    """
+
+    verified = 0
+    fallback = 0
+    rejected = 0
+
+    @staticmethod
+    def JwksUrl() -> str:
+        jwksUrl = settings.auth.offline.jwksUrl
+        if jwksUrl is None:
+            jwksUrl = settings.services.authService + "/.well-known/jwks.json"
+        return jwksUrl
+
+    @staticmethod
+    async def LoadKeys() -> bool:
+        # concurrent refresh (scheduler and unknown kid) share one request
+        return await AuthToken.KeysFlight.Do("jwks", AuthToken._LoadKeys)
+
+    @staticmethod
+    async def _LoadKeys() -> bool:
+        AuthToken.KeysRefreshedAt = monotonic()
+        url = AuthToken.JwksUrl()
+        try:
+            response = await HttpClientDefault().get(url=url)
+            if (response.status_code != 200) or (not IsJsonResponse(response)):
+                msLogger.error(f"Failed to load JWKS from {url}, status code {response.status_code}")
+                return False
+            jwks: dict[str, Any] | Any = response.json()
+        except Exception as err:
+            msLogger.error(f"Failed to load JWKS from {url}. {err}")
+            return False
+
+        rawKeys: list[Any] | Any = jwks.get("keys") if isinstance(jwks, dict) else None
+        if not isinstance(rawKeys, list):
+            msLogger.error(f"Invalid JWKS from {url}, field keys is not a list")
+            return False
+
+        keys: dict[str, RSAPublicKey] = {}
+        for jwk in rawKeys:
+            if (not isinstance(jwk, dict)) or (jwk.get("use", "sig") != "sig"):
+                continue
+            kid: str | Any = jwk.get("kid", "")
+            if not isinstance(kid, str):
+                continue
+            try:
+                keys[kid] = MsJwt.RsaPublicKeyFromJwk(jwk) # type: ignore
+            except MsJwtInvalid as err:
+                msLogger.warning(f"Skip JWKS key {kid}. {err}")
+
+        # keep previous keys when auth service publish an empty set by mistake
+        if len(keys) > 0:
+            AuthToken.Keys = keys
+        return len(keys) > 0
+
+    @staticmethod
+    async def GetKey(kid: str | None) -> RSAPublicKey | None:
+        kid = kid or ""
+        key = AuthToken.Keys.get(kid)
+        if key is not None:
+            return key
+        # key rotation, refresh but never more often than minRefreshIntervalSeconds
+        refreshedAt = AuthToken.KeysRefreshedAt
+        if (refreshedAt is None) or (monotonic() - refreshedAt >= settings.auth.offline.minRefreshIntervalSeconds):
+            await AuthToken.LoadKeys()
+            key = AuthToken.Keys.get(kid)
+        return key
+
+    @staticmethod
+    async def Start():
+        if not settings.auth.offline.enabled:
+            return
+        if not await AuthToken.LoadKeys():
+            msLogger.warning("JWKS not available, access token will be verified by auth service until refreshed")
+
+        async def refresh() -> bool:
+            await AuthToken.LoadKeys()
+            return False
+
+        AuthToken.RefreshScheduler = MsScheduler(settings.auth.offline.refreshSeconds, refresh)
+        AuthToken.RefreshScheduler.start()
+
+    @staticmethod
+    async def Shutdown():
+        if AuthToken.RefreshScheduler is not None:
+            await AuthToken.RefreshScheduler.shutdown()
+            AuthToken.RefreshScheduler = None
+
+    @staticmethod
+    def Invalidate(claimName: str, id: Any):
+        now = time()
+        key = (claimName, str(id))
+        invalidations = AuthToken.Invalidations
+        # re-insert, keep the dict ordered by time
+        invalidations.pop(key, None)
+        invalidations[key] = now
+
+        expiredBefore = now - settings.auth.offline.invalidationTtlSeconds
+        while len(invalidations) > 0:
+            oldestKey = next(iter(invalidations))
+            if invalidations[oldestKey] > expiredBefore:
+                break
+            del invalidations[oldestKey]
+
+        if len(invalidations) > settings.auth.offline.invalidationMaxSize:
+            # every entry is covered by the watermark
+            AuthToken.InvalidatedAllAt = now
+            invalidations.clear()
+            msLogger.warning(f"Token invalidations over {settings.auth.offline.invalidationMaxSize}, token issued before now are verified by auth service")
+
+    @staticmethod
+    def IsInvalidated(claims: AccessTokenClaims, issuedAt: Any) -> bool:
+        invalidatedAllAt = AuthToken.InvalidatedAllAt
+        if invalidatedAllAt is not None:
+            if invalidatedAllAt + settings.auth.offline.invalidationTtlSeconds <= time():
+                AuthToken.InvalidatedAllAt = None
+            elif (not isinstance(issuedAt, (int, float))) or (issuedAt <= invalidatedAllAt):
+                return True
+        if len(AuthToken.Invalidations) == 0:
+            return False
+        expiredBefore = time() - settings.auth.offline.invalidationTtlSeconds
+        for claimName, id in (
+            ("accountId", claims.accountId),
+            ("companyId", claims.companyId),
+            ("companyCategoryId", claims.companyCategoryId)
+        ):
+            if id is None:
+                continue
+            invalidatedAt = AuthToken.Invalidations.get((claimName, str(id)))
+            # expired entry is only purged by the next `Invalidate`
+            if (invalidatedAt is not None) and (invalidatedAt > expiredBefore) and ((not isinstance(issuedAt, (int, float))) or (issuedAt <= invalidatedAt)):
+                return True
+        return False
+
+    @staticmethod
+    def AuthenticationFailed(reason: str) -> MsHTTPUnauthorizedException:
+        AuthToken.rejected += 1
+        return MsHTTPUnauthorizedException(
+            type=MsHTTPExceptionType.AUTHENTICATION_FAILED,
+            message=MsHTTPExceptionMessage.AUTHENTICATION_FAILED,
+            debug={
+                "reason": reason
+            }
+        )
+
+    @staticmethod
+    async def VerifyEndpoint(
+        accessToken: str,
+        serviceName: str,
+        operationId: str
+    ) -> VerifyEndpointServiceResult | None:
+        offline = settings.auth.offline
+        if (not offline.enabled) or (not MsJwt.IsJwt(accessToken)):
+            return None
+        try:
+            decoded = MsJwt.Decode(accessToken)
+        except MsJwtInvalid:
+            AuthToken.fallback += 1
+            return None
+        if decoded.alg not in offline.algorithms:
+            AuthToken.fallback += 1
+            return None
+
+        key = await AuthToken.GetKey(decoded.kid)
+        if key is None:
+            AuthToken.fallback += 1
+            return None
+        if not MsJwt.VerifyRsa(decoded, key):
+            raise AuthToken.AuthenticationFailed("invalid signature")
+
+        payload = decoded.payload
+        now = time()
+        exp = payload.get("exp")
+        if (not isinstance(exp, (int, float))) or (exp + offline.leewaySeconds <= now):
+            raise AuthToken.AuthenticationFailed("token expired")
+        nbf = payload.get("nbf")
+        if isinstance(nbf, (int, float)) and (nbf - offline.leewaySeconds > now):
+            raise AuthToken.AuthenticationFailed("token not yet valid")
+
+        # token for other issuer/audience may still be valid for auth service
+        if (offline.issuer is not None) and (payload.get("iss") != offline.issuer):
+            AuthToken.fallback += 1
+            return None
+        if offline.audience is not None:
+            aud: str | list[str] | Any = payload.get("aud")
+            if not ((aud == offline.audience) or (isinstance(aud, list) and (offline.audience in aud))):
+                AuthToken.fallback += 1
+                return None
+
+        try:
+            claims = AccessTokenClaims(**payload)
+        except Exception:
+            AuthToken.fallback += 1
+            return None
+        endpointClaim = claims.endpoints.get(serviceName, {}).get(operationId)
+        if (endpointClaim is None) or AuthToken.IsInvalidated(claims, payload.get("iat")):
+            AuthToken.fallback += 1
+            return None
+
+        AuthToken.verified += 1
+        return VerifyEndpointServiceResult(
+            accountId=claims.accountId,
+            roleClaimed=claims.roleClaimed,
+            roleName=endpointClaim.roleName,
+            companyCategoryId=claims.companyCategoryId,
+            companyId=claims.companyId,
+            roleLocation=endpointClaim.roleLocation
+        )
+
+    @staticmethod
+    def Stats() -> dict[str, Any]:
+        refreshedAt = AuthToken.KeysRefreshedAt
+        return {
+            "enabled": settings.auth.offline.enabled,
+            "keys": list(AuthToken.Keys.keys()),
+            "keysAgeSeconds": round(monotonic() - refreshedAt, 3) if refreshedAt is not None else None,
+            "verified": AuthToken.verified,
+            "fallback": AuthToken.fallback,
+            "rejected": AuthToken.rejected,
+            "invalidations": len(AuthToken.Invalidations),
+            "invalidatedAllAt": AuthToken.InvalidatedAllAt
+        }
@@ -1,21 +1,33 @@
 import json
-from typing import Annotated, Any
+from typing import Annotated, Any, Callable, Iterable, Sequence, TypeVar
 from fastapi import Depends
+from fastapi.dependencies.models import Dependant
 from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
 from httpx import (
     RequestError as HttpxRequestError,
-    ConnectTimeout as HttpxConnectTimeout
+    ConnectTimeout as HttpxConnectTimeout,
+    Timeout as HttpxTimeout
 )
+from auth.authToken import AuthToken
 from classes.classAuthRequest import MsHTTPBearer, MsHTTPBearerCredential
+from classes.classCircuitBreaker import MsCircuitBreaker
+from classes.classSingleFlight import MsSingleFlight
+from classes.classTtlLruCache import MsTtlLruCache
 from config.config import settings
 from models.service_membership.enumRoleLocation import RoleLocation
-from models.service_membership.modelMembershipAuth import ResponsVerifyEndpointServiceResult, VerifyEndpointServiceResult, VerifyEndpointCompanyResult, VerifyEndpointSystemResult
+from models.service_membership.modelCredentialLocation import CredentialLocation
+from models.service_membership.modelMembershipAuth import PermissionMatrixResult, ResponsPermissionMatrixResult, ResponsVerifyEndpointServiceResult, VerifyEndpointServiceResult, VerifyEndpointCompanyResult, VerifyEndpointSystemResult
+from models.shared.modelDataType import ObjectId
 from models.shared.modelResponse import FailedResponseDetail
 from utils.util_http_client import HttpClientDefault, IsJsonResponse
 from utils.util_http_exception import MsHTTPException, MsHTTPExternalServerErrorException, MsHTTPForbiddenException, MsHTTPInternalServerErrorException, MsHTTPServiceUnavailableException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
 from utils.util_logger import msLogger
+from utils.security.ms_hash import MsHash
 
+TAuthServiceResult = TypeVar("TAuthServiceResult")
+TAuthCacheValue = TypeVar("TAuthCacheValue")
 
 class AuthUser:
 
@@ -39,26 +51,349 @@ class AuthUser:
         description="Akses token akun external"
     )
 
+    VerifyCache: MsTtlLruCache[VerifyEndpointServiceResult | MsHTTPException] = MsTtlLruCache(
+        maxSize=settings.auth.cache.maxSize,
+        ttlSeconds=settings.auth.cache.ttlSeconds,
+        staleSeconds=settings.auth.breaker.staleGraceSeconds if settings.auth.breaker.enabled else 0
+    )
+    """
+    Verification result per (token hash, serviceName, operationId).
+    Failed verification (401/403) is cached as `MsHTTPException` with `negativeTtlSeconds`
+    """
+
+    VerifyFlight: MsSingleFlight[VerifyEndpointServiceResult] = MsSingleFlight()
+
+    MatrixCache: MsTtlLruCache[PermissionMatrixResult | MsHTTPException] = MsTtlLruCache(
+        maxSize=settings.auth.cache.maxSize,
+        ttlSeconds=settings.auth.cache.ttlSeconds,
+        staleSeconds=settings.auth.breaker.staleGraceSeconds if settings.auth.breaker.enabled else 0
+    )
+    """
+    Permission matrix per (token hash, serviceName)
+    """
+
+    MatrixFlight: MsSingleFlight[PermissionMatrixResult | None] = MsSingleFlight()
+    MatrixUnsupported = False
+
+    Breaker = MsCircuitBreaker(
+        name="authService",
+        failureThreshold=settings.auth.breaker.failureThreshold,
+        resetTimeoutSeconds=settings.auth.breaker.resetTimeoutSeconds
+    )
+
+    InvalidationGeneration = 0
+    """
+    Increased on every invalidation, result requested before it is not stored
+    """
+
+    @staticmethod
+    def VerifyCacheKey(
+        accessToken: str,
+        serviceName: str,
+        operationId: str
+    ) -> tuple[str, str, str]:
+        # never keep raw access token in memory longer than the request
+        return (MsHash.hash_sha256(accessToken.encode(encoding="utf-8")).hex(), serviceName, operationId)
+
+    @staticmethod
+    def CloneException(err: MsHTTPException) -> MsHTTPException:
+        # raise a fresh instance, re-raising the cached one keeps growing its traceback
+        return MsHTTPException(
+            httpStatus=err.httpStatus,
+            error=err.error,
+            type=err.type,
+            message=err.message,
+            headers=err.headers,
+            additionalData=err.additionalData,
+            debug=err.debug
+        )
+
     @staticmethod
     async def VerifyEndpoint(
         accessToken: str,
         serviceName: str,
         operationId: str
     ) -> VerifyEndpointServiceResult:
-        url = settings.services.authService + "/private/account/verify_endpoint"
+        # signed access token carrying the endpoint claim, no request to auth service
+        offlineResult = await AuthToken.VerifyEndpoint(accessToken, serviceName, operationId)
+        if offlineResult is not None:
+            return offlineResult
+
+        if (settings.auth.matrix.enabled) and (not AuthUser.MatrixUnsupported) and (serviceName == settings.project.serviceName):
+            matrix = await AuthUser.GetPermissionMatrix(accessToken, serviceName)
+            if matrix is not None:
+                return AuthUser.VerifyFromMatrix(matrix, serviceName, operationId)
+
+        cacheKey = AuthUser.VerifyCacheKey(accessToken, serviceName, operationId)
+        if settings.auth.cache.enabled:
+            cached = AuthUser.VerifyCache.Get(cacheKey)
+            if cached is not None:
+                if isinstance(cached, MsHTTPException):
+                    raise AuthUser.CloneException(cached)
+                return cached.model_copy()
+
         try:
-            reqBody: dict[str, Any] = {
+            if settings.auth.singleFlight:
+                # concurrent verification of the same key share one request to auth service
+                verifyResult = await AuthUser.VerifyFlight.Do(
+                    cacheKey,
+                    lambda: AuthUser._RequestAndStore(accessToken, serviceName, operationId, cacheKey)
+                )
+            else:
+                verifyResult = await AuthUser._RequestAndStore(accessToken, serviceName, operationId, cacheKey)
+        except MsHTTPException as err:
+            verifyResult = AuthUser.GetStaleOrRaise(AuthUser.VerifyCache, cacheKey, err)
+        return verifyResult.model_copy()
+
+    @staticmethod
+    def GetStaleOrRaise(
+        cache: MsTtlLruCache[TAuthCacheValue | MsHTTPException],
+        cacheKey: tuple[str, str, str],
+        err: MsHTTPException
+    ) -> TAuthCacheValue:
+        """
+        Auth service unavailable (5xx or circuit open), fallback to expired positive result within grace window
+        """
+
+        if (not settings.auth.breaker.enabled) or (err.httpStatus < 500):
+            raise err
+        stale = cache.GetStale(cacheKey)
+        if (stale is None) or isinstance(stale, MsHTTPException):
+            raise err
+        if settings.project.dev_mode:
+            msLogger.warning(f"Auth service unavailable ({err.GetErrorType()}), serve stale verification")
+        return stale
+
+    @staticmethod
+    def Invalidate(claimName: str, id: Any) -> int:
+        """
+        Evict cached verification of an account, company or company category.
+        - claimName: accountId | companyId | companyCategoryId
+        - Negative result does not carry the ids, it expire by `negativeTtlSeconds`
+        """
+
+        return AuthUser.InvalidateMany(claimName, [id])
+
+    @staticmethod
+    def InvalidateMany(claimName: str, ids: Iterable[Any]) -> int:
+        """
+        Same as `Invalidate` for several ids of one claim, the caches are scanned once
+        """
+
+        idSet = set(ids)
+        if len(idSet) == 0:
+            return 0
+        AuthUser.InvalidationGeneration += 1
+        for claimId in idSet:
+            AuthToken.Invalidate(claimName, claimId)
+
+        def predicate(_: Any, value: VerifyEndpointServiceResult | PermissionMatrixResult | MsHTTPException) -> bool:
+            return (not isinstance(value, MsHTTPException)) and (getattr(value, claimName) in idSet)
+
+        removed = AuthUser.VerifyCache.RemoveIf(predicate) + AuthUser.MatrixCache.RemoveIf(predicate)
+        if settings.project.dev_mode:
+            msLogger.info(f"Auth cache invalidated {claimName} ({len(idSet)} ids), {removed} entries removed")
+        return removed
+
+    @staticmethod
+    def InvalidateAccount(accountId: ObjectId) -> int:
+        return AuthUser.Invalidate("accountId", accountId)
+
+    @staticmethod
+    def InvalidateCompany(companyId: ObjectId) -> int:
+        return AuthUser.Invalidate("companyId", companyId)
+
+    @staticmethod
+    def InvalidateCompanyCategory(companyCategoryId: ObjectId) -> int:
+        return AuthUser.Invalidate("companyCategoryId", companyCategoryId)
+
+    @staticmethod
+    def VerifyFromMatrix(
+        matrix: PermissionMatrixResult,
+        serviceName: str,
+        operationId: str
+    ) -> VerifyEndpointServiceResult:
+        if operationId not in matrix.operations:
+            raise MsHTTPForbiddenException(
+                MsHTTPExceptionType.UNAUTHORIZED_ROLE_OR_PERMISSION,
+                MsHTTPExceptionMessage.UNAUTHORIZED_ROLE_OR_PERMISSION,
+                additionalData={
+                    "serviceName": serviceName,
+                    "operationId": operationId
+                }
+            )
+        return VerifyEndpointServiceResult(
+            accountId=matrix.accountId,
+            roleClaimed=matrix.roleClaimed,
+            roleName=matrix.operations[operationId],
+            companyCategoryId=matrix.companyCategoryId,
+            companyId=matrix.companyId,
+            roleLocation=matrix.roleLocation
+        )
+
+    @staticmethod
+    async def GetPermissionMatrix(
+        accessToken: str,
+        serviceName: str
+    ) -> PermissionMatrixResult | None:
+        """
+        return: `None` when auth service does not support permission matrix
+        """
+
+        cacheKey = AuthUser.VerifyCacheKey(accessToken, serviceName, "*")
+        if settings.auth.cache.enabled:
+            cached = AuthUser.MatrixCache.Get(cacheKey)
+            if cached is not None:
+                if isinstance(cached, MsHTTPException):
+                    raise AuthUser.CloneException(cached)
+                return cached
+
+        try:
+            if settings.auth.singleFlight:
+                return await AuthUser.MatrixFlight.Do(
+                    cacheKey,
+                    lambda: AuthUser._RequestMatrixAndStore(accessToken, serviceName, cacheKey)
+                )
+            return await AuthUser._RequestMatrixAndStore(accessToken, serviceName, cacheKey)
+        except MsHTTPException as err:
+            return AuthUser.GetStaleOrRaise(AuthUser.MatrixCache, cacheKey, err)
+
+    @staticmethod
+    async def _RequestMatrixAndStore(
+        accessToken: str,
+        serviceName: str,
+        cacheKey: tuple[str, str, str]
+    ) -> PermissionMatrixResult | None:
+        generation = AuthUser.InvalidationGeneration
+        try:
+            matrix = await AuthUser.RequestAuthService(
+                settings.services.authService + settings.auth.matrix.path,
+                accessToken,
+                {
+                    "serviceName": serviceName
+                },
+                lambda responseJson: ResponsPermissionMatrixResult(**responseJson).data
+            )
+        except MsHTTPException as err:
+            if err.httpStatus in (404, 405, 501):
+                # older auth service, verify per operation from now on
+                AuthUser.MatrixUnsupported = True
+                msLogger.warning("Auth service does not support permission matrix, fallback to verify per operation")
+                return None
+            if (settings.auth.cache.enabled) and (err.httpStatus in (401, 403)) and (generation == AuthUser.InvalidationGeneration):
+                AuthUser.MatrixCache.Set(cacheKey, err, settings.auth.cache.negativeTtlSeconds)
+            raise err
+
+        if (settings.auth.cache.enabled) and (generation == AuthUser.InvalidationGeneration):
+            AuthUser.MatrixCache.Set(cacheKey, matrix)
+        return matrix
+
+    @staticmethod
+    async def _RequestAndStore(
+        accessToken: str,
+        serviceName: str,
+        operationId: str,
+        cacheKey: tuple[str, str, str]
+    ) -> VerifyEndpointServiceResult:
+        generation = AuthUser.InvalidationGeneration
+        try:
+            verifyResult = await AuthUser.RequestVerifyEndpoint(
+                accessToken,
+                serviceName,
+                operationId
+            )
+        except MsHTTPException as err:
+            if (settings.auth.cache.enabled) and (err.httpStatus in (401, 403)) and (generation == AuthUser.InvalidationGeneration):
+                AuthUser.VerifyCache.Set(cacheKey, err, settings.auth.cache.negativeTtlSeconds)
+            raise err
+
+        if (settings.auth.cache.enabled) and (generation == AuthUser.InvalidationGeneration):
+            AuthUser.VerifyCache.Set(cacheKey, verifyResult)
+        return verifyResult
+
+    @staticmethod
+    async def RequestVerifyEndpoint(
+        accessToken: str,
+        serviceName: str,
+        operationId: str
+    ) -> VerifyEndpointServiceResult:
+        """
+        Verify endpoint to auth service, without cache
+        """
+
+        return await AuthUser.RequestAuthService(
+            settings.services.authService + "/private/account/verify_endpoint",
+            accessToken,
+            {
                 "serviceName": serviceName,
                 "operationId": operationId
-            }
+            },
+            lambda responseJson: ResponsVerifyEndpointServiceResult(**responseJson).data
+        )
+
+    @staticmethod
+    async def RequestAuthService(
+        url: str,
+        accessToken: str,
+        reqBody: dict[str, Any],
+        parseSuccess: Callable[[Any], TAuthServiceResult]
+    ) -> TAuthServiceResult:
+        if not settings.auth.breaker.enabled:
+            return await AuthUser._PostAuthService(url, accessToken, reqBody, parseSuccess)
+
+        breaker = AuthUser.Breaker
+        if not breaker.AllowRequest():
+            raise MsHTTPServiceUnavailableException(
+                type=MsHTTPExceptionType.AUTH_SERVICE_UNAVAILABLE,
+                message="Server authentikasi sedang tidak tersedia, silahkan coba beberapa saat lagi",
+                additionalData={
+                    "circuitBreaker": breaker.state.value
+                }
+            )
+        try:
+            result = await AuthUser._PostAuthService(url, accessToken, reqBody, parseSuccess)
+        except MsHTTPException as err:
+            if err.httpStatus >= 500:
+                breaker.RecordFailure(err.GetErrorType())
+            else:
+                breaker.RecordSuccess()
+            raise err
+        except BaseException as err:
+            breaker.Release()
+            raise err
+        breaker.RecordSuccess()
+        return result
+
+    @staticmethod
+    async def _PostAuthService(
+        url: str,
+        accessToken: str,
+        reqBody: dict[str, Any],
+        parseSuccess: Callable[[Any], TAuthServiceResult]
+    ) -> TAuthServiceResult:
+        try:
             headers: dict[str, str] = {
                 "Authorization": "Bearer " + accessToken
             }
-            response = await HttpClientDefault().post(
-                url=url,
-                headers=headers,
-                json=reqBody
-            )
+            readTimeoutSeconds = settings.auth.breaker.readTimeoutSeconds
+            if readTimeoutSeconds is not None:
+                response = await HttpClientDefault().post(
+                    url=url,
+                    headers=headers,
+                    json=reqBody,
+                    timeout=HttpxTimeout(
+                        connect=settings.httpClient.timeout.connect,
+                        read=readTimeoutSeconds,
+                        write=settings.httpClient.timeout.write,
+                        pool=settings.httpClient.timeout.pool
+                    )
+                )
+            else:
+                response = await HttpClientDefault().post(
+                    url=url,
+                    headers=headers,
+                    json=reqBody
+                )
             isJsonResponse = IsJsonResponse(response)
             if response.status_code != 200:
                 if isJsonResponse:
@@ -117,8 +452,7 @@ class AuthUser:
                 else:
                     responseJsonSuccess = response.json()
                     try:
-                        verifySuccess = ResponsVerifyEndpointServiceResult(**responseJsonSuccess)
-                        return verifySuccess.data
+                        return parseSuccess(responseJsonSuccess)
                     except:
                         raise MsHTTPExternalServerErrorException(
                             type=MsHTTPExceptionType.EXTERNAL_SERVER_ERROR_AUTH_SERVICE_INVALID_SUCCESS_RESPONSE,
@@ -158,16 +492,35 @@ class AuthUser:
                     message=s
                 )
 
+class AuthRouteMeta:
+    __slots__ = ("serviceName", "operationId", "credentialLocations")
+
+    def __init__(
+        self,
+        serviceName: str,
+        operationId: str,
+        credentialLocations: frozenset[CredentialLocation] | None
+    ) -> None:
+        self.serviceName = serviceName
+        self.operationId = operationId
+        # None when endpoint does not declare x-credentialLocations
+        self.credentialLocations = credentialLocations
+
 class AuthUserDep:
     """
     User Authentication Dependency
     """
-    
+
+    RouteTable: dict[int, AuthRouteMeta] = {}
+    """
+    Auth metadata per route identity (`APIRoute` is not hashable), built once at startup by `BuildRouteTable`
+    """
+
     @staticmethod
-    async def VerifyEndpoint(
-        authorization: Annotated[MsHTTPBearerCredential, Depends(AuthUser.BearerAuthenticationMethod)]
-    ) -> VerifyEndpointServiceResult:
-        route: APIRoute | Any | None = authorization.request.scope.get("route")
+    def ResolveRoute(
+        route: APIRoute | Any | None,
+        requireOperationId: bool
+    ) -> AuthRouteMeta:
         if (route is None) or (not isinstance(route, APIRoute)):
             raise MsHTTPInternalServerErrorException(
                 "INVALID_ROUTE_CLASS",
@@ -178,56 +531,125 @@ class AuthUserDep:
             )
         operationId = route.operation_id
         if operationId is None:
-            raise MsHTTPInternalServerErrorException(
-                "EMPTY_OPERATION_ID",
-                f"Endpoint tidak mempunyai id operasi (operationId)",
-                debug={
-                    "type": str(route)
-                }
-            )
+            if requireOperationId:
+                raise MsHTTPInternalServerErrorException(
+                    "EMPTY_OPERATION_ID",
+                    f"Endpoint tidak mempunyai id operasi (operationId)",
+                    debug={
+                        "type": str(route)
+                    }
+                )
+            operationId = route.unique_id
         serviceName = settings.project.serviceName
+        credentialLocations: frozenset[CredentialLocation] | None = None
         if route.openapi_extra is not None:
             mService: str | Any | None = route.openapi_extra.get("x-service")
             if (mService is not None) and (isinstance(mService, str)):
                 serviceName = mService
+            mLocations: list[Any] | Any | None = route.openapi_extra.get("x-credentialLocations")
+            if mLocations is not None:
+                try:
+                    credentialLocations = frozenset(CredentialLocation(x) for x in mLocations)
+                except:
+                    raise MsHTTPInternalServerErrorException(
+                        "INVALID_CREDENTIAL_LOCATIONS",
+                        f"Lokasi kredensial endpoint (x-credentialLocations) tidak valid",
+                        debug={
+                            "type": str(route),
+                            "credentialLocations": str(mLocations)
+                        }
+                    )
+        return AuthRouteMeta(serviceName, operationId, credentialLocations)
+
+    @staticmethod
+    def GetRouteMeta(
+        authorization: MsHTTPBearerCredential,
+        requireOperationId: bool
+    ) -> AuthRouteMeta:
+        route: APIRoute | Any | None = authorization.request.scope.get("route")
+        meta = AuthUserDep.RouteTable.get(id(route))
+        if meta is None:
+            # route registered after startup
+            meta = AuthUserDep.ResolveRoute(route, requireOperationId)
+            # a lenient resolution must not serve a dependency that require the operation id
+            if requireOperationId:
+                AuthUserDep.RouteTable[id(route)] = meta
+        return meta
+
+    @staticmethod
+    def BuildRouteTable(routes: Sequence[BaseRoute]):
+        """
+        Resolve auth metadata of every route using `AuthUserDep`.
+        Raise on invalid route, so misconfigured endpoint fail the boot instead of every request
+        """
+
+        requirements: dict[Callable[..., Any], tuple[bool, CredentialLocation | None]] = {
+            AuthUserDep.VerifyEndpoint: (True, None),
+            AuthUserDep.VerifyEndpointCompany: (False, CredentialLocation.company),
+            AuthUserDep.VerifyEndpointSystem: (True, CredentialLocation.system)
+        }
+        table: dict[int, AuthRouteMeta] = {}
+        errors: list[str] = []
+        for route in routes:
+            if not isinstance(route, APIRoute):
+                continue
+            usedDeps: set[Callable[..., Any]] = set()
+            pending: list[Dependant] = [route.dependant]
+            while len(pending) > 0:
+                dependant = pending.pop()
+                if dependant.call in requirements:
+                    usedDeps.add(dependant.call)
+                pending.extend(dependant.dependencies)
+            if len(usedDeps) == 0:
+                continue
+
+            try:
+                meta = AuthUserDep.ResolveRoute(
+                    route,
+                    any(requirements[x][0] for x in usedDeps)
+                )
+            except MsHTTPException as err:
+                errors.append(f"{route.path} [{','.join(route.methods)}]: {err.GetErrorMessage()}")
+                continue
+            for dep in usedDeps:
+                location = requirements[dep][1]
+                if (location is not None) and (meta.credentialLocations is not None) and (location not in meta.credentialLocations):
+                    errors.append(f"{route.path} [{','.join(route.methods)}]: {dep.__name__} but x-credentialLocations does not contain {location.value}")
+            table[id(route)] = meta
+
+        if len(errors) > 0:
+            raise Exception("Invalid authenticated route:\n" + "\n".join(errors))
+        AuthUserDep.RouteTable = table
+        msLogger.info(f"Auth route table built, {len(table)} routes")
+
+    @staticmethod
+    async def VerifyEndpoint(
+        authorization: Annotated[MsHTTPBearerCredential, Depends(AuthUser.BearerAuthenticationMethod)]
+    ) -> VerifyEndpointServiceResult:
+        meta = AuthUserDep.GetRouteMeta(authorization, True)
         return await AuthUser.VerifyEndpoint(
             authorization.credentials,
-            serviceName,
-            operationId
+            meta.serviceName,
+            meta.operationId
         )
     
     @staticmethod
     async def VerifyEndpointCompany(
         authorization: Annotated[MsHTTPBearerCredential, Depends(AuthUser.BearerAuthenticationMethodAccountCompany)]
     ) -> VerifyEndpointCompanyResult:
-        route: APIRoute | Any | None = authorization.request.scope.get("route")
-        if (route is None) or (not isinstance(route, APIRoute)):
-            raise MsHTTPInternalServerErrorException(
-                "INVALID_ROUTE_CLASS",
-                f"Endpoint bukan turunan dari class {APIRoute.__name__}",
-                debug={
-                    "type": str(route)
-                }
-            )
-        operationId = route.operation_id or route.unique_id
-        serviceName = settings.project.serviceName
-        if route.openapi_extra is not None:
-            mService: str | Any | None = route.openapi_extra.get("x-service")
-            if (mService is not None) and (isinstance(mService, str)):
-                serviceName = mService
-
+        meta = AuthUserDep.GetRouteMeta(authorization, False)
         verifyResult = await AuthUser.VerifyEndpoint(
             authorization.credentials,
-            serviceName,
-            operationId
+            meta.serviceName,
+            meta.operationId
         )
         if (verifyResult.roleLocation != RoleLocation.company) or (verifyResult.companyId is None) or (verifyResult.companyCategoryId is None):
             raise MsHTTPForbiddenException(
                 MsHTTPExceptionType.CREDENTIAL_LOCATION_SYSTEM_FORBIDDEN,
                 MsHTTPExceptionMessage.CREDENTIAL_LOCATION_SYSTEM_FORBIDDEN,
                 additionalData={
-                    "serviceName": serviceName,
-                    "operationId": operationId
+                    "serviceName": meta.serviceName,
+                    "operationId": meta.operationId
                 }
             )
         return VerifyEndpointCompanyResult(
@@ -242,42 +664,19 @@ class AuthUserDep:
     async def VerifyEndpointSystem(
         authorization: Annotated[MsHTTPBearerCredential, Depends(AuthUser.BearerAuthenticationMethodAccountSystem)]
     ) -> VerifyEndpointSystemResult:
-        route: APIRoute | Any | None = authorization.request.scope.get("route")
-        if (route is None) or (not isinstance(route, APIRoute)):
-            raise MsHTTPInternalServerErrorException(
-                "INVALID_ROUTE_CLASS",
-                f"Endpoint bukan turunan dari class {APIRoute.__name__}",
-                debug={
-                    "type": str(route)
-                }
-            )
-        operationId = route.operation_id
-        if operationId is None:
-            raise MsHTTPInternalServerErrorException(
-                "EMPTY_OPERATION_ID",
-                f"Endpoint tidak mempunyai id operasi (operationId)",
-                debug={
-                    "type": str(route)
-                }
-            )
-        serviceName = settings.project.serviceName
-        if route.openapi_extra is not None:
-            mService: str | Any | None = route.openapi_extra.get("x-service")
-            if (mService is not None) and (isinstance(mService, str)):
-                serviceName = mService
-
+        meta = AuthUserDep.GetRouteMeta(authorization, True)
         verifyResult = await AuthUser.VerifyEndpoint(
             authorization.credentials,
-            serviceName,
-            operationId
+            meta.serviceName,
+            meta.operationId
         )
         if (verifyResult.roleLocation != RoleLocation.system) or (verifyResult.companyId is not None) or (verifyResult.companyCategoryId is not None):
             raise MsHTTPForbiddenException(
                 MsHTTPExceptionType.CREDENTIAL_LOCATION_COMPANY_FORBIDDEN,
                 MsHTTPExceptionMessage.CREDENTIAL_LOCATION_COMPANY_FORBIDDEN,
                 additionalData={
-                    "serviceName": serviceName,
-                    "operationId": operationId
+                    "serviceName": meta.serviceName,
+                    "operationId": meta.operationId
                 }
             )
         return VerifyEndpointSystemResult(
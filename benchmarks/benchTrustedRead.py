@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: validated construction `resultClass(**item)` vs trusted construction `resultClass.FromDb(item)`
+on 100-item pages, the shape returned by `Paginate`.
+
+Run from project root:
+    python -m benchmarks.benchTrustedRead
+"""
+
+from datetime import datetime, timezone
+from timeit import repeat
+from typing import Any
+from bson import ObjectId as BsonObjectId
+from models.lead.enumLead import LeadStatus, LeadType
+from models.lead.modelLead import LeadView
+from models.partner.enumPartnerType import PartnerType
+from models.partner.modelPartner import PartnerView
+from models.shared.modelDataType import BaseModel
+
+PAGE_SIZE = 100
+NUMBER = 50
+REPEAT = 5
+
+
+def LeadDocument() -> dict[str, Any]:
+    return {
+        "_id": BsonObjectId(),
+        "name": "PT Lead Sejahtera",
+        "email": "lead@example.com",
+        "phone": "+6281234567890",
+        "requirementList": ["gudang", "armada"],
+        "pic": {
+            "name": "Budi",
+            "email": "budi@example.com",
+            "phone": "+6281234567891"
+        },
+        "potentialRevenue": 150000000,
+        "potentialSize": 25,
+        "leadTags": [BsonObjectId(), BsonObjectId()],
+        "partnerId": BsonObjectId(),
+        "salesId": BsonObjectId(),
+        "companyId": BsonObjectId(),
+        "masterDataId": BsonObjectId(),
+        "type": list(LeadType)[0].value,
+        "status": LeadStatus.NEW.value
+    }
+
+def PartnerDocument() -> dict[str, Any]:
+    return {
+        "_id": BsonObjectId(),
+        "name": "Cabang Surabaya",
+        "type": PartnerType.CABANG.value,
+        "parentId": BsonObjectId(),
+        "tags": ["jatim"],
+        "childIds": [BsonObjectId() for _ in range(5)],
+        "masterDataId": BsonObjectId(),
+        "companyId": BsonObjectId(),
+        "createdTime": datetime.now(timezone.utc)
+    }
+
+def Bench(resultClass: type[BaseModel], page: list[dict[str, Any]]):
+    # both path must produce the same response
+    for item in page:
+        assert resultClass(**item).model_dump(mode="json") == resultClass.FromDb(item).model_dump(mode="json")
+
+    validated = min(repeat(lambda: [resultClass(**item) for item in page], number=NUMBER, repeat=REPEAT)) / NUMBER
+    trusted = min(repeat(lambda: [resultClass.FromDb(item) for item in page], number=NUMBER, repeat=REPEAT)) / NUMBER
+    print(
+        f"{resultClass.__name__:<12} {PAGE_SIZE} items/page  "
+        f"validated {validated * 1000:8.3f} ms  "
+        f"trusted {trusted * 1000:8.3f} ms  "
+        f"speedup {validated / trusted:5.2f}x"
+    )
+
+if __name__ == "__main__":
+    Bench(LeadView, [LeadDocument() for _ in range(PAGE_SIZE)])
+    Bench(PartnerView, [PartnerDocument() for _ in range(PAGE_SIZE)])
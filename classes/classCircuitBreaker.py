@@ -0,0 +1,102 @@
+from enum import Enum
+from time import monotonic, time
+from typing import Any
+
+class MsCircuitBreakerState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+class MsCircuitBreaker:
+    """
+    Stop calling a failing dependency for a while.
+    - closed: every call allowed, `failureThreshold` consecutive failures open the breaker
+    - open: every call rejected until `resetTimeoutSeconds` passed
+    - half_open: only one probe call allowed, success close the breaker, failure open it again
+    - Not thread safe, only use from the event loop
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failureThreshold: int,
+        resetTimeoutSeconds: float
+    ) -> None:
+        self.name = name
+        self.failureThreshold = max(failureThreshold, 1)
+        self.resetTimeoutSeconds = max(resetTimeoutSeconds, 0)
+
+        self.state = MsCircuitBreakerState.closed
+        self._consecutiveFailures = 0
+        self._openedAt = 0.0
+        self._probing = False
+
+        self.lastStateChange: float | None = None
+        self.lastFailure: str | None = None
+        self.opened = 0
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+
+    def _SetState(self, state: MsCircuitBreakerState):
+        if self.state != state:
+            self.state = state
+            self.lastStateChange = time()
+
+    def AllowRequest(self) -> bool:
+        if self.state == MsCircuitBreakerState.closed:
+            return True
+        if self.state == MsCircuitBreakerState.open:
+            if monotonic() - self._openedAt < self.resetTimeoutSeconds:
+                self.rejected += 1
+                return False
+            self._SetState(MsCircuitBreakerState.half_open)
+        # half open, single probe
+        if self._probing:
+            self.rejected += 1
+            return False
+        self._probing = True
+        return True
+
+    def RecordSuccess(self):
+        self.successes += 1
+        self._consecutiveFailures = 0
+        self._probing = False
+        self._SetState(MsCircuitBreakerState.closed)
+
+    def RecordFailure(self, reason: str | None = None):
+        self.failures += 1
+        self.lastFailure = reason
+        self._consecutiveFailures += 1
+        if (self.state == MsCircuitBreakerState.half_open) or (self._consecutiveFailures >= self.failureThreshold):
+            if self.state != MsCircuitBreakerState.open:
+                self.opened += 1
+            self._openedAt = monotonic()
+            self._SetState(MsCircuitBreakerState.open)
+        self._probing = False
+
+    def Release(self):
+        """
+        Call ended without success or failure (cancelled), let another probe run
+        """
+
+        self._probing = False
+
+    def Stats(self) -> dict[str, Any]:
+        retryInSeconds = None
+        if self.state == MsCircuitBreakerState.open:
+            retryInSeconds = round(max(self.resetTimeoutSeconds - (monotonic() - self._openedAt), 0), 3)
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "consecutiveFailures": self._consecutiveFailures,
+            "failureThreshold": self.failureThreshold,
+            "resetTimeoutSeconds": self.resetTimeoutSeconds,
+            "retryInSeconds": retryInSeconds,
+            "lastStateChange": self.lastStateChange,
+            "lastFailure": self.lastFailure,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.failures
+        }
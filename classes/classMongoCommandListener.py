@@ -0,0 +1,83 @@
+from typing import Any
+from pymongo import monitoring
+
+class MsMongoCommandListener(monitoring.CommandListener):
+    """
+    Track write commands per namespace (`database.collection`).
+    - Called from pymongo worker threads, only keep plain counters here
+    - Generation change on write start and end, so a read running concurrently with a write never look up to date
+    - Write inside a transaction change the generation again on commit/abort, a read between the write and the commit
+      still see the previous snapshot
+    """
+
+    WriteCommands = frozenset([
+        "insert",
+        "update",
+        "delete",
+        "findAndModify",
+        "drop"
+    ])
+
+    TransactionEndCommands = frozenset([
+        "commitTransaction",
+        "abortTransaction"
+    ])
+
+    def __init__(self) -> None:
+        self._generations: dict[str, int] = {}
+        self._inFlight: dict[int, set[str]] = {}
+        # session id: (txnNumber, namespaces written by the transaction)
+        self._transactions: dict[Any, tuple[Any, set[str]]] = {}
+
+    def WriteGeneration(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def _Bump(self, namespaces: set[str]):
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    @staticmethod
+    def _SessionId(command: Any) -> Any:
+        lsid: dict[str, Any] | Any = command.get("lsid")
+        if not isinstance(lsid, dict):
+            return None
+        return lsid.get("id")
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        commandName = event.command_name
+        if commandName in MsMongoCommandListener.TransactionEndCommands:
+            sessionId = MsMongoCommandListener._SessionId(event.command)
+            transaction = self._transactions.pop(sessionId, None) if sessionId is not None else None
+            if (transaction is not None) and (transaction[0] == event.command.get("txnNumber")):
+                self._Bump(transaction[1])
+                self._inFlight[event.request_id] = transaction[1]
+            return
+        if commandName not in MsMongoCommandListener.WriteCommands:
+            return
+        collectionName: str | Any = event.command.get(commandName)
+        if isinstance(collectionName, str):
+            namespaces = {event.database_name + "." + collectionName}
+            self._Bump(namespaces)
+            self._inFlight[event.request_id] = namespaces
+            if event.command.get("autocommit") is False:
+                sessionId = MsMongoCommandListener._SessionId(event.command)
+                if sessionId is not None:
+                    txnNumber = event.command.get("txnNumber")
+                    transaction = self._transactions.get(sessionId)
+                    if (transaction is None) or (transaction[0] != txnNumber):
+                        # previous transaction of the session never ended here (ex: session ended), forget it
+                        transaction = (txnNumber, set())
+                        self._transactions[sessionId] = transaction
+                    transaction[1].update(namespaces)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        namespaces = self._inFlight.pop(event.request_id, None)
+        if namespaces is not None:
+            self._Bump(namespaces)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        namespaces = self._inFlight.pop(event.request_id, None)
+        if namespaces is not None:
+            self._Bump(namespaces)
+
+mongoCommandListener = MsMongoCommandListener()
@@ -0,0 +1,69 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+TSingleFlightResult = TypeVar("TSingleFlightResult")
+
+class MsSingleFlight(Generic[TSingleFlightResult]):
+    """
+    Coalesce concurrent calls with the same key into one in-flight call.
+    - Every caller with the same key receive the same result, or the same exception:
+      the first caller get the raised instance, the others a shallow copy (`__cause__` is the shared instance),
+      so a caller mutating or re-raising it does not affect the others
+    - The shared call run as its own task, so a cancelled caller never cancel the others
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task[TSingleFlightResult]] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def Do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[TSingleFlightResult]]
+    ) -> TSingleFlightResult:
+        task = self._calls.get(key)
+        leader = task is None
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+
+            def donecb(t: asyncio.Task[TSingleFlightResult]):
+                if self._calls.get(key) is t:
+                    del self._calls[key]
+                # mark exception as retrieved, when every caller already cancelled
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(donecb)
+        else:
+            self.shared += 1
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            if leader:
+                raise
+            errCopy: Exception | None = None
+            try:
+                errCopy = copy.copy(err)
+            except Exception:
+                pass
+            if errCopy is None:
+                # exception that can not be rebuilt from its args is shared
+                raise
+            raise errCopy from err
+
+    def Stats(self) -> dict[str, Any]:
+        return {
+            "inFlight": len(self._calls),
+            "executed": self.executed,
+            "shared": self.shared
+        }
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+TCacheValue = TypeVar("TCacheValue")
+
+class MsTtlLruCacheEntry(Generic[TCacheValue]):
+    __slots__ = ("value", "expiredAt")
+
+    def __init__(self, value: TCacheValue, expiredAt: float) -> None:
+        self.value = value
+        self.expiredAt = expiredAt
+
+class MsTtlLruCache(Generic[TCacheValue]):
+    """
+    In-process cache with time to live and least recently used eviction.
+    - Expired entry is kept for `staleSeconds` more, only readable by `GetStale`
+    - Not thread safe, only use from the event loop
+    """
+
+    def __init__(
+        self,
+        maxSize: int,
+        ttlSeconds: float,
+        staleSeconds: float = 0
+    ) -> None:
+        if maxSize < 1:
+            maxSize = 1
+        if ttlSeconds < 0:
+            ttlSeconds = 0
+        if staleSeconds < 0:
+            staleSeconds = 0
+        self.maxSize = maxSize
+        self.ttlSeconds = ttlSeconds
+        self.staleSeconds = staleSeconds
+        self._items: OrderedDict[Hashable, MsTtlLruCacheEntry[TCacheValue]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.staleHits = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def Get(self, key: Hashable) -> TCacheValue | None:
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        now = monotonic()
+        if entry.expiredAt <= now:
+            if entry.expiredAt + self.staleSeconds <= now:
+                del self._items[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def GetStale(self, key: Hashable) -> TCacheValue | None:
+        """
+        Get entry even when expired, as long as within `staleSeconds`
+        """
+
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        if entry.expiredAt + self.staleSeconds <= monotonic():
+            del self._items[key]
+            self.expirations += 1
+            return None
+        self.staleHits += 1
+        return entry.value
+
+    def Set(self, key: Hashable, value: TCacheValue, ttlSeconds: float | None = None):
+        if ttlSeconds is None:
+            ttlSeconds = self.ttlSeconds
+        if ttlSeconds <= 0:
+            return
+        self._items[key] = MsTtlLruCacheEntry(value, monotonic() + ttlSeconds)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxSize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def Delete(self, key: Hashable) -> bool:
+        return self._items.pop(key, None) is not None
+
+    def RemoveIf(self, predicate: Callable[[Hashable, TCacheValue], bool]) -> int:
+        """
+        Remove every entry matching the predicate, scan the whole cache
+        """
+
+        keys = [key for key, entry in self._items.items() if predicate(key, entry.value)]
+        for key in keys:
+            del self._items[key]
+        return len(keys)
+
+    def Clear(self):
+        self._items.clear()
+
+    def Stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "maxSize": self.maxSize,
+            "ttlSeconds": self.ttlSeconds,
+            "staleSeconds": self.staleSeconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups > 0 else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "staleHits": self.staleHits
+        }
+
+    def ResetStats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.staleHits = 0
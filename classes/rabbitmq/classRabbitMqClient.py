@@ -1,11 +1,10 @@
 import asyncio
-from datetime import datetime
 from enum import Enum
 import functools
 from asyncio import AbstractEventLoop, Task
 import json
 import threading
-from time import sleep
+from time import perf_counter
 from typing import Any, Awaitable, Callable
 from fastapi.encoders import jsonable_encoder
 from pika import URLParameters
@@ -22,6 +21,8 @@ from classes.rabbitmq.classRabbitMqUtils import (
     MsRabbitMqExchangeAlreadyExists,
     MsRabbitMqExchangeNotFound,
     MsRabbitMqNotActive,
+    MsRabbitMqPublishNacked,
+    MsRabbitMqPublishNotConfirmed,
     MsRabbitMqQueueNotFound
 )
 from models.shared.modelDataType import BaseModel
@@ -34,14 +35,47 @@ class MsRabbitMqPublishResponse:
         exchange: str,
         routingKey: str,
         body: str | bytes,
-        properties: BasicProperties
+        properties: BasicProperties,
+        confirmation: 'asyncio.Future[bool] | None' = None
     ) -> None:
         self.err = err
         self.exchange = exchange
         self.routingKey = routingKey
         self.body = body
         self.properties = properties
-    
+        self.confirmation = confirmation
+        """
+        Resolved on broker ack (true) or nack (false), null when the channel is not in confirm mode
+        """
+        self.confirmed: bool | None = None
+
+    async def WaitConfirm(self, timeout: float | None = None) -> bool:
+        """
+        True when the broker acked the message.
+        False on publish error, nack, channel closed or timeout, `err` is filled
+        """
+
+        if self.err is not None:
+            self.confirmed = False
+            return False
+        if self.confirmation is None:
+            # no confirm mode, published is the best we know
+            self.confirmed = True
+            return True
+        try:
+            self.confirmed = await asyncio.wait_for(asyncio.shield(self.confirmation), timeout)
+        except asyncio.TimeoutError:
+            self.err = MsRabbitMqPublishNotConfirmed(f"timeout {timeout} seconds")
+            self.confirmed = False
+            return False
+        except MsRabbitMqException as err:
+            self.err = err
+            self.confirmed = False
+            return False
+        if not self.confirmed:
+            self.err = MsRabbitMqPublishNacked()
+        return self.confirmed
+
 
 class MsRabbitMqHandlerResult(int, Enum):
     ack = 1
@@ -57,6 +91,88 @@ MsRabbitMqHandler = Callable[
     Awaitable[MsRabbitMqHandlerResult]
 ]
 
+class MsRabbitMqMessage:
+    def __init__(
+        self,
+        method: Basic.Deliver,
+        properties: BasicProperties,
+        body: bytes
+    ) -> None:
+        self.method = method
+        self.properties = properties
+        self.body = body
+
+MsRabbitMqBatchHandler = Callable[
+    [
+        'MsRabbitMqQueue',
+        list[MsRabbitMqMessage]     # messages, delivery order
+    ],
+    Awaitable[MsRabbitMqHandlerResult]
+]
+
+MsRabbitMqWorkerKey = Callable[
+    [
+        Basic.Deliver,      # method
+        BasicProperties,    # properties
+        bytes               # body
+    ],
+    Any
+]
+
+def MsRabbitMqMessageIdKey(method: Basic.Deliver, properties: BasicProperties, body: bytes) -> Any:
+    """
+    Worker lane key: `_id` of the JSON body, routing key when missing
+    """
+
+    try:
+        data = json.loads(body)
+    except Exception:
+        data = None
+    if isinstance(data, dict) and (data.get("_id") is not None): # type: ignore
+        return data["_id"] # type: ignore
+    return method.routing_key
+
+def MsRabbitMqRoutingKeyName(routingKey: str | None) -> str | None:
+    # str Enum member hash by its name, dispatch table key on the plain value
+    if isinstance(routingKey, Enum):
+        return str(routingKey.value)
+    return routingKey
+
+class MsRabbitMqHandlerStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.messages = 0
+        self.ack = 0
+        self.nack = 0
+        self.errors = 0
+        self.totalMs = 0.0
+        self.maxMs = 0.0
+
+    def Add(self, result: MsRabbitMqHandlerResult, elapsedMs: float, *, messages: int = 1, error: bool = False):
+        self.calls += 1
+        self.messages += messages
+        if result == MsRabbitMqHandlerResult.ack:
+            self.ack += messages
+        else:
+            self.nack += messages
+        if error:
+            self.errors += 1
+        self.totalMs += elapsedMs
+        if elapsedMs > self.maxMs:
+            self.maxMs = elapsedMs
+
+    def Stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "messages": self.messages,
+            "ack": self.ack,
+            "nack": self.nack,
+            "errors": self.errors,
+            "totalMs": round(self.totalMs, 3),
+            "avgMs": round(self.totalMs / self.calls, 3) if self.calls > 0 else 0,
+            "maxMs": round(self.maxMs, 3)
+        }
+
 class MsRabbitMqConfigHandler:
     def __init__(
         self,
@@ -67,6 +183,23 @@ class MsRabbitMqConfigHandler:
         self.queue = queue
         self.routingKey = routingKey
         self.handler = handler
+        self.stats = MsRabbitMqHandlerStats()
+
+class MsRabbitMqConfigBatchHandler:
+    def __init__(
+        self,
+        queue: 'MsRabbitMqQueue',
+        routingKey: str | None,
+        handler: MsRabbitMqBatchHandler,
+        batchSize: int,
+        batchWaitMs: int
+    ) -> None:
+        self.queue = queue
+        self.routingKey = routingKey
+        self.handler = handler
+        self.batchSize = batchSize
+        self.batchWaitMs = batchWaitMs
+        self.stats = MsRabbitMqHandlerStats()
 
 def rabbitmq_run_in_event_loop(func: Callable[..., Any]):
     @functools.wraps(func)
@@ -100,6 +233,8 @@ class MsRabbitMqQueue:
         name: str,
         *,
         shutdown_timeout_seconds: int = 20,
+        workerLanes: int = 0,
+        workerKey: MsRabbitMqWorkerKey | None = None,
 
         queuePassive: bool = False,
         queueDurable: bool = False,
@@ -131,9 +266,22 @@ class MsRabbitMqQueue:
         self.consumerArguments = consumerArguments
         self.consumerAllowConsuming = consumerAllowConsuming
 
+        self.workerLanes = max(workerLanes, 0)
+        """
+        0: a task per message, no ordering.
+        N: messages with the same `workerKey` run one after another on one of N lanes, lanes run concurrently
+        """
+        self.workerKey = workerKey or MsRabbitMqMessageIdKey
+
         self.bindingList_: list[MsRabbitMqQueueBind] = []
         self._pending_futures: set[Task[None]] = set()
         self._shutdown_timeout_seconds = shutdown_timeout_seconds
+        # messages waiting for a batch handler, per (handler, routing key)
+        self._batches: dict[tuple[MsRabbitMqConfigBatchHandler, str], list[MsRabbitMqMessage]] = {}
+        self._batch_timers: dict[tuple[MsRabbitMqConfigBatchHandler, str], asyncio.TimerHandle] = {}
+        # last task of each worker lane
+        self._lane_tails: dict[int, Task[None]] = {}
+        self.unhandled_ = 0
 
         self.loading_ = False
         self.loaded_ = False
@@ -161,6 +309,8 @@ class MsRabbitMqQueue:
 
     def start_(self):
         self._pending_futures.clear()
+        self._lane_tails.clear()
+        self.drop_batches_()
         self.loading_ = False
         self.loaded_ = False
         self.queueName_ = None
@@ -176,27 +326,53 @@ class MsRabbitMqQueue:
             
         self.update_name_()
 
-    def shutdown(self):
-        while len(self._pending_futures) > 0:
-            try:
-                f = self._pending_futures.pop()
-                if not f.done():
-                    self.stoping_ = True
-                    tStart = datetime.now().timestamp()
-                    waitSeconds = self._shutdown_timeout_seconds
-                    while (not f.done()):
-                        sleep(0.1)
-                        # wait for waitSeconds seconds
-                        if datetime.now().timestamp() - tStart > waitSeconds:
-                            # force shutdown
-                            msLogger.warning(f"{self} is timeout ({waitSeconds}) seconds")
-                            break
-                    if not f.done():
-                        f.cancel()
-            except Exception as e:
-                msLogger.warning(f"{self}::shutdown; error; {str(e)}")
+    def drop_batches_(self):
+        # not acked yet, the broker requeue them when the channel close
+        for timer in self._batch_timers.values():
+            timer.cancel()
+        self._batch_timers.clear()
+        self._batches.clear()
 
+    def abandon_(self):
+        """
+        Connection lost, nothing can be acked anymore. Running handlers finish on their own,
+        the broker redeliver every unacked message
+        """
+
+        self.stoping_ = True
+        self.drop_batches_()
         self._pending_futures.clear()
+        self._lane_tails.clear()
+
+    async def shutdown(self) -> int:
+        """
+        Run the buffered batches and wait the in-flight handlers, up to `shutdown_timeout_seconds`.
+        Handler still running after the deadline is cancelled, its message stay unacked.
+        - return: count of cancelled handlers
+        """
+
+        self.stoping_ = True
+        channel = self.owner.channel_
+        for key in list(self._batches.keys()):
+            if channel is not None:
+                self.flush_batch_(channel, key)
+        self.drop_batches_()
+
+        pending = {f for f in self._pending_futures if not f.done()}
+        cancelled = 0
+        if len(pending) > 0:
+            waitSeconds = self._shutdown_timeout_seconds
+            _, pending = await asyncio.wait(pending, timeout=waitSeconds)
+            if len(pending) > 0:
+                msLogger.warning(f"{self} is timeout ({waitSeconds}) seconds; cancel {len(pending)} handler")
+                for f in pending:
+                    f.cancel()
+                await asyncio.wait(pending, timeout=1)
+                cancelled = len(pending)
+
+        self._pending_futures.clear()
+        self._lane_tails.clear()
+        return cancelled
 
     def addBinding(self, exchange: 'MsRabbitMqExchange', routingKey: 'MsRabbitMqRoutingKey | None'):
         for binding in self.bindingList_:
@@ -214,20 +390,59 @@ class MsRabbitMqQueue:
         self.bindingList_.append(ret)
         return ret
 
-    def _on_message_callback(self, channel: Channel, method: Basic.Deliver, properties: BasicProperties, body: bytes):
-        if (not self.consuming_) or (self.stoping_):
-            return
+    def lane_(self, key: Any) -> int | None:
+        if self.workerLanes <= 0:
+            return None
+        return hash(str(key)) % self.workerLanes
+
+    async def _run_after(self, previous: Task[None] | None, coro: Awaitable[None]):
+        if previous is not None:
+            try:
+                await asyncio.shield(previous)
+            except BaseException:
+                # error already logged by the previous task
+                pass
+        await coro
+
+    def _create_task(self, coro: Awaitable[None], lane: int | None = None):
         def donecb(f: Task[None]):
             self._pending_futures.discard(f)
+            if (lane is not None) and (self._lane_tails.get(lane) is f):
+                del self._lane_tails[lane]
+            if f.cancelled():
+                return
             try:
                 f.result()
             except Exception as err:
                 msLogger.critical(str(err), err, False)
 
-        coro = self.do_on_message(channel, method, properties, body)
-        t = self.owner.ioloop.create_task(coro)
+        if lane is not None:
+            coro = self._run_after(self._lane_tails.get(lane), coro)
+        t = self.owner.ioloop.create_task(coro) # type: ignore
         t.add_done_callback(donecb)
         self._pending_futures.add(t)
+        if lane is not None:
+            self._lane_tails[lane] = t
+
+    def _on_message_callback(self, channel: Channel, method: Basic.Deliver, properties: BasicProperties, body: bytes):
+        if (not self.consuming_) or (self.stoping_):
+            return
+        if not self.consumer_auto_ack_:
+            self.owner.unackedTags_.add(method.delivery_tag)
+
+        batchHandler = self.batch_handler_(method)
+        if batchHandler is not None:
+            self.add_to_batch_(channel, batchHandler, MsRabbitMqMessage(method, properties, body))
+            return
+
+        lane = None
+        if self.workerLanes > 0:
+            try:
+                lane = self.lane_(self.workerKey(method, properties, body))
+            except Exception as err:
+                lane = self.lane_(method.routing_key)
+                msLogger.warning(f"{self}::workerKey; error; {str(err)}")
+        self._create_task(self.do_on_message(channel, method, properties, body), lane)
         # f.result()
         # coro = MsRabbitMqConsumerQueue.do_on_message()
         # future = asyncio.run_coroutine_threadsafe(coro, self.owner._ioloop)
@@ -237,31 +452,80 @@ class MsRabbitMqQueue:
         # self.owner._ioloop.run_until_complete(MsRabbitMqConsumerQueue.do_on_message(self))
         # channel.basic_ack(method.delivery_tag)
 
+    def batch_handler_(self, method: Basic.Deliver) -> MsRabbitMqConfigBatchHandler | None:
+        table = self.owner.batchDispatch_
+        if len(table) == 0:
+            return None
+        return table.get((self, method.routing_key)) or table.get((self, None))
+
+    def add_to_batch_(self, channel: Channel, handler: MsRabbitMqConfigBatchHandler, message: MsRabbitMqMessage):
+        key = (handler, str(message.method.routing_key))
+        batch = self._batches.setdefault(key, [])
+        batch.append(message)
+        if len(batch) >= handler.batchSize:
+            self.flush_batch_(channel, key)
+        elif key not in self._batch_timers:
+            self._batch_timers[key] = self.owner.ioloop.call_later(
+                handler.batchWaitMs / 1000,
+                self.flush_batch_,
+                channel,
+                key
+            )
+
+    def flush_batch_(self, channel: Channel, key: tuple[MsRabbitMqConfigBatchHandler, str]):
+        timer = self._batch_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(key, None)
+        if (batch is None) or (len(batch) == 0):
+            return
+        # a lane per routing key, next batch of the same routing key wait for the previous one
+        self._create_task(self.do_on_batch(channel, key[0], batch), self.lane_(key[1]))
+
+    async def do_on_batch(self, channel: Channel, handler: MsRabbitMqConfigBatchHandler, batch: list[MsRabbitMqMessage]):
+        tStart = perf_counter()
+        try:
+            ret = await handler.handler(self, batch)
+        except Exception as errHandler:
+            # a transient error must not ack the whole batch
+            routingKey = batch[0].method.routing_key
+            table = self.owner.dispatch_
+            single = table.get((self, routingKey)) or table.get((self, None))
+            handler.stats.Add(MsRabbitMqHandlerResult.nack, (perf_counter() - tStart) * 1000, messages=len(batch), error=True)
+            msLogger.error(f"Error executting batch callback rabbitmq consumer; queue: {self}; routing key: {routingKey}; size: {len(batch)}; {'retry one by one' if single is not None else 'requeue'}; {str(errHandler)}")
+            if single is not None:
+                for message in batch:
+                    await self.do_on_message(channel, message.method, message.properties, message.body)
+            elif not self.consumer_auto_ack_:
+                self.owner.settle_(channel, [m.method.delivery_tag for m in batch], False)
+            return
+        handler.stats.Add(ret, (perf_counter() - tStart) * 1000, messages=len(batch))
+
+        if not self.consumer_auto_ack_:
+            self.owner.settle_(channel, [m.method.delivery_tag for m in batch], ret == MsRabbitMqHandlerResult.ack)
+
     async def do_on_message(self, channel: Channel, method: Basic.Deliver, properties: BasicProperties, body: bytes):
         msLogger.success(f"do_on_message; threadId: {threading.get_native_id()}")
-        handled = False
         ret = MsRabbitMqHandlerResult.ack
-        for handler in self.owner.handlers_:
-            if handler.queue != self:
-                continue
-            if handler.routingKey is not None:
-                if handler.routingKey != method.routing_key:
-                    continue
-            handled = True
+        table = self.owner.dispatch_
+        handler = table.get((self, method.routing_key)) or table.get((self, None))
+        if handler is not None:
+            tStart = perf_counter()
+            error = False
             try:
                 ret = await handler.handler(self, method, properties, body)
             except Exception as errHandler:
                 ret = MsRabbitMqHandlerResult.ack
+                error = True
                 msLogger.error(f"Error executting callback rabbitmq consumer; method: {method}; properties: {properties}; {str(errHandler)}")
-            break
-        if (self.owner.debug_) and (not handled):
-            msLogger.data(f"Unhandled callback; method: {method}; properties: {properties}")
+            handler.stats.Add(ret, (perf_counter() - tStart) * 1000, error=error)
+        else:
+            self.unhandled_ += 1
+            if self.owner.debug_:
+                msLogger.data(f"Unhandled callback; method: {method}; properties: {properties}")
 
         if not self.consumer_auto_ack_:
-            if ret == MsRabbitMqHandlerResult.ack:
-                channel.basic_ack(method.delivery_tag)
-            else:
-                channel.basic_nack(method.delivery_tag)
+            self.owner.settle_(channel, [method.delivery_tag], ret == MsRabbitMqHandlerResult.ack)
 
 class MsRabbitMqRoutingKey:
     def __init__(
@@ -411,6 +675,10 @@ class MsRabbitMqClient:
             prefetch_count = 0
         self._prefetch_count = prefetch_count
         self._allowPublishing = allowPublishing
+        # publisher confirms, delivery tags count from 1 per channel after Confirm.Select
+        self._confirmMode = False
+        self._publishTag = 0
+        self._confirms: dict[int, asyncio.Future[bool]] = {}
         self.channel_: Channel | None = None
         self._active = False
         self.exchangeList_: list[MsRabbitMqExchange] = []
@@ -421,6 +689,12 @@ class MsRabbitMqClient:
         self._pending_auto_reconnect: set[Task[None]] = set()
         self._reconnect_started = False
         self.handlers_: list[MsRabbitMqConfigHandler] = []
+        self.batchHandlers_: list[MsRabbitMqConfigBatchHandler] = []
+        # (queue, routing key), routing key null for the queue wildcard. First registered handler win
+        self.dispatch_: dict[tuple[MsRabbitMqQueue, str | None], MsRabbitMqConfigHandler] = {}
+        self.batchDispatch_: dict[tuple[MsRabbitMqQueue, str | None], MsRabbitMqConfigBatchHandler] = {}
+        # delivery tags of the current channel not acked/nacked yet
+        self.unackedTags_: set[int] = set()
         self._recover = True
 
     @property
@@ -434,15 +708,112 @@ class MsRabbitMqClient:
     ):
 
         def func(handler: MsRabbitMqHandler) -> MsRabbitMqHandler:
-            self.handlers_.append(MsRabbitMqConfigHandler(queue=queue, routingKey=routingKey, handler=handler))
+            config = MsRabbitMqConfigHandler(queue=queue, routingKey=routingKey, handler=handler)
+            self.handlers_.append(config)
+            self.dispatch_.setdefault((queue, MsRabbitMqRoutingKeyName(routingKey)), config)
             return handler
         return func
+
+    def RegisterBatchHandler(
+        self,
+        queue: MsRabbitMqQueue,
+        routingKey: str | None = None,
+        *,
+        batchSize: int,
+        batchWaitMs: int = 50
+    ):
+        """
+        Handler receive up to `batchSize` messages of one routing key, or less after `batchWaitMs`.
+        - Take precedence over `RegisterHandler` of the same queue/routing key
+        - One result for the whole batch, acked/nacked with `multiple=True` when possible
+        - Handler raising: every message is retried alone by `RegisterHandler` of its routing key,
+          or nacked (requeued) when there is none
+        """
+
+        if batchSize < 1:
+            batchSize = 1
+        if batchWaitMs < 0:
+            batchWaitMs = 0
+        if (self._prefetch_count > 0) and (self._prefetch_count < batchSize):
+            msLogger.warning(f"{__name__}::RegisterBatchHandler; prefetch_count {self._prefetch_count} lower than batchSize {batchSize}, batch never full")
+
+        def func(handler: MsRabbitMqBatchHandler) -> MsRabbitMqBatchHandler:
+            config = MsRabbitMqConfigBatchHandler(
+                queue=queue,
+                routingKey=routingKey,
+                handler=handler,
+                batchSize=batchSize,
+                batchWaitMs=batchWaitMs
+            )
+            self.batchHandlers_.append(config)
+            self.batchDispatch_.setdefault((queue, MsRabbitMqRoutingKeyName(routingKey)), config)
+            return handler
+        return func
+
+    def Stats(self) -> dict[str, Any]:
+        """
+        Counters per queue and handler since start of the process
+        """
+
+        ret: dict[str, Any] = {}
+        for queue in self.queueList_:
+            ret[queue.name] = {
+                "workerLanes": queue.workerLanes,
+                "inFlight": len(queue._pending_futures),
+                "unhandled": queue.unhandled_,
+                "handlers": {
+                    (routingKey if routingKey is not None else "*"): {
+                        "handler": handler.handler.__name__,
+                        **handler.stats.Stats()
+                    }
+                    for (q, routingKey), handler in self.dispatch_.items() if q is queue
+                },
+                "batchHandlers": {
+                    (routingKey if routingKey is not None else "*"): {
+                        "handler": handler.handler.__name__,
+                        "batchSize": handler.batchSize,
+                        "batchWaitMs": handler.batchWaitMs,
+                        **handler.stats.Stats()
+                    }
+                    for (q, routingKey), handler in self.batchDispatch_.items() if q is queue
+                }
+            }
+        return ret
+
+    def settle_(self, channel: Channel, deliveryTags: list[int], ack: bool):
+        """
+        Ack/nack the delivery tags. One `multiple=True` frame when every unacked tag up to the highest
+        is in `deliveryTags`, otherwise a frame per tag (tag of another batch still in progress)
+        """
+
+        tags = set(deliveryTags)
+        if len(tags) == 0:
+            return
+        if not channel.is_open:
+            # tags died with the channel, the broker requeue them
+            return
+        maxTag = max(tags)
+        if (channel is self.channel_) and (len(tags) > 1) and all((t in tags) for t in self.unackedTags_ if t <= maxTag):
+            if ack:
+                channel.basic_ack(maxTag, multiple=True)
+            else:
+                channel.basic_nack(maxTag, multiple=True)
+        else:
+            for tag in sorted(tags):
+                if ack:
+                    channel.basic_ack(tag)
+                else:
+                    channel.basic_nack(tag)
+        if channel is self.channel_:
+            self.unackedTags_ -= tags
     
     def AddQueue(
         self,
         name: str,
         *,
         shutdown_timeout_seconds: int = 20,
+        workerLanes: int = 0,
+        workerKey: MsRabbitMqWorkerKey | None = None,
 
         queuePassive: bool = False,
         queueDurable: bool = False,
@@ -468,6 +839,8 @@ class MsRabbitMqClient:
             self,
             queueName,
             shutdown_timeout_seconds=shutdown_timeout_seconds,
+            workerLanes=workerLanes,
+            workerKey=workerKey,
 
             queuePassive=queuePassive,
             queueDurable=queueDurable,
@@ -589,8 +962,41 @@ class MsRabbitMqClient:
             pass
         self._pending_auto_reconnect.clear()
         self._stop_timer_reconnect()
+        if self._active and (not self._closing):
+            await self._drain()
         self._stop()
 
+    async def _drain(self):
+        """
+        Graceful stop: no new delivery, wait the in-flight handlers, requeue what is left.
+        The channel is closed afterward by `_stop`
+        """
+
+        for queue in self.queueList_:
+            queue.stoping_ = True
+        channel = self.channel_
+        if (channel is not None) and channel.is_open:
+            for queue in self.queueList_:
+                if (queue.consuming_) and (queue.consumer_tag_ is not None) and (not queue.stop_consuming_):
+                    if self.debug_:
+                        msLogger.info(f"{__name__}::drain; Sending a Basic.Cancel RPC command to RabbitMQ; {queue}")
+                    queue.stop_consuming_ = True
+                    # nowait, deliveries already on the wire are rejected (requeued) by pika
+                    channel.basic_cancel(queue.consumer_tag_)
+
+        tStart = perf_counter()
+        results = await asyncio.gather(*[queue.shutdown() for queue in self.queueList_], return_exceptions=True)
+        for queue, result in zip(self.queueList_, results):
+            if isinstance(result, BaseException):
+                msLogger.warning(f"{queue}::shutdown; error; {str(result)}")
+
+        channel = self.channel_
+        if (len(self.unackedTags_) > 0) and (channel is not None) and channel.is_open:
+            msLogger.warning(f"{__name__}::drain; requeue {len(self.unackedTags_)} unfinished message")
+            channel.basic_nack(max(self.unackedTags_), multiple=True, requeue=True)
+        self.unackedTags_.clear()
+        msLogger.info(f"{__name__}::drain; drained in {round((perf_counter() - tStart) * 1000, 3)} ms")
+
     def _stop(self):
         if not self._closing:
             if self._closing:
@@ -638,6 +1044,7 @@ class MsRabbitMqClient:
             self._do_reconnect()
 
     def _connection_on_closed(self, conn: AsyncioConnection, reason: AMQPError):
+        self._fail_confirms(f"connection closed; {reason}")
         self.channel_ = None
         self._connection = None
         self._closing = False
@@ -685,9 +1092,7 @@ class MsRabbitMqClient:
 
         """
         for queue in self.queueList_:
-            queue.stoping_ = True
-        for queue in self.queueList_:
-            queue.shutdown()
+            queue.abandon_()
         _stopConsumer = False
         if (self.channel_ is not None):
             for queue in self.queueList_:
@@ -742,7 +1147,18 @@ class MsRabbitMqClient:
             self._closing = False
             self._active = False
 
+    def _fail_confirms(self, reason: str):
+        self._confirmMode = False
+        confirms = self._confirms
+        self._confirms = {}
+        for confirmation in confirms.values():
+            if not confirmation.done():
+                confirmation.set_exception(MsRabbitMqPublishNotConfirmed(reason))
+                # retrieved even when nobody wait for it
+                confirmation.exception()
+
     def _channel_on_close(self, channel: Channel, reason: AMQPError):
+        self._fail_confirms(f"channel closed; {reason}")
         self._closing = True
         if self.debug_:
             if isinstance(reason, ChannelClosedByBroker):
@@ -764,6 +1180,7 @@ class MsRabbitMqClient:
 
     def _channel_on_open(self, channel: Channel):
         self.channel_ = channel
+        self.unackedTags_.clear()
         self.channel_.add_on_close_callback(self._channel_on_close) # type: ignore
 
         if self.debug_:
@@ -925,6 +1342,8 @@ class MsRabbitMqClient:
             self.channel_.confirm_delivery(
                 self._on_delivery_confirmation # type: ignore
             )
+            self._confirmMode = True
+            self._publishTag = 0
 
         if hasConsumer:
             if self.debug_:
@@ -996,14 +1415,26 @@ class MsRabbitMqClient:
             msLogger.success(f"{__name__}::queue_consumeOk; Client ready", foreground="red")
 
     def _on_delivery_confirmation(self, frame: Method): # type: ignore
-        if not isinstance(frame.method, Basic.Ack): # type: ignore
+        if not isinstance(frame.method, (Basic.Ack, Basic.Nack)): # type: ignore
             return
-        # print(type(frame.method))
-        confirmation_type = frame.method.NAME.split('.')[1].lower()
-        ack_multiple = frame.method.multiple
-        delivery_tag = frame.method.delivery_tag
+        acked = isinstance(frame.method, Basic.Ack) # type: ignore
+        ack_multiple: bool = frame.method.multiple # type: ignore
+        delivery_tag: int = frame.method.delivery_tag # type: ignore
 
-        msLogger.info(f"Received '{confirmation_type}' for delivery tag: '{delivery_tag}' (multiple: {ack_multiple})")
+        if self.debug_:
+            msLogger.info(f"Received '{'ack' if acked else 'nack'}' for delivery tag: '{delivery_tag}' (multiple: {ack_multiple})")
+        elif not acked:
+            msLogger.warning(f"{__name__}::delivery_confirmation; nack for delivery tag: '{delivery_tag}' (multiple: {ack_multiple})")
+
+        if ack_multiple:
+            # tags are inserted in increasing order
+            tags = [tag for tag in self._confirms if tag <= delivery_tag]
+        else:
+            tags = [delivery_tag]
+        for tag in tags:
+            confirmation = self._confirms.pop(tag, None)
+            if (confirmation is not None) and (not confirmation.done()):
+                confirmation.set_result(acked)
 
     async def _do_publish(
         self,
@@ -1028,6 +1459,7 @@ class MsRabbitMqClient:
                 body,
                 properties if properties else BasicProperties()
             )
+        confirmation: asyncio.Future[bool] | None = None
         try:
             self.channel_.basic_publish(
                 exchange,
@@ -1035,6 +1467,10 @@ class MsRabbitMqClient:
                 body=body,
                 properties=properties
             )
+            if self._confirmMode:
+                self._publishTag += 1
+                confirmation = self.ioloop.create_future()
+                self._confirms[self._publishTag] = confirmation
         except Exception as err:
             if self.debug_:
                 msLogger.error(f"{__name__}::__do_publish; {str(err)}")
@@ -1051,7 +1487,8 @@ class MsRabbitMqClient:
             exchange,
             routingKey,
             body,
-            properties if properties else BasicProperties()
+            properties if properties else BasicProperties(),
+            confirmation
         )
 
     async def _do_publish_string(
@@ -1202,6 +1639,41 @@ class MsRabbitMqClient:
             by_alias
         )
 
+    async def publish_batch(
+        self,
+        exchangeName: str | MsRabbitMqExchange,
+        messages: list[tuple[str, str | bytes | dict[str, Any] | BaseModel]],
+        properties: BasicProperties | None = None,
+        *,
+        timeout: float | None = None,
+        by_alias: bool = False
+    ) -> list[MsRabbitMqPublishResponse]:
+        """
+        Publish every (routing key, body) without waiting, then wait the confirms.
+        The broker usually confirm the whole batch with one `multiple=True` ack.
+        - return: response per message, `confirmed` filled
+        """
+
+        selExchange = self._ValidateSource(
+            exchangeName=exchangeName
+        )
+        exchange = selExchange.name if isinstance(selExchange, MsRabbitMqExchange) else selExchange
+
+        responses: list[MsRabbitMqPublishResponse] = []
+        for routingKey, body in messages:
+            if isinstance(body, BaseModel):
+                response = await self._do_publish_model(exchange, routingKey, body, properties, by_alias)
+            elif isinstance(body, dict):
+                response = await self._do_publish_dictionary(exchange, routingKey, body, properties)
+            elif isinstance(body, str):
+                response = await self._do_publish_string(exchange, routingKey, body, properties)
+            else:
+                response = await self._do_publish(exchange, routingKey, body, properties)
+            responses.append(response)
+
+        await asyncio.gather(*[r.WaitConfirm(timeout) for r in responses])
+        return responses
+
     def _start_reconnect(self):
         self._stop_timer_reconnect()
         self._start_timer_reconnect()
@@ -93,4 +93,21 @@ class MsRabbitMqDisconnecting(MsRabbitMqException):
         return "Client in  disconnecting state"
     def __str__(self) -> str:
         return self.__repr__()
-    
\ No newline at end of file
+
+class MsRabbitMqPublishNacked(MsRabbitMqException):
+    def __repr__(self):
+        return "Message rejected by the broker (nack)"
+    def __str__(self) -> str:
+        return self.__repr__()
+
+class MsRabbitMqPublishNotConfirmed(MsRabbitMqException):
+    def __init__(self, reason: str | None = None) -> None:
+        self.reason = reason
+
+    def __repr__(self):
+        s = "Message not confirmed by the broker"
+        if self.reason is not None:
+            s += f"; {self.reason}"
+        return s
+    def __str__(self) -> str:
+        return self.__repr__()
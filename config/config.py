@@ -58,10 +58,21 @@ class SettingRabbitMq(BaseModel):
     host: str
     port: int
     virtual_host: str
+    # only used when batchSize > 1 or workerLanes > 0, otherwise one message in flight
     prefetch_count: int
     reconnectDelaySec: int
     exchangeName: str
     queueName: str
+    # replication messages applied per bulk_write, 1 handle every message alone.
+    # prefetch_count must be at least batchSize to fill a batch
+    batchSize: int = 1
+    # flush an incomplete batch after this delay
+    batchWaitMs: int = 50
+    # concurrent handlers of the default queue, messages of one `_id` keep their order.
+    # 0 a task per message, with prefetch_count forced to 1 (unless batchSize > 1)
+    workerLanes: int = 0
+    # replication upsert only when `updatedTime` is newer and the content changed
+    replicationVersioned: bool = True
 
 # -------------------------------------------------------
 
@@ -95,6 +106,87 @@ class SettingsConfig(BaseModel):
 class SettingServices(BaseModel):
     authService: str
 
+# -------------------------------------------------------
+
+class SettingPagination(BaseModel):
+    # run count and find of the first page concurrently (without session)
+    concurrentCount: bool = True
+    countCacheEnabled: bool = False
+    countCacheMaxSize: int = 1000
+    countCacheTtlSeconds: float = 10
+    # stop counting after countCap documents, total become countCap and totalCapped true
+    countCap: int | None = None
+
+# -------------------------------------------------------
+
+class SettingIndexAudit(BaseModel):
+    # check index hints against declared indexes at startup
+    enabled: bool = True
+    # also compare with list_indexes() of the database
+    checkLive: bool = True
+
+# -------------------------------------------------------
+
+class SettingPartnerTree(BaseModel):
+    # cache tree per (masterDataId, rootId), dropped on the next partner or lead write of this instance.
+    # write from other instance is only seen after cacheTtlSeconds
+    cacheEnabled: bool = True
+    cacheMaxSize: int = 500
+    cacheTtlSeconds: float = 15
+
+# -------------------------------------------------------
+
+class SettingAuthCache(BaseModel):
+    enabled: bool = True
+    maxSize: int = 10000
+    ttlSeconds: float = 30
+    negativeTtlSeconds: float = 5
+
+class SettingAuthOffline(BaseModel):
+    enabled: bool = False
+    # default to {authService}/.well-known/jwks.json
+    jwksUrl: str | None = None
+    refreshSeconds: int = 3600
+    # minimum interval between refresh triggered by unknown key id
+    minRefreshIntervalSeconds: float = 30
+    leewaySeconds: float = 30
+    algorithms: list[str] = ["RS256"]
+    issuer: str | None = None
+    audience: str | None = None
+    # keep invalidation events at least as long as the access token lifetime
+    invalidationTtlSeconds: float = 86400
+    # over it every token issued before is verified by auth service, invalidation is never evicted
+    invalidationMaxSize: int = 100000
+
+class SettingAuthMatrix(BaseModel):
+    enabled: bool = False
+    # POST {authService}{path}, body {"serviceName": ...}
+    path: str = "/private/account/permission_matrix"
+
+class SettingAuthBreaker(BaseModel):
+    enabled: bool = True
+    failureThreshold: int = 5
+    resetTimeoutSeconds: float = 10
+    # serve expired positive verification while auth service unavailable
+    staleGraceSeconds: float = 300
+    # override httpClient read timeout for auth service request
+    readTimeoutSeconds: float | None = None
+
+class SettingAuth(BaseModel):
+    cache: SettingAuthCache = Field(
+        default_factory=SettingAuthCache
+    )
+    offline: SettingAuthOffline = Field(
+        default_factory=SettingAuthOffline
+    )
+    matrix: SettingAuthMatrix = Field(
+        default_factory=SettingAuthMatrix
+    )
+    breaker: SettingAuthBreaker = Field(
+        default_factory=SettingAuthBreaker
+    )
+    singleFlight: bool = True
+
 class SettingConst(BaseModel):
     dbSecurityKeyStr: str = "bbtx81WhxprxC/Fvlm+VRqz7c32dSiqOx15egfKP7IM="
     dbSecurityKey: bytes | None = None
@@ -124,6 +216,18 @@ class SettingsModel(BaseSettings):
     config: SettingsConfig
 
     services: SettingServices
+    auth: SettingAuth = Field(
+        default_factory=SettingAuth
+    )
+    pagination: SettingPagination = Field(
+        default_factory=SettingPagination
+    )
+    indexAudit: SettingIndexAudit = Field(
+        default_factory=SettingIndexAudit
+    )
+    partnerTree: SettingPartnerTree = Field(
+        default_factory=SettingPartnerTree
+    )
     const: SettingConst = Field(
         default={}
     )
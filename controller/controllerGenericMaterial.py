@@ -1,5 +1,4 @@
 from datetime import datetime
-import re
 from typing import Any
 from controller.controllerUoM import UoMController
 from controller.controllerUoMCategory import UoMCategoryController
@@ -8,11 +7,14 @@ from mongodb.mongoCollection import TbGenericMaterial
 from models.generic_material.modelGenericMaterial import GenericMaterialCreateCommandRequest, GenericMaterialCreateWebRequest, GenericMaterialView
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination, MsPaginationResult
+from models.shared.modelSearch import NameSearchMode
 from mongodb.mongoIndex import index_generic_material
 from repositories.repoGenericMaterial import GenericMaterialRepository
-from utils.util_http_exception import MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
+from utils.util_http_exception import MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
-from utils.util_pagination import Paginate
+from utils.util_pagination import Paginate, PaginationSort
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameConflict, NameSearchQuery
 from config.config import settings
 
 
@@ -22,15 +24,15 @@ class GenericMaterialController:
         name: str | None,
         categoryId: ObjectId | None,
         companyId: ObjectId,
-        paging: MsPagination
+        paging: MsPagination,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ) -> MsPaginationResult[GenericMaterialView]:
         query: dict[str, Any] = {
                 "isDeleted": False,
                 "companyId": companyId
             }
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "categoryId": categoryId if categoryId is not None else None,
         })
 
@@ -42,7 +44,7 @@ class GenericMaterialController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_generic_material.isDeleted_companyId_name_categoryId.value.indexName,
+            hint=SelectIndexHint(index_generic_material, query, PaginationSort(paging), logName="generic_material"),
             filterItem=True,
             resultItemsClass=GenericMaterialView,
             explain=True if settings.project.environment == MsEnvironment.development else False
@@ -54,12 +56,14 @@ class GenericMaterialController:
     async def Combo(
         name: str | None,
         categoryId: ObjectId | None,
-        companyId: ObjectId
+        companyId: ObjectId,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         data = await GenericMaterialRepository.Combo(
             name,
             categoryId,
-            companyId
+            companyId,
+            nameSearch
         )
 
         return data
@@ -97,14 +101,6 @@ class GenericMaterialController:
         createdTime: datetime,
         createdBy: ObjectId
     ):
-        if await GenericMaterialRepository.NameExists(
-            request.name,
-            companyId
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.GENERIC_MATERIAL_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.GENERIC_MATERIAL_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
         
         category = await UoMCategoryController.GetByIdAndCompanyId(
             request.categoryId, companyId
@@ -113,18 +109,22 @@ class GenericMaterialController:
             request.uomId, companyId
         )
 
-        newId = await GenericMaterialRepository.Create(
-            GenericMaterialCreateCommandRequest(
-                name=request.name,
-                categoryId=category.id,
-                salesPrice=request.salesPrice,
-                cost=request.cost,
-                uomId=uom.id,
-                companyId=companyId,
-                createdTime= createdTime,
-                createdBy=createdBy 
-            ),
-        )
+        with NameConflict(
+            MsHTTPExceptionType.GENERIC_MATERIAL_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.GENERIC_MATERIAL_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+        ):
+            newId = await GenericMaterialRepository.Create(
+                GenericMaterialCreateCommandRequest(
+                    name=request.name,
+                    categoryId=category.id,
+                    salesPrice=request.salesPrice,
+                    cost=request.cost,
+                    uomId=uom.id,
+                    companyId=companyId,
+                    createdTime= createdTime,
+                    createdBy=createdBy 
+                ),
+            )
         if not newId:
             raise MsHTTPInternalServerErrorException(
                 type="FAILED_CREATE_GENERIC_MATERIAL"
@@ -144,15 +144,6 @@ class GenericMaterialController:
         )
         if data.name == request.name: 
             return data
-
-        if await GenericMaterialRepository.NameExists(
-            request.name,
-            companyId
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.GENERIC_MATERIAL_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.GENERIC_MATERIAL_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
         
         category = await UoMCategoryController.GetByIdAndCompanyId(
             request.categoryId, companyId
@@ -161,22 +152,26 @@ class GenericMaterialController:
             request.uomId, companyId
         )
         
-        if not await GenericMaterialRepository.UpdateByUser(
-            data.id,
-            {
-                "name" : request.name,
-                "categoryId":category.id,
-                "salesPrice":request.salesPrice,
-                "cost":request.cost,
-                "uomId":uom.id
-            },
-            updatedBy,
-            updatedTime
-        ): 
-            raise MsHTTPInternalServerErrorException(
-                "FAILED_UPDATE_GENERIC_MATERIAL",
-                "Gagal mengubah  Generic Material"
-            )
+        with NameConflict(
+            MsHTTPExceptionType.GENERIC_MATERIAL_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.GENERIC_MATERIAL_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+        ):
+            if not await GenericMaterialRepository.UpdateByUser(
+                data.id,
+                {
+                    "name" : request.name,
+                    "categoryId":category.id,
+                    "salesPrice":request.salesPrice,
+                    "cost":request.cost,
+                    "uomId":uom.id
+                },
+                updatedBy,
+                updatedTime
+            ): 
+                raise MsHTTPInternalServerErrorException(
+                    "FAILED_UPDATE_GENERIC_MATERIAL",
+                    "Gagal mengubah  Generic Material"
+                )
         
         updatedData = await GenericMaterialController.GetByIdAndCompanyId(data.id, companyId)
 
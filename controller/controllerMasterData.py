@@ -1,18 +1,20 @@
 
 from datetime import datetime
-import re
 from typing import Any
 from classes.classMongoDb import TMongoClientSession
 from models.master_data.modelMasterData import MasterDataCreateParam, MasterDataCreateRequest, MasterDataView
 from models.shared.modelDataType import ObjectId
 from models.shared.modelEnvironment import MsEnvironment
 from models.shared.modelPagination import MsPagination, MsPaginationResult
+from models.shared.modelSearch import NameSearchMode
 from mongodb.mongoCollection import TbMasterData
 from mongodb.mongoIndex import index_master_data
 from repositories.repoMasterData import MasterDataRepository
-from utils.util_http_exception import MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
+from utils.util_http_exception import MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
-from utils.util_pagination import Paginate
+from utils.util_pagination import Paginate, PaginationSort
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameConflict, NameSearchQuery
 from config.config import settings
 
 class MasterDataController:
@@ -21,21 +23,14 @@ class MasterDataController:
     async def Find(
         name: str | None ,
         companyId: ObjectId,
-        paging: MsPagination
+        paging: MsPagination,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ) -> MsPaginationResult[MasterDataView]:
         query: dict[str, Any] = {
                 "isDeleted": False,
                 "companyId": companyId
             }
-        if name is not None:
-            name = name.strip()
-            if len(name) > 0:
-                namePattern = re.compile(re.escape(name), re.IGNORECASE)
-                query.update(
-                    {
-                        "name": { "$regex": namePattern}
-                    }
-                )
+        query.update(NameSearchQuery(name, nameSearch))
 
         print(query)
 
@@ -45,7 +40,7 @@ class MasterDataController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_master_data.isDeleted_name.value.indexName,
+            hint=SelectIndexHint(index_master_data, query, PaginationSort(paging), logName="master_data"),
             filterItem=True,
             resultItemsClass=MasterDataView,
             explain=True if settings.project.environment == MsEnvironment.development else False
@@ -55,10 +50,12 @@ class MasterDataController:
         
     @staticmethod
     async def Combo(
-        name: str | None
+        name: str | None,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         data = await MasterDataRepository.Combo(
-            name
+            name,
+            nameSearch
         )
 
         return data
@@ -104,21 +101,18 @@ class MasterDataController:
         createdTime: datetime,
         createdBy: ObjectId
     ):
-        if await MasterDataRepository.NameExists(
-            request.name
+        with NameConflict(
+            MsHTTPExceptionType.MASTER_DATA_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.MASTER_DATA_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
         ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.MASTER_DATA_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.MASTER_DATA_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
-        newMasterDataId = await MasterDataRepository.Create(
-            MasterDataCreateParam(
-                name=request.name,
-                companyId=companyId,
-                createdTime= createdTime,
-                createdBy=createdBy 
-            ),
-        )
+            newMasterDataId = await MasterDataRepository.Create(
+                MasterDataCreateParam(
+                    name=request.name,
+                    companyId=companyId,
+                    createdTime= createdTime,
+                    createdBy=createdBy 
+                ),
+            )
         if not newMasterDataId:
             raise MsHTTPInternalServerErrorException(
                 type="FAILED_CREATE_MASTER_DATA"
@@ -139,26 +133,22 @@ class MasterDataController:
         if data.name == request.name: 
             return data
 
-        if await MasterDataRepository.NameExists(
-            request.name
+        with NameConflict(
+            MsHTTPExceptionType.MASTER_DATA_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.MASTER_DATA_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
         ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.MASTER_DATA_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.MASTER_DATA_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+            if not await MasterDataRepository.UpdateByUser(
+                data.id,
+                {
+                    "name" : request.name
+                },
+                updatedBy,
+                updatedTime
+            ): 
+                raise MsHTTPInternalServerErrorException(
+                    "FAILED_UPDATE_MASTER_DATA",
+                    "Gagal mengubah Master Data"
                 )
-
-        if not await MasterDataRepository.UpdateByUser(
-            data.id,
-            {
-                "name" : request.name
-            },
-            updatedBy,
-            updatedTime
-        ): 
-            raise MsHTTPInternalServerErrorException(
-                "FAILED_UPDATE_MASTER_DATA",
-                "Gagal mengubah Master Data"
-            )
         
         updatedData = await MasterDataController.GetByIdAndCompanyId(data.id, companyId)
 
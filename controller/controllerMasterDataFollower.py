@@ -13,11 +13,12 @@ from models.shared.modelPagination import MsPagination
 from models.uom.modelUoMCategory import UoMCategoryView
 from mongodb.mongoClient import MongoDbStartDefaultSession
 from mongodb.mongoCollection import TbMasterDataFollower
-from mongodb.mongoIndex import index_master_data_follower, index_uom_category
+from mongodb.mongoIndex import index_master_data_follower
 from repositories.repoMasterDataFollower import MasterDataFollowerRepository
 from utils.util_http_exception import MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
-from utils.util_pagination import Paginate
+from utils.util_pagination import Paginate, PaginationSort
+from utils.util_query_plan import SelectIndexHint
 from config.config import settings
 
 
@@ -50,7 +51,7 @@ class MasterDataFollowerController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_uom_category.isDeleted_companyId_name.value.indexName,
+            hint=SelectIndexHint(index_master_data_follower, query, PaginationSort(paging), logName="master_data_follower"),
             filterItem=True,
             resultItemsClass=UoMCategoryView,
             explain=True if settings.project.environment == MsEnvironment.development else False
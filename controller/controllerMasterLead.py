@@ -1,21 +1,24 @@
 from datetime import datetime, timezone
-import re
 from typing import Any
 from classes.classMongoDb import TMongoClientSession
 from controller.controllerMasterData import MasterDataController
+from controller.controllerMasterPartner import MasterPartnerController
 from models.lead.enumLead import LeadStatus, LeadType
 from models.lead.modelLead import LeadCreateCommandRequest, LeadCreateWebRequest, LeadView
 from models.shared.modelDataType import ObjectId
 from models.shared.modelEnvironment import MsEnvironment
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from mongodb.mongoCollection import TbLead
 from mongodb.mongoIndex import index_lead
 from repositories.repoLead import LeadRepository
 from repositories.repoLeadTag import LeadTagRepository
 from repositories.repoPartner import PartnerRepository
-from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
+from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
-from utils.util_pagination import Paginate
+from utils.util_pagination import Paginate, PaginationSort
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameConflict, NameSearchQuery
 from config.config import settings
 
 class MasterLeadController:
@@ -29,7 +32,8 @@ class MasterLeadController:
         status: LeadStatus | None,
         tags: list[str] | None,
         companyId: ObjectId,
-        paging: MsPagination
+        paging: MsPagination,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         masterData = await MasterDataController.GetByIdAndCompanyId(
             masterDataId,
@@ -39,9 +43,8 @@ class MasterLeadController:
             "isDeleted": False,
             "masterDataId": masterData.id
         }
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "type": type if type is not None else None,
             "partnerId": partnerId if partnerId is not None else None,
             "status": status if status is not None else None,
@@ -59,7 +62,7 @@ class MasterLeadController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_lead.isDeleted_masterDataId_name_type_partnerId_status_tags.value.indexName,
+            hint=SelectIndexHint(index_lead, query, PaginationSort(paging), logName="lead"),
             filterItem=True,
             resultItemsClass=LeadView,
             explain=True if settings.project.environment == MsEnvironment.development else False
@@ -75,7 +78,8 @@ class MasterLeadController:
         partnerId: ObjectId | None,
         status: LeadStatus | None,
         tags: list[str] | None,
-        companyId: ObjectId
+        companyId: ObjectId,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         masterData = await MasterDataController.GetByIdAndCompanyId(
             masterDataId,
@@ -88,7 +92,8 @@ class MasterLeadController:
             type,
             partnerId,
             status,
-            tags
+            tags,
+            nameSearch
         )
         return data
     
@@ -142,15 +147,6 @@ class MasterLeadController:
             companyId
         )
         
-        if await LeadRepository.NameExists(
-            request.name,
-            masterData.id
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.LEAD_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.LEAD_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
-        
         if request.leadTags:
             for tagId in request.leadTags:
                 if not await LeadTagRepository.Exists(tagId):
@@ -167,28 +163,33 @@ class MasterLeadController:
         
         #check sales id 
 
-        newLeadId = await LeadRepository.Create(
-            LeadCreateCommandRequest(
-                name=request.name,
-                email=request.email,
-                phone=request.phone,
-                requirementList=request.requirementList,
-                pic=request.pic,
-                potentialRevenue=request.potentialRevenue,
-                potentialSize=request.potentialSize,
-                leadTags=request.leadTags,
-                partnerId=request.partnerId,
-                salesId=request.salesId,
-                companyId=companyId,
-                masterDataId=masterData.id,
-                type= LeadType.POTENTIAL_LEAD,
-                status=LeadStatus.NEW,
-                createdTime=datetime.now(timezone.utc),
-                createdBy=createdBy
+        with NameConflict(
+            MsHTTPExceptionType.LEAD_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.LEAD_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+        ):
+            newLeadId = await LeadRepository.Create(
+                LeadCreateCommandRequest(
+                    name=request.name,
+                    email=request.email,
+                    phone=request.phone,
+                    requirementList=request.requirementList,
+                    pic=request.pic,
+                    potentialRevenue=request.potentialRevenue,
+                    potentialSize=request.potentialSize,
+                    leadTags=request.leadTags,
+                    partnerId=request.partnerId,
+                    salesId=request.salesId,
+                    companyId=companyId,
+                    masterDataId=masterData.id,
+                    type= LeadType.POTENTIAL_LEAD,
+                    status=LeadStatus.NEW,
+                    createdTime=datetime.now(timezone.utc),
+                    createdBy=createdBy
+                )
             )
-        )
         if not newLeadId:
             raise MsHTTPInternalServerErrorException("FAILED_CREATE_LEAD")
+        MasterPartnerController.DropTree(masterData.id)
         
         newLead = await MasterLeadController.GetByIdAndMasterDataId(newLeadId, companyId, masterData.id)
 
@@ -213,15 +214,6 @@ class MasterLeadController:
             masterData.id
         )
         
-        if lead.name != request.name and await LeadRepository.NameExists(
-            request.name,
-            masterData.id
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.LEAD_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.LEAD_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
-        
         if request.leadTags:
             for tagId in request.leadTags:
                 if not await LeadTagRepository.Exists(tagId):
@@ -238,24 +230,29 @@ class MasterLeadController:
         
         #check sales id 
 
-        if not await LeadRepository.UpdateByUser(
-            lead.id,
-            {
-                "name": request.name,
-                "email": request.email,
-                "phone": request.phone,
-                "requirementList": request.requirementList,
-                "pic": request.pic,
-                "potentialRevenue": request.potentialRevenue,
-                "potentialSize": request.potentialSize,
-                "leadTags": request.leadTags,
-                "partnerId": request.partnerId,
-                "salesId": request.salesId
-            },
-            updatedBy,
-            datetime.now(timezone.utc)
+        with NameConflict(
+            MsHTTPExceptionType.LEAD_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.LEAD_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
         ):
-            raise MsHTTPInternalServerErrorException("FAILED_UPDATE_LEAD")
+            if not await LeadRepository.UpdateByUser(
+                lead.id,
+                {
+                    "name": request.name,
+                    "email": request.email,
+                    "phone": request.phone,
+                    "requirementList": request.requirementList,
+                    "pic": request.pic,
+                    "potentialRevenue": request.potentialRevenue,
+                    "potentialSize": request.potentialSize,
+                    "leadTags": request.leadTags,
+                    "partnerId": request.partnerId,
+                    "salesId": request.salesId
+                },
+                updatedBy,
+                datetime.now(timezone.utc)
+            ):
+                raise MsHTTPInternalServerErrorException("FAILED_UPDATE_LEAD")
+        MasterPartnerController.DropTree(masterData.id)
         
         data = await MasterLeadController.GetByIdAndMasterDataId(lead.id, companyId, masterData.id)
 
@@ -290,6 +287,7 @@ class MasterLeadController:
             datetime.now(timezone.utc)
         ):
             raise MsHTTPInternalServerErrorException("FAILED_UPDATE_LEAD")
+        MasterPartnerController.DropTree(masterData.id)
         
         data = await LeadRepository.GetByIdAndMasterDataId(lead.id, masterData.id, ignoreDeleted=True)
 
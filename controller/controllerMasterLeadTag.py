@@ -9,8 +9,9 @@ from models.shared.modelPagination import MsPagination
 from mongodb.mongoCollection import TbLeadTag
 from mongodb.mongoIndex import index_lead_tag
 from repositories.repoLeadTag import LeadTagRepository
-from utils.util_http_exception import MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
+from utils.util_http_exception import MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
+from utils.util_search import NameConflict
 from utils.util_pagination import Paginate
 from config.config import settings
 
@@ -149,24 +150,20 @@ class MasterLeadTagController:
             companyId
         )
 
-        if await LeadTagRepository.NameExists(
-            request.name,
-            masterData.id
+        with NameConflict(
+            MsHTTPExceptionType.LEAD_TAG_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.LEAD_TAG_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
         ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.LEAD_TAG_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.LEAD_TAG_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
-        newLeadTagId = await LeadTagRepository.Create(
-            LeadTagCreateCommandRequest(
-                name=request.name,
-                description=request.name,
-                masterDataId=masterData.id,
-                companyId=companyId,
-                createdTime= datetime.now(timezone.utc),
-                createdBy=createdBy
-            ),
-        )
+            newLeadTagId = await LeadTagRepository.Create(
+                LeadTagCreateCommandRequest(
+                    name=request.name,
+                    description=request.name,
+                    masterDataId=masterData.id,
+                    companyId=companyId,
+                    createdTime= datetime.now(timezone.utc),
+                    createdBy=createdBy
+                ),
+            )
         if not newLeadTagId:
             raise MsHTTPInternalServerErrorException(
                 "FAILED_CREATE_LEAD_TAG"
@@ -189,29 +186,24 @@ class MasterLeadTagController:
         data = await MasterLeadTagController.GetByIdAndMasterDataId(
             id, companyId, masterData.id
         )
-
-        if data.name != request.name and await LeadTagRepository.NameExists(
-            request.name,
-            masterData.id
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.LEAD_TAG_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.LEAD_TAG_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
         
-        if not await LeadTagRepository.UpdateByUser(
-            data.id,
-            {
-                "name" : request.name,
-                "description": request.description
-            },
-            updatedBy,
-            datetime.now(timezone.utc)
+        with NameConflict(
+            MsHTTPExceptionType.LEAD_TAG_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.LEAD_TAG_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
         ):
-            raise MsHTTPInternalServerErrorException(
-                "FAILED_UPDATE_LEAD_TAG",
-                "Gagal mengubah Lead Tag"
-            )
+            if not await LeadTagRepository.UpdateByUser(
+                data.id,
+                {
+                    "name" : request.name,
+                    "description": request.description
+                },
+                updatedBy,
+                datetime.now(timezone.utc)
+            ):
+                raise MsHTTPInternalServerErrorException(
+                    "FAILED_UPDATE_LEAD_TAG",
+                    "Gagal mengubah Lead Tag"
+                )
         
         updatedData = await MasterLeadTagController.GetByIdAndMasterDataId(data.id, companyId, masterData.id)
 
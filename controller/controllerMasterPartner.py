@@ -1,28 +1,65 @@
 from datetime import datetime, timezone
-import re
 from typing import Any
 from pymongo.read_concern import ReadConcern
 from pymongo.read_preferences import ReadPreference
 from pymongo.write_concern import WriteConcern
+from classes.classMongoCommandListener import mongoCommandListener
 from classes.classMongoDb import TMongoClientSession
+from classes.classTtlLruCache import MsTtlLruCache
 from controller.controllerMasterData import MasterDataController
 from controller.controllerMasterDataFollower import MasterDataFollowerController
 from models.master_data_follower.enumMasterData import MasterDataFollowerStatus
 from models.partner.enumPartnerType import PartnerType
-from models.partner.modelPartner import PartnerCreateCommandRequest, PartnerCreateWebRequest, PartnerUpdateWebRequest, PartnerView
+from models.partner.modelPartner import PartnerCreateCommandRequest, PartnerCreateWebRequest, PartnerRelinkWebRequest, PartnerTreeNode, PartnerUpdateWebRequest, PartnerView
 from models.shared.modelDataType import ObjectId
 from models.shared.modelEnvironment import MsEnvironment
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from mongodb.mongoClient import MongoDbStartDefaultSession
-from mongodb.mongoCollection import TbPartner
+from mongodb.mongoCollection import TbLead, TbPartner
 from mongodb.mongoIndex import index_partner
 from repositories.repoPartner import PartnerRepository
 from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
-from utils.util_pagination import Paginate
+from utils.util_pagination import Paginate, PaginationSort
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameConflict, NameSearchQuery
 from config.config import settings
 from helpers.helperConfigFollower import CheckConfigFollower
 
+PartnerTreeCache: MsTtlLruCache[tuple[tuple[int, int], list[PartnerTreeNode]]] = MsTtlLruCache(
+    maxSize=settings.partnerTree.cacheMaxSize,
+    ttlSeconds=settings.partnerTree.cacheTtlSeconds
+)
+"""
+(partner and lead write generation, tree) per (masterDataId, rootId).
+- Entry created before the last partner or lead write (or commit) is ignored
+- Entries of the master data are dropped once a partner or lead write of this instance is committed (`DropTree`)
+- Write from other instance is only covered by `cacheTtlSeconds`
+"""
+
+def _BuildPartnerTree(root: dict[str, Any]) -> PartnerTreeNode:
+    leadCounts: dict[ObjectId, int] = {item["_id"]: item["count"] for item in root.get("leadCounts", [])}
+    rootNode = PartnerTreeNode.FromDb({**root, "depth": 0, "leadCount": leadCounts.get(root["_id"], 0)})
+    nodes: dict[ObjectId, PartnerTreeNode] = {rootNode.id: rootNode}
+    for item in sorted(root.get("descendants", []), key=lambda x: (x.get("depth", 0), x.get("name", ""))):
+        if item["_id"] in nodes:
+            continue
+        node = PartnerTreeNode.FromDb({**item, "depth": item.get("depth", 0) + 1, "leadCount": leadCounts.get(item["_id"], 0)})
+        nodes[node.id] = node
+    # graphLookup return a flat list, parent always has a lower depth than its child
+    order = sorted(nodes.values(), key=lambda x: x.depth)
+    for node in order:
+        if node is rootNode:
+            continue
+        parent = nodes.get(node.parentId) if node.parentId is not None else None
+        if parent is not None:
+            parent.children.append(node)
+    for node in reversed(order):
+        node.subtreeLeadCount = node.leadCount + sum(c.subtreeLeadCount for c in node.children)
+        node.descendantCount = len(node.children) + sum(c.descendantCount for c in node.children)
+    return rootNode
+
 class MasterPartnerController:
 
     @staticmethod
@@ -33,7 +70,8 @@ class MasterPartnerController:
         parentId: ObjectId | None,
         tags: list[str] | None,
         companyId: ObjectId,
-        paging: MsPagination
+        paging: MsPagination,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         masterData = await MasterDataController.GetByIdAndCompanyId(
             masterDataId,
@@ -45,9 +83,8 @@ class MasterPartnerController:
             "masterDataId": masterData.id
         }
 
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "type": type if type is not None else None,
             "parentId": parentId if parentId is not None else None,
             "tags": {"$all": tags} if tags else None
@@ -64,7 +101,7 @@ class MasterPartnerController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_partner.isDeleted_masterDataId_name_type_parentId.value.indexName,
+            hint=SelectIndexHint(index_partner, query, PaginationSort(paging), logName="partner"),
             filterItem=True,
             resultItemsClass=PartnerView,
             explain=True if settings.project.environment == MsEnvironment.development else False
@@ -80,7 +117,8 @@ class MasterPartnerController:
         parentId: ObjectId | None,
         tags: list[str] | None,
         companyId: ObjectId,
-        paging: MsPagination
+        paging: MsPagination,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         masterDataFollower = await MasterDataFollowerController.GetByIdAndStatus(
             followerId,
@@ -104,9 +142,8 @@ class MasterPartnerController:
                 "masterDataId": masterDataFollower.masterDataId,
             }
 
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "type": type if type is not None else None,
             "parentId": parentId if parentId is not None else None,
             "tags": {"$all": tags} if tags else None
@@ -120,7 +157,7 @@ class MasterPartnerController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_partner.isDeleted_masterDataId_name_type_parentId.value.indexName,
+            hint=SelectIndexHint(index_partner, query, PaginationSort(paging), logName="partner"),
             filterItem=True,
             resultItemsClass=PartnerView,
             explain=True if settings.project.environment == MsEnvironment.development else False
@@ -143,6 +180,52 @@ class MasterPartnerController:
         
         return data
     
+    @staticmethod
+    async def Tree(
+        companyId: ObjectId,
+        masterDataId: ObjectId,
+        rootId: ObjectId | None = None
+    ):
+        """
+        Partner hierarchy with descendant and lead count per node.
+        - rootId: subtree of this partner, null for every tree of the master data
+        """
+
+        masterData = await MasterDataController.GetByIdAndCompanyId(
+            masterDataId,
+            companyId
+        )
+        cacheKey = (masterData.id, rootId)
+        # generation before the read, a write running concurrently make the entry stale
+        generation = (
+            mongoCommandListener.WriteGeneration(TbPartner.full_name),
+            mongoCommandListener.WriteGeneration(TbLead.full_name)
+        )
+        if settings.partnerTree.cacheEnabled:
+            cached = PartnerTreeCache.Get(cacheKey)
+            if (cached is not None) and (cached[0] == generation):
+                return cached[1]
+
+        roots = await PartnerRepository.Tree(
+            masterData.id,
+            rootId
+        )
+        if (rootId is not None) and (len(roots) == 0):
+            raise MsHTTPNotFoundException(MsHTTPExceptionType.NOT_FOUND, MsHTTPExceptionMessage.PARTNER_NOT_FOUND)
+        data = sorted([_BuildPartnerTree(root) for root in roots], key=lambda x: x.name)
+
+        if settings.partnerTree.cacheEnabled:
+            PartnerTreeCache.Set(cacheKey, (generation, data))
+        return data
+
+    @staticmethod
+    def DropTree(masterDataId: ObjectId) -> int:
+        """
+        Drop cached trees of the master data, call after the write is committed
+        """
+
+        return PartnerTreeCache.RemoveIf(lambda key, _: key[0] == masterDataId) # type: ignore
+
     @staticmethod
     async def GetByIdAndMasterDataId(
         id: ObjectId,
@@ -246,15 +329,6 @@ class MasterPartnerController:
                 companyId,
                 session=session
             )
-            if await PartnerRepository.NameExists(
-                request.name,
-                masterData.id,
-                session=session
-            ):
-                raise MsHTTPConflictException(
-                    MsHTTPExceptionType.PARTNER_NAME_ALREADY_EXISTS, 
-                    MsHTTPExceptionMessage.PARTNER_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                    )
             parent = None
             parentId = None
             if request.type != PartnerType.PUSAT:
@@ -279,37 +353,31 @@ class MasterPartnerController:
                 parentId = parent.id
             
             
-            newPartnerId = await PartnerRepository.Create(
-                PartnerCreateCommandRequest(
-                    name=request.name,
-                    type=request.type,
-                    tags=request.tags,
-                    parentId=parentId,
-                    masterDataId=masterDataId,
-                    companyId=companyId,
-                    createdTime=datetime.now(timezone.utc),
-                    createdBy=createdBy
-                ),
-                session=session
-            )
+            with NameConflict(
+                MsHTTPExceptionType.PARTNER_NAME_ALREADY_EXISTS,
+                MsHTTPExceptionMessage.PARTNER_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+            ):
+                newPartner = await PartnerRepository.CreateAndGet(
+                    PartnerCreateCommandRequest(
+                        name=request.name,
+                        type=request.type,
+                        tags=request.tags,
+                        parentId=parentId,
+                        masterDataId=masterDataId,
+                        companyId=companyId,
+                        createdTime=datetime.now(timezone.utc),
+                        createdBy=createdBy
+                    ),
+                    session=session
+                )
         
-            if not newPartnerId:
+            if not newPartner:
                 raise MsHTTPInternalServerErrorException("FAILED_CREATE_PARTNER")
 
-            newPartner = await MasterPartnerController.GetByIdAndMasterDataId(
-                newPartnerId,
-                companyId,
-                masterDataId,
-                session=session
-            )
             if parent: 
-                childIds = parent.childIds
-                childIds.append(newPartnerId)               
-                if not await PartnerRepository.Update(
+                if not await PartnerRepository.AddChild(
                     parent.id,
-                    {
-                        "childIds": childIds
-                    },
+                    newPartner.id,
                     session=session
                 ):
                     raise MsHTTPInternalServerErrorException(
@@ -325,6 +393,7 @@ class MasterPartnerController:
                 write_concern=WriteConcern(w="majority", wtimeout=1000),
                 read_preference=ReadPreference.PRIMARY
             )
+            MasterPartnerController.DropTree(masterDataId)
             return ret
     
     @staticmethod
@@ -349,29 +418,12 @@ class MasterPartnerController:
                 masterData.id,
                 session=session
             )
-
-            if partner.name != request.name and await PartnerRepository.NameExists(
-                request.name,
-                masterData.id,
-                session=session
-            ):
-                raise MsHTTPConflictException(
-                    MsHTTPExceptionType.PARTNER_NAME_ALREADY_EXISTS, 
-                    MsHTTPExceptionMessage.PARTNER_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
             
-            oldParent, newParent = None, None
+            newParent = None
 
             if partner.type != PartnerType.PUSAT:
                 if not request.parentId:
                     raise MsHTTPBadRequestException("PARENT_ID_REQUEIRED", "Tipe Partner selain pusat membutuhkan parentId")
-                if partner.parentId:
-                    oldParent= await MasterPartnerController.GetByIdAndMasterDataId(
-                        partner.parentId,
-                        companyId,
-                        masterDataId,
-                        session=session
-                    )
                 newParent = await MasterPartnerController.GetByIdAndMasterDataId(
                         request.parentId,
                         companyId,
@@ -385,55 +437,50 @@ class MasterPartnerController:
                     )
             
 
-            if not await PartnerRepository.Update(
-                partner.id,
-                {
-                    "name": request.name,
-                    "parentId": request.parentId,
-                    "tags": request.tags,
-                    "updatedBy": updatedBy,
-                    "updatedTime":datetime.now(timezone.utc).replace(tzinfo=None)
-                },
-                session=session
+            with NameConflict(
+                MsHTTPExceptionType.PARTNER_NAME_ALREADY_EXISTS,
+                MsHTTPExceptionMessage.PARTNER_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
             ):
+                updatedPartner = await PartnerRepository.UpdateAndGet(
+                    partner.id,
+                    {
+                        "name": request.name,
+                        "parentId": request.parentId,
+                        "tags": request.tags,
+                        "updatedBy": updatedBy,
+                        "updatedTime":datetime.now(timezone.utc).replace(tzinfo=None)
+                    },
+                    session=session
+                )
+            if updatedPartner is None:
                 raise MsHTTPInternalServerErrorException(
                     type="UPDATE_PARTNER_FAILED",
                     message="Gagal mengupdate Partner"
                 )
             
-            #updateOldParent
-            if oldParent:
-                childIds = oldParent.childIds
-                childIds.remove(partner.id) 
-                await PartnerRepository.UpdateByUser(
-                    oldParent.id,
-                    {
-                        "childIds": childIds
-                    },
-                    updatedBy,
-                    datetime.now(timezone.utc).replace(tzinfo=None),
-                    session=session
-                )
-            #updateNewParent
-            if newParent:
-                childIds = newParent.childIds
-                childIds.append(partner.id)   
-                await PartnerRepository.UpdateByUser(
+            #relink, only when the parent changed
+            if (newParent is not None) and (newParent.id != partner.parentId):
+                updatedTime = datetime.now(timezone.utc).replace(tzinfo=None)
+                if partner.parentId:
+                    await PartnerRepository.RemoveChild(
+                        partner.parentId,
+                        partner.id,
+                        {
+                            "updatedBy": updatedBy,
+                            "updatedTime": updatedTime
+                        },
+                        session=session
+                    )
+                await PartnerRepository.AddChild(
                     newParent.id,
+                    partner.id,
                     {
-                        "childIds": childIds
+                        "updatedBy": updatedBy,
+                        "updatedTime": updatedTime
                     },
-                    updatedBy,
-                    datetime.now(timezone.utc).replace(tzinfo=None),
                     session=session
                 )
 
-            updatedPartner = await MasterPartnerController.GetByIdAndMasterDataId(
-                id,
-                companyId,
-                masterDataId,
-                session=session)
-            
             return updatedPartner
         
         async with await MongoDbStartDefaultSession() as session:
@@ -443,8 +490,75 @@ class MasterPartnerController:
                 write_concern=WriteConcern(w="majority", wtimeout=1000),
                 read_preference=ReadPreference.PRIMARY
             )
+            MasterPartnerController.DropTree(masterDataId)
             return ret
         
+    @staticmethod
+    async def Relink(
+        companyId: ObjectId,
+        masterDataId: ObjectId,
+        request: PartnerRelinkWebRequest,
+        updatedBy: ObjectId
+    ):
+        """
+        Move many partners to one parent, relink updates in one `bulk_write`.
+        - return: new parent
+        """
+
+        async def _coro(
+            session: TMongoClientSession
+        ):
+            masterData = await MasterDataController.GetByIdAndCompanyId(
+                masterDataId,
+                companyId,
+                session=session
+            )
+            newParent = await MasterPartnerController.GetByIdAndMasterDataId(
+                request.parentId,
+                companyId,
+                masterData.id,
+                session=session
+            )
+            ids = list(dict.fromkeys(request.ids))
+            partners = await PartnerRepository.GetByIdsAndMasterDataId(
+                ids,
+                masterData.id,
+                session=session
+            )
+            if len(partners) != len(ids):
+                raise MsHTTPNotFoundException(MsHTTPExceptionType.NOT_FOUND, MsHTTPExceptionMessage.PARTNER_NOT_FOUND)
+            for partner in partners:
+                if not await MasterPartnerController.CheckValidParent(newParent.type, partner.type):
+                    raise MsHTTPBadRequestException(
+                        type="INVALID_PARENT_TYPE",
+                        message=f"Tipe Partner \"{partner.name}\" tidak sesuai dengan Tipe Parent"
+                    )
+
+            await PartnerRepository.BulkRelink(
+                [(p.id, p.parentId, newParent.id) for p in partners],
+                {
+                    "updatedBy": updatedBy,
+                    "updatedTime": datetime.now(timezone.utc).replace(tzinfo=None)
+                },
+                session=session
+            )
+            return await MasterPartnerController.GetByIdAndMasterDataId(
+                newParent.id,
+                companyId,
+                masterData.id,
+                session=session
+            )
+
+        async with await MongoDbStartDefaultSession() as session:
+            ret: PartnerView = await session.with_transaction(
+                lambda s: _coro(s),  # type: ignore
+                read_concern=ReadConcern("snapshot"),
+                write_concern=WriteConcern(w="majority", wtimeout=1000),
+                read_preference=ReadPreference.PRIMARY
+            )
+            MasterPartnerController.DropTree(masterDataId)
+            return ret
+
     @staticmethod
     async def Delete(
         id: ObjectId,
@@ -471,18 +585,8 @@ class MasterPartnerController:
                     "DELETE_PARTNER_FAILED",
                     "Partner masih memiliki child"
                 )
-            
-            oldParent = None
-            if partner.type != PartnerType.PUSAT:
-                if partner.parentId:
-                    oldParent= await MasterPartnerController.GetByIdAndMasterDataId(
-                        partner.parentId,
-                        companyId,
-                        masterDataId,
-                        session=session
-                    )
 
-            if not await PartnerRepository.UpdateByUser(
+            deletedData = await PartnerRepository.UpdateByUserAndGet(
                 id,
                 {
                     "isDeleted": True
@@ -490,31 +594,25 @@ class MasterPartnerController:
                 updatedBy,
                 datetime.now(timezone.utc),
                 session=session
-            ):
+            )
+            if deletedData is None:
                 raise MsHTTPInternalServerErrorException(
                 "FAILED_DELETE_PARTNER",
                 "Gagal menghapus Partner"
             )
 
             #updateOldParent
-            if oldParent:
-                childIds = oldParent.childIds
-                childIds.remove(partner.id)
-                await PartnerRepository.UpdateByUser(
-                    oldParent.id,
+            if (partner.type != PartnerType.PUSAT) and partner.parentId:
+                await PartnerRepository.RemoveChild(
+                    partner.parentId,
+                    partner.id,
                     {
-                        "childIds": childIds
+                        "updatedBy": updatedBy,
+                        "updatedTime": datetime.now(timezone.utc).replace(tzinfo=None)
                     },
-                    updatedBy,
-                    datetime.now(timezone.utc).replace(tzinfo=None),
                     session=session
                 )
 
-            deletedData = await PartnerRepository.GetByIdAndMasterDataId(
-                id,
-                masterData.id,
-                ignoreDeleted=True
-            )
             return deletedData
         
         async with await MongoDbStartDefaultSession() as session:
@@ -524,4 +622,5 @@ class MasterPartnerController:
                 write_concern=WriteConcern(w="majority", wtimeout=1000),
                 read_preference=ReadPreference.PRIMARY
             )
+            MasterPartnerController.DropTree(masterDataId)
             return ret
\ No newline at end of file
@@ -1,17 +1,19 @@
 from datetime import datetime
-import re
 from typing import Any
 from controller.controllerUoMCategory import UoMCategoryController
 from models.shared.modelDataType import ObjectId
 from models.shared.modelEnvironment import MsEnvironment
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.uom.modelUoM import UoMCreateCommandRequest, UoMCreateWebRequest, UoMView
 from mongodb.mongoCollection import TbUom
 from mongodb.mongoIndex import index_uom
 from repositories.repoUoM import UoMRepository
-from utils.util_http_exception import MsHTTPConflictException, MsHTTPInternalServerErrorException, MsHTTPNotFoundException
+from utils.util_http_exception import MsHTTPInternalServerErrorException, MsHTTPNotFoundException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
-from utils.util_pagination import Paginate
+from utils.util_pagination import Paginate, PaginationSort
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameConflict, NameSearchQuery
 from config.config import settings
 
 class UoMController:
@@ -22,15 +24,15 @@ class UoMController:
         categoryId: ObjectId | None,
         isActive: bool | None,
         companyId: ObjectId,
-        paging: MsPagination
+        paging: MsPagination,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         query: dict[str, Any] = {
             "isDeleted": False,
             "companyId": companyId
         }
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "categoryId": categoryId if categoryId is not None else None,
             "isActive": isActive if isActive is not None else None
         })
@@ -45,7 +47,7 @@ class UoMController:
             query_filter=query,
             params=paging,
             session=None,
-            hint=index_uom.isDeleted_companyId_isActive_categoryId_name.value.indexName,
+            hint=SelectIndexHint(index_uom, query, PaginationSort(paging), logName="uom"),
             filterItem=True,
             resultItemsClass=UoMView,
             explain=True if settings.project.environment == MsEnvironment.development else False
@@ -58,13 +60,15 @@ class UoMController:
         name: str | None,
         categoryId: ObjectId | None,
         isActive: bool | None,
-        companyId: ObjectId
+        companyId: ObjectId,
+        nameSearch: NameSearchMode = NameSearchMode.contains
     ):
         data = await UoMRepository.Combo(
             name,
             categoryId,
             isActive,
-            companyId
+            companyId,
+            nameSearch
         )
 
         return data
@@ -103,33 +107,29 @@ class UoMController:
         createdTime: datetime,
         createdBy: ObjectId
     ):
-        if await UoMRepository.NameExists(
-            request.name,
-            companyId
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.UOM_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.UOM_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
         category = await UoMCategoryController.GetByIdAndCompanyId(request.categoryId, companyId)
 
-        newId = await UoMRepository.Create(
-            UoMCreateCommandRequest(
-                name=request.name,
-                categoryId=category.id,
-                type=request.type,
-                ratio=request.ratio,
-                isActive=request.isActive,
-                companyId=companyId,
-                createdTime= createdTime,
-                createdBy=createdBy 
-            ),
-        )
-        if not newId:
+        with NameConflict(
+            MsHTTPExceptionType.UOM_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.UOM_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+        ):
+            newData = await UoMRepository.CreateAndGet(
+                UoMCreateCommandRequest(
+                    name=request.name,
+                    categoryId=category.id,
+                    type=request.type,
+                    ratio=request.ratio,
+                    isActive=request.isActive,
+                    companyId=companyId,
+                    createdTime= createdTime,
+                    createdBy=createdBy 
+                ),
+            )
+        if not newData:
             raise MsHTTPInternalServerErrorException(
                 type="FAILED_CREATE_UOM"
             )
-        return newId
+        return newData
     
     @staticmethod
     async def UpdateByIdAndCompanyId(
@@ -145,33 +145,33 @@ class UoMController:
         if data.name == request.name: 
             return data
 
-        if await UoMRepository.NameExists(
-            request.name,companyId
-        ):
-            raise MsHTTPConflictException(
-                MsHTTPExceptionType.UOM_NAME_ALREADY_EXISTS, 
-                MsHTTPExceptionMessage.UOM_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
-                )
         category = await UoMCategoryController.GetByIdAndCompanyId(request.categoryId, companyId)
 
-        if not await UoMRepository.UpdateByUser(
-            data.id,
-            {
-                "name" : request.name,
-                "categoryId":category.id,
-                "type":request.type,
-                "ratio":request.ratio,
-                "isActive":request.isActive,
-            },
-            updatedBy,
-            updatedTime
-        ): 
+        with NameConflict(
+            MsHTTPExceptionType.UOM_NAME_ALREADY_EXISTS,
+            MsHTTPExceptionMessage.UOM_NAME_ALREADY_EXISTS_F.value.format(name=request.name)
+        ):
+            updatedData = await UoMRepository.UpdateByUserAndGet(
+                data.id,
+                {
+                    "name" : request.name,
+                    "categoryId":category.id,
+                    "type":request.type,
+                    "ratio":request.ratio,
+                    "isActive":request.isActive,
+                },
+                updatedBy,
+                updatedTime,
+                query={
+                    "companyId": companyId,
+                    "isDeleted": False
+                }
+            )
+        if updatedData is None: 
             raise MsHTTPInternalServerErrorException(
                 "FAILED_UPDATE_UOM",
                 "Gagal mengubah Unit Of Measure"
             )
-        
-        updatedData = await UoMController.GetByIdAndCompanyId(data.id, companyId)
 
         return updatedData
     
@@ -183,28 +183,20 @@ class UoMController:
         updatedTime: datetime,
         updatedBy: ObjectId
     ): 
-        data = await UoMController.GetByIdAndCompanyId(
+        # filter on companyId and isDeleted, no match means not found
+        deletedData = await UoMRepository.UpdateByUserAndGet(
             id,
-            companyId
-        )
-
-        if not await UoMRepository.UpdateByUser(
-            data.id,
             {
                 "isDeleted" : True
             },
             updatedBy,
-            updatedTime
-        ): 
-            raise MsHTTPInternalServerErrorException(
-                "FAILED_DELETE_UOM",
-                "Gagal menghapus Unit of Measure"
-            )
-        
-        deletedData = await UoMRepository.GetByIdAndCompanyId(
-            id,
-            companyId,
-            ignoreDeleted=True
+            updatedTime,
+            query={
+                "companyId": companyId,
+                "isDeleted": False
+            }
         )
+        if deletedData is None:
+            raise MsHTTPNotFoundException(MsHTTPExceptionType.NOT_FOUND, "UOM_NOT_FOUND")
         
         return deletedData
\ No newline at end of file
@@ -59,10 +59,10 @@ class UoMCategoryController:
             cursor = TbUom.find(
                         uomQuery,
                         UoMBase.Projection(), 
-                        hint=index_uom.isDeleted_companyId_categoryId.value.indexName
+                        hint=index_uom.isDeleted_companyId_categoryId_id.value.indexName
                     )
             itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
-            category.uoms = [UoMBase(**uom) for uom in itemsRaw] 
+            category.uoms = [UoMBase.FromDb(uom) for uom in itemsRaw] 
 
         return data
         
@@ -0,0 +1,264 @@
+import ast
+import asyncio
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+import mongodb.mongoCollection as mongoCollection
+import mongodb.mongoIndex as mongoIndex
+from helpers.helperInstall import ListMongoIndexInit, MongoIndexInit
+from mongodb.mongoIndex import MongoIndex, index_id
+from utils.util_logger import msLogger
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+@dataclass
+class IndexHintUsage:
+    """
+    `hint=` found in the source.
+    - indexEnum/indexMember: `index_x.member.value.indexName`, member is null for `SelectIndexHint(index_x, ...)`
+    - collection: variable name of the collection (ex: `TbLead`), null when it can not be resolved
+    """
+
+    file: str
+    line: int
+    indexEnum: str
+    indexMember: str | None
+    collection: str | None
+
+class IndexAuditHelper:
+    """
+    Cross check index hints with the declared indexes (`ListMongoIndexInit`) and the live indexes of MongoDB.
+    - Hints are read from the source, so hint on a path never called in test is checked too
+    """
+
+    SourceDirs = ["controller", "repositories", "helpers", "auth", "rabbitmq"]
+
+    LastReport: dict[str, Any] | None = None
+    AuditTask: asyncio.Task[Any] | None = None
+
+    @staticmethod
+    def _HintValue(node: ast.expr) -> tuple[str, str | None] | None:
+        # index_x.member.value.indexName
+        if (
+            isinstance(node, ast.Attribute) and (node.attr == "indexName") and
+            isinstance(node.value, ast.Attribute) and (node.value.attr == "value") and
+            isinstance(node.value.value, ast.Attribute) and isinstance(node.value.value.value, ast.Name)
+        ):
+            return node.value.value.value.id, node.value.value.attr
+        # SelectIndexHint(index_x, ...)
+        if (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and (node.func.id == "SelectIndexHint") and
+            (len(node.args) > 0) and isinstance(node.args[0], ast.Name)
+        ):
+            return node.args[0].id, None
+        return None
+
+    @staticmethod
+    def _ArgDefault(function: ast.AsyncFunctionDef | ast.FunctionDef, name: str) -> str | None:
+        args = function.args
+        positional = args.posonlyargs + args.args
+        pairs = list(zip(positional[len(positional) - len(args.defaults):], args.defaults))
+        pairs += [(a, d) for a, d in zip(args.kwonlyargs, args.kw_defaults) if d is not None]
+        for arg, default in pairs:
+            if (arg.arg == name) and isinstance(default, ast.Name):
+                return default.id
+        return None
+
+    @staticmethod
+    def _CallCollection(call: ast.Call, function: ast.AsyncFunctionDef | ast.FunctionDef | None) -> str | None:
+        for keyword in call.keywords:
+            if (keyword.arg == "collection") and isinstance(keyword.value, ast.Name):
+                return keyword.value.id
+        # Paginate(TbX, ...)
+        if isinstance(call.func, ast.Name) and (len(call.args) > 0) and isinstance(call.args[0], ast.Name):
+            return call.args[0].id
+        # TbX.find(...) / coll.find(...) with coll default TbX
+        if isinstance(call.func, ast.Attribute) and isinstance(call.func.value, ast.Name):
+            name = call.func.value.id
+            if hasattr(mongoCollection, name):
+                return name
+            if function is not None:
+                return IndexAuditHelper._ArgDefault(function, name)
+        return None
+
+    @staticmethod
+    def ScanHints() -> list[IndexHintUsage]:
+        usages: list[IndexHintUsage] = []
+        for sourceDir in IndexAuditHelper.SourceDirs:
+            for file in sorted((PROJECT_ROOT / sourceDir).rglob("*.py")):
+                try:
+                    tree = ast.parse(file.read_text(encoding="utf-8"), filename=str(file))
+                except (OSError, SyntaxError) as err:
+                    msLogger.warning(f"Index audit skip {file}. {err}")
+                    continue
+
+                def visit(node: ast.AST, function: ast.AsyncFunctionDef | ast.FunctionDef | None):
+                    if isinstance(node, (ast.AsyncFunctionDef, ast.FunctionDef)):
+                        function = node
+                    if isinstance(node, ast.Call):
+                        for keyword in node.keywords:
+                            if keyword.arg != "hint":
+                                continue
+                            hint = IndexAuditHelper._HintValue(keyword.value)
+                            if hint is None:
+                                continue
+                            usages.append(IndexHintUsage(
+                                file=str(file.relative_to(PROJECT_ROOT)),
+                                line=keyword.value.lineno,
+                                indexEnum=hint[0],
+                                indexMember=hint[1],
+                                collection=IndexAuditHelper._CallCollection(node, function)
+                            ))
+                    for child in ast.iter_child_nodes(node):
+                        visit(child, function)
+
+                visit(tree, None)
+        return usages
+
+    @staticmethod
+    def _DeclaredFor(index: MongoIndex) -> list[str]:
+        return [m.collName for m in ListMongoIndexInit if any(i is index for i in m.indexs)]
+
+    @staticmethod
+    def CheckHints(usages: list[IndexHintUsage]) -> tuple[list[dict[str, Any]], dict[str, set[str]]]:
+        """
+        return: problems, hinted index names per collection name
+        """
+
+        problems: list[dict[str, Any]] = []
+        hinted: dict[str, set[str]] = {}
+        initByName = {m.collName: m for m in ListMongoIndexInit}
+        for usage in usages:
+            where = f"{usage.file}:{usage.line}"
+            indexEnum: type[Enum] | Any = getattr(mongoIndex, usage.indexEnum, None)
+            if (not isinstance(indexEnum, type)) or (not issubclass(indexEnum, Enum)):
+                problems.append({"at": where, "problem": f"{usage.indexEnum} is not an index enum"})
+                continue
+            if usage.indexMember is None:
+                indexes: list[MongoIndex] = [i.value for i in indexEnum]
+            elif usage.indexMember in indexEnum.__members__:
+                indexes = [indexEnum[usage.indexMember].value]
+            else:
+                problems.append({"at": where, "problem": f"{usage.indexEnum}.{usage.indexMember} is not declared"})
+                continue
+            if usage.collection is None:
+                continue
+            collection = getattr(mongoCollection, usage.collection, None)
+            collName: str | None = getattr(collection, "name", None)
+            init = initByName.get(collName) if collName is not None else None
+            if init is None:
+                problems.append({"at": where, "problem": f"collection {usage.collection} has no declared indexes (ListMongoIndexInit)"})
+                continue
+            for index in indexes:
+                if any(i is index for i in init.indexs):
+                    hinted.setdefault(init.collName, set()).add(index.indexName)
+                    continue
+                declaredFor = IndexAuditHelper._DeclaredFor(index)
+                problems.append({
+                    "at": where,
+                    "problem": (
+                        f"{usage.indexEnum}.{usage.indexMember or '*'} ({index.indexName}) used on {init.collName}, " +
+                        (f"declared for {', '.join(declaredFor)}" if len(declaredFor) > 0 else "not registered in ListMongoIndexInit")
+                    )
+                })
+        return problems, hinted
+
+    @staticmethod
+    async def _LiveIndexNames(m: MongoIndexInit) -> set[str]:
+        indexes: list[dict[str, Any]] = await m.coll.list_indexes().to_list(None) # type: ignore
+        return {i["name"] for i in indexes}
+
+    @staticmethod
+    async def CheckLive(hinted: dict[str, set[str]]) -> dict[str, Any]:
+        live: dict[str, Any] = {}
+        names = await asyncio.gather(*[IndexAuditHelper._LiveIndexNames(m) for m in ListMongoIndexInit], return_exceptions=True)
+        for m, liveNames in zip(ListMongoIndexInit, names):
+            if isinstance(liveNames, BaseException):
+                live[m.collName] = {"error": str(liveNames)}
+                continue
+            declared = {i.indexName for i in m.indexs}
+            live[m.collName] = {
+                "missing": sorted(declared - liveNames),
+                "undeclared": sorted(liveNames - declared - {index_id}),
+                # hint on a missing index fail every query
+                "hintMissing": sorted(hinted.get(m.collName, set()) - liveNames)
+            }
+        return live
+
+    @staticmethod
+    async def Audit(checkLive: bool = True) -> dict[str, Any]:
+        usages = IndexAuditHelper.ScanHints()
+        problems, hinted = IndexAuditHelper.CheckHints(usages)
+        for problem in problems:
+            msLogger.error(f"Index hint {problem['at']}: {problem['problem']}")
+
+        report: dict[str, Any] = {
+            "hints": len(usages),
+            "unresolvedCollection": [f"{u.file}:{u.line}" for u in usages if u.collection is None],
+            "problems": problems
+        }
+        if checkLive:
+            try:
+                report["live"] = await IndexAuditHelper.CheckLive(hinted)
+            except Exception as err:
+                msLogger.error(f"Index audit failed to list indexes. {err}")
+                report["live"] = {"error": str(err)}
+            for collName, result in report["live"].items():
+                if not isinstance(result, dict):
+                    continue
+                if "error" in result:
+                    msLogger.error(f"Index audit failed to list indexes of {collName}. {result['error']}")
+                elif len(result.get("hintMissing", [])) > 0: # type: ignore
+                    msLogger.error(f"Index hint on missing index {collName}: {', '.join(result['hintMissing'])}") # type: ignore
+                elif len(result.get("missing", [])) > 0: # type: ignore
+                    msLogger.warning(f"Index declared but missing {collName}: {', '.join(result['missing'])}") # type: ignore
+
+        IndexAuditHelper.LastReport = report
+        return report
+
+    @staticmethod
+    def Start(checkLive: bool = True):
+        # do not delay the boot on a slow database
+        IndexAuditHelper.AuditTask = asyncio.create_task(IndexAuditHelper.Audit(checkLive))
+
+    @staticmethod
+    async def Shutdown():
+        task = IndexAuditHelper.AuditTask
+        if (task is not None) and (not task.done()):
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+        IndexAuditHelper.AuditTask = None
+
+    @staticmethod
+    async def IndexStats() -> dict[str, Any]:
+        """
+        `$indexStats` per declared collection. Counters start at mongod restart (`since`), per node
+        """
+
+        async def stats(m: MongoIndexInit) -> list[dict[str, Any]]:
+            items: list[dict[str, Any]] = await m.coll.aggregate([{"$indexStats": {}}]).to_list(None) # type: ignore
+            return sorted(
+                [
+                    {
+                        "name": item.get("name"),
+                        "key": item.get("key"),
+                        "ops": item.get("accesses", {}).get("ops", 0),
+                        "since": item.get("accesses", {}).get("since"),
+                        "host": item.get("host"),
+                        "unused": item.get("accesses", {}).get("ops", 0) == 0
+                    }
+                    for item in items
+                ],
+                key=lambda x: x["ops"]
+            )
+
+        ret: dict[str, Any] = {}
+        results = await asyncio.gather(*[stats(m) for m in ListMongoIndexInit], return_exceptions=True)
+        for m, result in zip(ListMongoIndexInit, results):
+            ret[m.collName] = {"error": str(result)} if isinstance(result, BaseException) else result
+        return jsonable_encoder(ret)
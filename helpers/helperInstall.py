@@ -1,19 +1,32 @@
+import asyncio
 from datetime import datetime, timezone
-from typing import Any, List
+from enum import Enum
+from time import perf_counter
+from typing import Any, Iterable, List, Mapping
 from fastapi.encoders import jsonable_encoder
 from bson import SON
+from pymongo import UpdateOne
+from pymongo.collation import Collation
+from pymongo.errors import OperationFailure
 from classes.classMongoDb import TMongoCollection
-from mongodb.mongoIndex import MongoIndex, index_account, index_account_external, index_company, index_company_category, index_global_config, index_lead, index_lead_tag, index_master_data, index_master_data_follower, index_partner, index_uom_category, index_uom
+from mongodb.mongoIndex import MongoIndex, index_id, index_account, index_account_external, index_company, index_company_category, index_generic_material, index_generic_material_category, index_global_config, index_lead, index_lead_tag, index_master_data, index_master_data_follower, index_partner, index_uom_category, index_uom
+from utils.util_http_exception import MsHTTPInternalServerErrorException
 from utils.util_logger import msLogger
 from mongodb.mongoClient import MGDB
 from mongodb.mongoCollection import *
 from mongodb.mongoCollectionName import CollectionNames
+from utils.util_search import NAME_NORMALIZED_FIELD, SetNameNormalized
 
 class MongoIndexInit:
-    def __init__(self, coll: TMongoCollection, collName: str, indexs: list[MongoIndex]) -> None:
+    def __init__(self, coll: TMongoCollection, collName: str, indexs: list[MongoIndex], retired: list[str] | None = None) -> None:
+        """
+        - retired: index replaced by one of `indexs`, dropped by install once every declared index is built
+        """
+
         self.coll = coll
         self.collName = collName
         self.indexs = indexs
+        self.retired = retired or []
 
 ListMongoIndexInit: list[MongoIndexInit] = [
     MongoIndexInit(TbGlobalConfig, CollectionNames.TbGlobalConfig.value, indexs=[i.value for i in index_global_config]),
@@ -21,31 +34,162 @@ ListMongoIndexInit: list[MongoIndexInit] = [
     MongoIndexInit(TbCompany, CollectionNames.TbCompany.value, indexs=[i.value for i in index_company]),
     MongoIndexInit(TbAccount, CollectionNames.TbAccount.value, indexs=[i.value for i in index_account]),
     MongoIndexInit(TbAccountExternal, CollectionNames.TbAccountExternal.value, indexs=[i.value for i in index_account_external]),
-    MongoIndexInit(TbPartner, CollectionNames.TbPartner.value, indexs=[i.value for i in index_partner]),
-    MongoIndexInit(TbMasterData, CollectionNames.TbMasterData.value, indexs=[i.value for i in index_master_data]),
-    MongoIndexInit(TbMasterDataFollower, CollectionNames.TbMasterDataFollower.value, indexs=[i.value for i in index_master_data_follower]),
-    MongoIndexInit(TbLead, CollectionNames.TbLead.value, indexs=[i.value for i in index_lead]),
+    MongoIndexInit(
+        TbPartner, CollectionNames.TbPartner.value, indexs=[i.value for i in index_partner],
+        # replaced by partial index on isDeleted: false
+        retired=[
+            "index_isDeleted_masterDataId",
+            "index_isDeleted_companyId",
+            "index_isDeleted_masterDataId_name",
+            "index_isDeleted_masterDataId_companyId",
+            "index_isDeleted_masterDataId_companyId_type",
+            "index_isDeleted_masterDataId_companyId_name",
+            "index_isDeleted_masterDataId_name_type_parentId",
+            "index_isDeleted_name_type_parentId",
+            "index_isDeleted_masterDataId_nameNormalized",
+            # replaced by the same keys + _id (keyset pagination)
+            "index_masterDataId_notDeleted",
+            "index_masterDataId_name_notDeleted",
+            "index_masterDataId_companyId_notDeleted",
+            "index_masterDataId_companyId_name_notDeleted"
+        ]
+    ),
+    MongoIndexInit(
+        TbMasterData, CollectionNames.TbMasterData.value, indexs=[i.value for i in index_master_data],
+        # replaced by unique partial index on isDeleted: false
+        retired=["index_isDeleted_nameNormalized"]
+    ),
+    MongoIndexInit(
+        TbMasterDataFollower, CollectionNames.TbMasterDataFollower.value, indexs=[i.value for i in index_master_data_follower],
+        # replaced by the same keys + _id (keyset pagination)
+        retired=["index_isDeleted_masterDataId_companyId"]
+    ),
+    MongoIndexInit(
+        TbLead, CollectionNames.TbLead.value, indexs=[i.value for i in index_lead],
+        # replaced by partial index on isDeleted: false
+        retired=[
+            "index_isDeleted_masterDataId",
+            "index_isDeleted_companyId",
+            "index_isDeleted_name",
+            "index_isDeleted_masterDataId_companyId",
+            "index_isDeleted_masterDataId_name",
+            "index_isDeleted_masterDataId_companyId_name",
+            "index_isDeleted_masterDataId_status",
+            "index_isDeleted_masterDataId_name_type_partnerId_status_tags",
+            "index_isDeleted_masterDataId_nameNormalized",
+            # replaced by the same keys + _id (keyset pagination)
+            "index_masterDataId_notDeleted",
+            "index_masterDataId_name_notDeleted"
+        ]
+    ),
     MongoIndexInit(TbLeadTag, CollectionNames.TbLeadTag.value, indexs=[i.value for i in index_lead_tag]),
     MongoIndexInit(TbUomCategory, CollectionNames.TbUomCategory.value, indexs=[i.value for i in index_uom_category]),
-    MongoIndexInit(TbUom, CollectionNames.TbUom.value, indexs=[i.value for i in index_uom]),
+    MongoIndexInit(
+        TbUom, CollectionNames.TbUom.value, indexs=[i.value for i in index_uom],
+        retired=[
+            # replaced by unique partial index on isDeleted: false
+            "index_isDeleted_companyId_nameNormalized",
+            # replaced by the same keys + _id (keyset pagination)
+            "index_isDeleted_companyId_name",
+            "index_isDeleted_companyId_categoryId"
+        ]
+    ),
+    MongoIndexInit(TbGenericMaterialCategory, CollectionNames.TbGenericMaterialCategory.value, indexs=[i.value for i in index_generic_material_category]),
+    MongoIndexInit(
+        TbGenericMaterial, CollectionNames.TbGenericMaterial.value, indexs=[i.value for i in index_generic_material],
+        retired=[
+            # replaced by unique partial index on isDeleted: false
+            "index_isDeleted_companyId_nameNormalized",
+            # replaced by the same keys + _id (keyset pagination)
+            "index_isDeleted_companyId_name"
+        ]
+    ),
+
 
+]
 
+ListNameNormalizedInit: list[MongoIndexInit] = [
+    MongoIndexInit(TbMasterData, CollectionNames.TbMasterData.value, indexs=[]),
+    MongoIndexInit(TbPartner, CollectionNames.TbPartner.value, indexs=[]),
+    MongoIndexInit(TbLead, CollectionNames.TbLead.value, indexs=[]),
+    MongoIndexInit(TbLeadTag, CollectionNames.TbLeadTag.value, indexs=[]),
+    MongoIndexInit(TbUom, CollectionNames.TbUom.value, indexs=[]),
+    MongoIndexInit(TbGenericMaterial, CollectionNames.TbGenericMaterial.value, indexs=[]),
 ]
+"""
+Collection with `nameNormalized` (prefix search or unique name), document created before the field existed are backfilled on install
+"""
+
+class MongoIndexSyncAction(str, Enum):
+    unchanged = "unchanged"
+    create = "create"
+    # same name, different keys or options: replacement built under a temporary name, then swapped
+    recreate = "recreate"
+    # live index not declared, dropped only with dropStale
+    stale = "stale"
+    drop = "drop"
+    # same keys as another live index, MongoDB refuse to create it
+    conflict = "conflict"
+    # replaced index, dropped after the declared indexes are built
+    retire = "retire"
 
 class InstallHelper:
 
+    BackfillBatchSize = 1000
+
+    DuplicateGroupLimit = 20
+    """
+    Duplicate groups reported per unique index
+    """
+
+    TemporaryIndexSuffix = "_tmp"
+
+    # IndexOptionsConflict, IndexKeySpecsConflict: an equivalent index (same keys) already exists
+    _EquivalentIndexCodes = (85, 86)
+
+    IndexOptionKeys = ["unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "collation", "hidden"]
+
     @staticmethod
     async def StartInstall(
+        dryRun: bool = False,
+        dropStale: bool = False
     ) -> dict[str, Any]:
-        log: dict[str, Any] = {}
+        """
+        - dryRun: only report what would change
+        - dropStale: drop live index not declared in `ListMongoIndexInit`
+        """
+
+        log: dict[str, Any] = {
+            "dryRun": dryRun,
+            "dropStale": dropStale
+        }
         listCollection = await MGDB.list_collection_names()
         startTime = datetime.now(timezone.utc)
         try:
-            log = await InstallHelper._CreateIndexs(listCollection, log, startTime)
+            # backfill first, unique index on nameNormalized can not be built while live documents miss it
+            if dryRun:
+                log = await InstallHelper._CountNameNormalizeds(log)
+            else:
+                log = await InstallHelper._BackfillNameNormalizeds(log)
+            log = await InstallHelper._ReportNameDuplicates(log)
+            log = await InstallHelper._CreateIndexs(listCollection, log, startTime, dryRun, dropStale)
+            if not dryRun:
+                missing = await InstallHelper._MissingUniqueIndexes()
+                if len(missing) > 0:
+                    log["uniqueIndexMissing"] = missing
 
         except Exception as err:
             msLogger.exception(str(err), err)
             log["error"] = str(err)
+        log["seconds"] = round((datetime.now(timezone.utc) - startTime).total_seconds(), 3)
+        if "uniqueIndexMissing" in log:
+            # name uniqueness is only enforced by these indexes (`NameConflict`), install must not look successful
+            msLogger.error(f"Install failed, unique index missing: {', '.join(log['uniqueIndexMissing'])}")
+            raise MsHTTPInternalServerErrorException(
+                type="INSTALL_UNIQUE_INDEX_MISSING",
+                message="Index unik belum terbentuk, perbaiki data duplikat lalu jalankan instalasi ulang",
+                additionalData=jsonable_encoder(log)
+            )
         return jsonable_encoder(log)
 
     @staticmethod
@@ -61,34 +205,315 @@ class InstallHelper:
         return False
 
     @staticmethod
-    async def _DoCreateIndex(m: MongoIndexInit, listCollection: List[str], log: dict[str, Any], startTime: datetime) -> dict[str, Any]:
+    def _NormalizeKeys(keys: Iterable[tuple[str, Any]]) -> list[tuple[str, Any]]:
+        # live index may return 1.0 for 1
+        return [(field, int(sort) if isinstance(sort, float) and sort.is_integer() else sort) for field, sort in keys]
+
+    @staticmethod
+    def _NormalizeOptions(options: Mapping[str, Any]) -> dict[str, Any]:
+        ret: dict[str, Any] = {}
+        for key in InstallHelper.IndexOptionKeys:
+            value = options.get(key)
+            if isinstance(value, Collation):
+                value = value.document
+            if key == "collation" and isinstance(value, Mapping) and (value.get("locale") == "simple"):
+                # simple collation is not stored in the index spec
+                value = None
+            if (value is None) or (value is False):
+                continue
+            ret[key] = dict(value) if isinstance(value, Mapping) else value
+        return ret
+
+    @staticmethod
+    def IndexDiff(declared: MongoIndex, live: Mapping[str, Any]) -> list[str]:
+        """
+        return: differences between declared and live index with the same name, empty when equal
+        """
+
+        diff: list[str] = []
+        declaredKeys = InstallHelper._NormalizeKeys((k.field, k.sort) for k in declared.keys)
+        liveKeys = InstallHelper._NormalizeKeys(live.get("key", {}).items())
+        if declaredKeys != liveKeys:
+            diff.append(f"key {declaredKeys} != {liveKeys}")
+
+        declaredOptions = InstallHelper._NormalizeOptions(declared.kwargs)
+        liveOptions = InstallHelper._NormalizeOptions(live)
+        for key in InstallHelper.IndexOptionKeys:
+            declaredValue = declaredOptions.get(key)
+            liveValue = liveOptions.get(key)
+            if key == "collation" and (declaredValue is not None) and (liveValue is not None):
+                # live collation is expanded with every default attribute
+                if all(liveValue.get(k) == v for k, v in declaredValue.items()):
+                    continue
+            if declaredValue != liveValue:
+                diff.append(f"{key} {declaredValue} != {liveValue}")
+        return diff
+
+    @staticmethod
+    def PlanIndexes(m: MongoIndexInit, liveIndexes: List[Mapping[str, Any]], dropStale: bool) -> list[dict[str, Any]]:
+        liveByName = {i["name"]: i for i in liveIndexes}
+        declaredNames = {i.indexName for i in m.indexs}
+        plan: list[dict[str, Any]] = []
+
+        stale = [i for name, i in liveByName.items() if (name != index_id) and (name not in declaredNames) and (name not in m.retired)]
+        for live in stale:
+            plan.append({
+                "index": live["name"],
+                "action": MongoIndexSyncAction.drop if dropStale else MongoIndexSyncAction.stale
+            })
+
+        for idx in m.indexs:
+            live = liveByName.get(idx.indexName)
+            if live is not None:
+                diff = InstallHelper.IndexDiff(idx, live)
+                if len(diff) == 0:
+                    plan.append({"index": idx.indexName, "action": MongoIndexSyncAction.unchanged})
+                else:
+                    plan.append({"index": idx.indexName, "action": MongoIndexSyncAction.recreate, "diff": diff, "declared": idx, "live": live})
+                continue
+
+            # MongoDB refuse an index with the same key and collation as another one
+            keys = InstallHelper._NormalizeKeys((k.field, k.sort) for k in idx.keys)
+            options = InstallHelper._NormalizeOptions(idx.kwargs)
+            sameKeys = [
+                i["name"] for i in stale
+                if (InstallHelper._NormalizeKeys(i.get("key", {}).items()) == keys) and
+                (InstallHelper._NormalizeOptions(i).get("collation") == options.get("collation"))
+            ]
+            if (len(sameKeys) > 0) and (not dropStale):
+                plan.append({"index": idx.indexName, "action": MongoIndexSyncAction.conflict, "with": sameKeys})
+            else:
+                plan.append({"index": idx.indexName, "action": MongoIndexSyncAction.create, "declared": idx})
+
+        for name in m.retired:
+            if (name in liveByName) and (name not in declaredNames):
+                plan.append({"index": name, "action": MongoIndexSyncAction.retire})
+        return plan
+
+    @staticmethod
+    async def _CreateIndex(m: MongoIndexInit, idx: MongoIndex, name: str | None = None) -> float:
+        buildStart = perf_counter()
+        await m.coll.create_index(
+            [(i.field, i.sort) for i in idx.keys],
+            name=name or idx.indexName,
+            **idx.kwargs
+        )
+        return round(perf_counter() - buildStart, 3)
+
+    @staticmethod
+    async def _RestoreIndex(m: MongoIndexInit, live: Mapping[str, Any]):
+        options = {k: v for k, v in live.items() if k in InstallHelper.IndexOptionKeys}
+        await m.coll.create_index(list(live["key"].items()), name=live["name"], **options)
+
+    @staticmethod
+    async def _RecreateIndex(m: MongoIndexInit, idx: MongoIndex, live: Mapping[str, Any]) -> float:
+        """
+        The live index stay in place until its replacement is built:
+        - build under a temporary name, drop the live index, build under the declared name, drop the temporary one
+        - equivalent keys (only options differ) can not coexist: drop then build, rebuild the live definition on failure
+        """
+
+        buildStart = perf_counter()
+        temporaryName = idx.indexName + InstallHelper.TemporaryIndexSuffix
+        try:
+            await InstallHelper._CreateIndex(m, idx, temporaryName)
+        except OperationFailure as err:
+            if err.code not in InstallHelper._EquivalentIndexCodes:
+                raise
+            await m.coll.drop_index(idx.indexName)
+            try:
+                await InstallHelper._CreateIndex(m, idx)
+            except OperationFailure:
+                await InstallHelper._RestoreIndex(m, live)
+                raise
+            return round(perf_counter() - buildStart, 3)
+
+        await m.coll.drop_index(idx.indexName)
+        # the temporary index keep serving (and enforcing unique) if this build fails
+        await InstallHelper._CreateIndex(m, idx)
+        await m.coll.drop_index(temporaryName)
+        return round(perf_counter() - buildStart, 3)
+
+    @staticmethod
+    async def _DuplicateGroups(m: MongoIndexInit, idx: MongoIndex) -> list[dict[str, Any]]:
+        """
+        Documents sharing the keys of an unique index, the build fail while one group exists
+        """
+
+        if not idx.kwargs.get("unique"):
+            return []
+        fields = [k.field for k in idx.keys]
+        group: dict[str, Any] = {
+            "_id": {f.replace(".", "_"): "$" + f for f in fields},
+            "count": {"$sum": 1},
+            "ids": {"$push": {"$toString": "$_id"}}
+        }
+        if NAME_NORMALIZED_FIELD in fields:
+            group["names"] = {"$addToSet": "$name"}
+        pipeline: list[dict[str, Any]] = [
+            {"$match": dict(idx.partialFilterExpression or {})},
+            {"$group": group},
+            {"$match": {"count": {"$gt": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": InstallHelper.DuplicateGroupLimit}
+        ]
+        options: dict[str, Any] = {"allowDiskUse": True}
+        if idx.kwargs.get("collation") is not None:
+            options["collation"] = idx.kwargs["collation"]
+        return await m.coll.aggregate(pipeline, **options).to_list(None) # type: ignore
+
+    @staticmethod
+    async def _ReportNameDuplicates(log: dict[str, Any]) -> dict[str, Any]:
+        """
+        Duplicate `nameNormalized` per unique index, to fix before the unique index build
+        """
+
+        names = {m.collName for m in ListNameNormalizedInit}
+        for m in ListMongoIndexInit:
+            if m.collName not in names:
+                continue
+            live: List[dict[str, Any]] = await m.coll.list_indexes().to_list(None) # type: ignore
+            liveNames = {i["name"] for i in live}
+            for idx in m.indexs:
+                if (not idx.kwargs.get("unique")) or (NAME_NORMALIZED_FIELD not in [k.field for k in idx.keys]):
+                    continue
+                # a live unique index already guarantee no duplicate
+                if idx.indexName in liveNames:
+                    continue
+                groups = await InstallHelper._DuplicateGroups(m, idx)
+                if len(groups) > 0:
+                    log["duplicates_" + m.collName + "_" + idx.indexName] = groups
+                    msLogger.error(f"Duplicate {NAME_NORMALIZED_FIELD} in {m.collName}, {idx.indexName} can not be built: {len(groups)} group(s)")
+        return log
+
+    @staticmethod
+    async def _MissingUniqueIndexes() -> list[str]:
+        missing: list[str] = []
+        for m in ListMongoIndexInit:
+            unique = [i.indexName for i in m.indexs if i.kwargs.get("unique")]
+            if len(unique) == 0:
+                continue
+            live: List[dict[str, Any]] = await m.coll.list_indexes().to_list(None) # type: ignore
+            liveNames = {i["name"] for i in live}
+            missing += [f"{m.collName}.{name}" for name in unique if name not in liveNames]
+        return missing
+
+    @staticmethod
+    async def _DoCreateIndex(m: MongoIndexInit, listCollection: List[str], log: dict[str, Any], startTime: datetime, dryRun: bool = False, dropStale: bool = False) -> dict[str, Any]:
         subLog: dict[str, Any] = {}
         if not m.collName in listCollection:
-            await MGDB.create_collection(m.collName)
+            if not dryRun:
+                await MGDB.create_collection(m.collName)
             subLog[m.collName + "_collection"] = "created"
+            indexes: List[Any] = []
         else:
             subLog[m.collName + "_collection"] = "already exists"
+            indexesCur = m.coll.list_indexes()
+            indexes = await indexesCur.to_list(None) # type: ignore
 
-        indexesCur = m.coll.list_indexes()
-        indexes: List[Any] = await indexesCur.to_list(None) # type: ignore
-        for idx in m.indexs:
-            indexName = idx.indexName
-            if not InstallHelper.CollectionHasIndex(indexes, indexName):
-                await m.coll.create_index(
-                    [(i.field, i.sort) for i in idx.keys],
-                    name=indexName,
-                    **idx.kwargs
-                )
-                subLog[m.collName + "_" + indexName] = "created"
-            else:
-                subLog[m.collName + "_" + indexName] = "already exists"
+        plan = InstallHelper.PlanIndexes(m, indexes, dropStale)
+        # drop first, a stale index may hold the keys of a new one.
+        # retire last, queries keep an index while the replacement is built
+        order = {MongoIndexSyncAction.drop: 0, MongoIndexSyncAction.retire: 2}
+        plan.sort(key=lambda x: order.get(x["action"], 1))
+        failed = False
+        for item in plan:
+            action: MongoIndexSyncAction = item["action"]
+            indexLog: dict[str, Any] = {"action": action.value}
+            for key in ("diff", "with"):
+                if key in item:
+                    indexLog[key] = item[key]
+            if action == MongoIndexSyncAction.conflict:
+                failed = True
+            if action in (MongoIndexSyncAction.create, MongoIndexSyncAction.recreate):
+                duplicates = await InstallHelper._DuplicateGroups(m, item["declared"])
+                if len(duplicates) > 0:
+                    # the build would fail, keep the live index
+                    failed = True
+                    indexLog["action"] = MongoIndexSyncAction.conflict.value
+                    indexLog["duplicates"] = duplicates
+                    msLogger.error(f"Index {m.collName}.{item['index']} {action.value} skipped, {len(duplicates)} duplicate group(s)")
+                    subLog[m.collName + "_" + item["index"]] = indexLog
+                    continue
+            if not dryRun:
+                if (action == MongoIndexSyncAction.retire) and failed:
+                    indexLog["action"] = MongoIndexSyncAction.stale.value
+                    subLog[m.collName + "_" + item["index"]] = indexLog
+                    continue
+                if action in (MongoIndexSyncAction.drop, MongoIndexSyncAction.retire):
+                    await m.coll.drop_index(item["index"])
+                if action in (MongoIndexSyncAction.create, MongoIndexSyncAction.recreate):
+                    try:
+                        if action == MongoIndexSyncAction.recreate:
+                            indexLog["seconds"] = await InstallHelper._RecreateIndex(m, item["declared"], item["live"])
+                        else:
+                            indexLog["seconds"] = await InstallHelper._CreateIndex(m, item["declared"])
+                        msLogger.info(f"Index {m.collName}.{item['index']} {action.value} in {indexLog['seconds']} seconds")
+                    except OperationFailure as err:
+                        # ex: unique index over existing duplicates, keep syncing the other indexes
+                        failed = True
+                        indexLog["error"] = str(err)
+                        msLogger.error(f"Index {m.collName}.{item['index']} {action.value} failed. {err}")
+            subLog[m.collName + "_" + item["index"]] = indexLog
 
         return subLog
 
     @staticmethod
-    async def _CreateIndexs(listCollection: List[str], log: dict[str, Any], startTime: datetime) -> dict[str, Any]:
-        for indexInit in ListMongoIndexInit:
-            retIndex = await InstallHelper._DoCreateIndex(indexInit, listCollection, log, startTime)
+    async def _CreateIndexs(listCollection: List[str], log: dict[str, Any], startTime: datetime, dryRun: bool = False, dropStale: bool = False) -> dict[str, Any]:
+        # index builds of different collections run concurrently on the server
+        results = await asyncio.gather(
+            *[InstallHelper._DoCreateIndex(indexInit, listCollection, log, startTime, dryRun, dropStale) for indexInit in ListMongoIndexInit],
+            return_exceptions=True
+        )
+        for indexInit, retIndex in zip(ListMongoIndexInit, results):
+            if isinstance(retIndex, BaseException):
+                msLogger.error(f"Failed to sync indexes of {indexInit.collName}. {retIndex}")
+                retIndex = {"error": str(retIndex)}
             log["setup_" + indexInit.collName] = retIndex
         return log
 
+    @staticmethod
+    async def _BackfillNameNormalized(m: MongoIndexInit) -> int:
+        """
+        Set `nameNormalized` on document without it, in batch paged by `_id` (each document scanned once).
+        Update is filtered by the name that was read, a document renamed meanwhile already get `nameNormalized` from its writer
+        """
+
+        updated = 0
+        lastId: Any = None
+        while True:
+            query: dict[str, Any] = {NAME_NORMALIZED_FIELD: {"$exists": False}}
+            if lastId is not None:
+                query["_id"] = {"$gt": lastId}
+            cursor = m.coll.find(
+                query,
+                {"name": 1},
+                sort=[("_id", 1)],
+                limit=InstallHelper.BackfillBatchSize,
+                hint=index_id
+            )
+            items: List[dict[str, Any]] = await cursor.to_list(None) # type: ignore
+            if len(items) == 0:
+                return updated
+            lastId = items[-1]["_id"]
+            requests = [
+                UpdateOne(
+                    {"_id": item["_id"], "name": item.get("name")},
+                    {"$set": {NAME_NORMALIZED_FIELD: SetNameNormalized({"name": item.get("name")})[NAME_NORMALIZED_FIELD]}}
+                )
+                for item in items
+            ]
+            ret = await m.coll.bulk_write(requests, ordered=False)
+            updated += ret.modified_count
+
+    @staticmethod
+    async def _BackfillNameNormalizeds(log: dict[str, Any]) -> dict[str, Any]:
+        for m in ListNameNormalizedInit:
+            log["backfill_" + m.collName + "_" + NAME_NORMALIZED_FIELD] = await InstallHelper._BackfillNameNormalized(m)
+        return log
+
+    @staticmethod
+    async def _CountNameNormalizeds(log: dict[str, Any]) -> dict[str, Any]:
+        for m in ListNameNormalizedInit:
+            log["backfill_" + m.collName + "_" + NAME_NORMALIZED_FIELD] = await m.coll.count_documents({NAME_NORMALIZED_FIELD: {"$exists": False}})
+        return log
@@ -12,8 +12,11 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from elasticapm.contrib.starlette import make_apm_client, ElasticAPM # type: ignore
 from pydantic import ValidationError
+from auth.authToken import AuthToken
+from auth.authUser import AuthUser, AuthUserDep
 from classes.classOpenApiNo422 import OpenApiNo422
 from config.config import settings
+from helpers.helperIndexAudit import IndexAuditHelper
 from models.shared.modelEnvironment import MsEnvironment
 from models.shared.modelResponse import SuccessMessage
 from mongodb.mongoClient import MGDB
@@ -24,6 +27,7 @@ from utils.util_http_exception import MsHTTPException
 from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType, MsHTTPStatusCode
 from utils.util_logger import msLogger
 from utils.util_other import OtherUtil
+from utils.util_replication import ReplicationStats
 from utils.validation_error.MsValidationError import FastApiParseError
 
 rootPath = settings.fastapi.root_path
@@ -65,17 +69,30 @@ async def AppLifeSpan(app: FastAPI):
     # remove open api 422
     OpenApiNo422(app)
 
+    # resolve auth metadata per route, fail boot on invalid authenticated route
+    AuthUserDep.BuildRouteTable(app.routes)
+
+    # report index hint used on the wrong collection or missing in database
+    if settings.indexAudit.enabled:
+        IndexAuditHelper.Start(settings.indexAudit.checkLive)
+
     if not FileUtil.CreateDirectory("./temp"):
         raise Exception(f"Failed to create directory temp")
 
     rabbitMqClient.start()
 
+    await AuthToken.Start()
+
     msLogger.success("*** " + settings.fastapi.project_name + " Started ***", foreground="green")
 
     yield
     
     msLogger.warning("Stopping " + settings.fastapi.project_name)
 
+    await AuthToken.Shutdown()
+
+    await IndexAuditHelper.Shutdown()
+
     await rabbitMqClient.Shutdown()
 
     msLogger.success(f"*** {settings.fastapi.project_name} Stopped ***", foreground="red")
@@ -510,6 +527,73 @@ async def GetRequestHeader(request: Request):
         "headers": headers
     }
 
+@app.get(
+    rootPath + "/private/auth_cache",
+    operation_id="auth_cache",
+    response_model=dict,
+    summary="Auth verification cache statistics"
+)
+async def GetAuthCacheStats():
+    return {
+        "enabled": settings.auth.cache.enabled,
+        "negativeTtlSeconds": settings.auth.cache.negativeTtlSeconds,
+        "verifyCache": AuthUser.VerifyCache.Stats(),
+        "singleFlight": settings.auth.singleFlight,
+        "verifyFlight": AuthUser.VerifyFlight.Stats(),
+        "matrix": {
+            "enabled": settings.auth.matrix.enabled,
+            "unsupported": AuthUser.MatrixUnsupported,
+            "matrixCache": AuthUser.MatrixCache.Stats(),
+            "matrixFlight": AuthUser.MatrixFlight.Stats()
+        },
+        "offline": AuthToken.Stats()
+    }
+
+@app.get(
+    rootPath + "/private/auth_breaker",
+    operation_id="auth_breaker",
+    response_model=dict,
+    summary="Auth service circuit breaker state"
+)
+async def GetAuthBreakerState():
+    return {
+        "enabled": settings.auth.breaker.enabled,
+        "staleGraceSeconds": settings.auth.breaker.staleGraceSeconds,
+        "breaker": AuthUser.Breaker.Stats()
+    }
+
+@app.get(
+    rootPath + "/private/index_audit",
+    operation_id="index_audit",
+    response_model=dict,
+    summary="Index hint audit report"
+)
+async def GetIndexAudit(refresh: bool = False):
+    if refresh or (IndexAuditHelper.LastReport is None):
+        return jsonable_encoder(await IndexAuditHelper.Audit(settings.indexAudit.checkLive))
+    return jsonable_encoder(IndexAuditHelper.LastReport)
+
+@app.get(
+    rootPath + "/private/index_stats",
+    operation_id="index_stats",
+    response_model=dict,
+    summary="Index usage statistics ($indexStats)"
+)
+async def GetIndexStats():
+    return await IndexAuditHelper.IndexStats()
+
+@app.get(
+    rootPath + "/private/rabbitmq_stats",
+    operation_id="rabbitmq_stats",
+    response_model=dict,
+    summary="RabbitMQ consumer handler statistics"
+)
+async def GetRabbitMqStats():
+    return {
+        "consumer": rabbitMqClient.Stats(),
+        "replication": ReplicationStats()
+    }
+
 if settings.config.installation:
     from routers.routerInstallation import ApiRouter_Install
     app.include_router(ApiRouter_Install, prefix=rootPath)
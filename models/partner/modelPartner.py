@@ -75,6 +75,16 @@ class PartnerUpdateWebRequest(BaseModel):
         title="List of Partner Tags"
     )
 
+class PartnerRelinkWebRequest(BaseModel):
+    ids: List[ObjectId] = Field(
+        default=...,
+        min_length=1,
+        title="List of Partner IDs to move"
+    )
+    parentId: ObjectId = Field(
+        default=...,
+        title="New Parent ID"
+    )
 
 class PartnerCreateCommandRequest(AuditData, PartnerEx, PartnerDetail):
     pass
@@ -95,6 +105,38 @@ class ResponsePartnerView(ResponseModel):
 class ResponsePagingPartnerView(ResponseModel):
     data: MsPaginationResult[PartnerView]
 
+# --------------------------------------------------------------------------
+class PartnerTreeNode(PartnerBase):
+    id: ObjectId = Field(
+        default=...,
+        alias="_id",
+        title="Partner ID"
+    )
+    depth: int = Field(
+        default=0,
+        title="Depth from the root of the returned tree"
+    )
+    descendantCount: int = Field(
+        default=0,
+        title="Number of partners below this node"
+    )
+    leadCount: int = Field(
+        default=0,
+        title="Number of leads of this partner"
+    )
+    subtreeLeadCount: int = Field(
+        default=0,
+        title="Number of leads of this partner and every partner below it"
+    )
+    children: List["PartnerTreeNode"] = Field(
+        default=[],
+        title="Child partners"
+    )
+
+# Response model for partner hierarchy
+class ResponsePartnerTree(ResponseModel):
+    data: List[PartnerTreeNode]
+
 
 # --------------------------------------------------------------------------
 
@@ -88,3 +88,80 @@ class VerifyEndpointSystemResult(VerifyEndpointBase):
     pass
 
 # ==========================================================================
+
+class PermissionMatrixResult(BaseModel):
+    """
+    Every permitted operation of an access token for one service
+    """
+
+    accountId: ObjectId = Field(
+        default=...,
+        title="Id AKun",
+        description="Id akun"
+    )
+    roleClaimed: list[MembershipRoleClaimed] = Field(
+        default=...,
+        description="Peran hak akses yang dimiliki pada kredensial akun"
+    )
+    companyCategoryId: ObjectId | None = Field(
+        default=...,
+        title="Id Kategori Perusahaan",
+        description="Id kategori perusahaan (jika `null`, berarti lokasi kredensial di sistem)"
+    )
+    companyId: ObjectId | None = Field(
+        default=...,
+        title="Id Perusahaan",
+        description="Id perusahaan (jika `null`, berarti lokasi kredensial di sistem)"
+    )
+    roleLocation: RoleLocation = Field(
+        default=...,
+        description="Lokasi peran hak akses yang disetujui"
+    )
+    operations: dict[str, str | None] = Field(
+        default=...,
+        description="Id operasi yang diizinkan beserta nama peran hak akses yang disetujui (`null` berarti mode `allow_all`)"
+    )
+
+class ResponsPermissionMatrixResult(ResponseModel):
+    data: PermissionMatrixResult
+
+# ==========================================================================
+
+class AccessTokenEndpointClaim(BaseModel):
+    roleName: str | None = Field(
+        default=None,
+        description="Nama peran hak akses yang disetujui, jika `null` berarti endpoint bersangkutan menggunakan mode `allow_all`"
+    )
+    roleLocation: RoleLocation = Field(
+        default=...,
+        description="Lokasi peran hak akses yang disetujui"
+    )
+
+class AccessTokenClaims(BaseModel):
+    """
+    Claims of signed access token, used to verify endpoint without request to auth service
+    """
+
+    accountId: ObjectId = Field(
+        default=...,
+        title="Id AKun",
+        description="Id akun"
+    )
+    roleClaimed: list[MembershipRoleClaimed] = Field(
+        default=...,
+        description="Peran hak akses yang dimiliki pada kredensial akun"
+    )
+    companyCategoryId: ObjectId | None = Field(
+        default=None,
+        title="Id Kategori Perusahaan",
+        description="Id kategori perusahaan (jika `null`, berarti lokasi kredensial di sistem)"
+    )
+    companyId: ObjectId | None = Field(
+        default=None,
+        title="Id Perusahaan",
+        description="Id perusahaan (jika `null`, berarti lokasi kredensial di sistem)"
+    )
+    endpoints: dict[str, dict[str, AccessTokenEndpointClaim]] = Field(
+        default=...,
+        description="Endpoint yang diizinkan, dikelompokkan per nama service lalu per id operasi"
+    )
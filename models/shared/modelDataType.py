@@ -1,13 +1,18 @@
+from datetime import date, datetime, time
 from decimal import Decimal
+from enum import Enum
+import inspect
 import json
 from functools import lru_cache
-from typing import Annotated, Any, TypeVar, Union, get_origin
+from types import NoneType, UnionType
+from typing import Annotated, Any, Callable, Self, TypeVar, Union, get_args, get_origin
 from bson.regex import Regex as BsonRegex
 from bson.objectid import ObjectId as BsonObjectId
 from bson.timestamp import Timestamp as BsonTimestamp
 from bson.decimal128 import Decimal128 as BsonDecimal128
 from fastapi.encoders import ENCODERS_BY_TYPE, jsonable_encoder
 from pydantic import BaseModel as _BaseModel, ConfigDict, Field, GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.fields import FieldInfo
 from pydantic_core import core_schema
 from pydantic.json_schema import JsonSchemaValue
 from base64 import standard_b64encode
@@ -149,6 +154,63 @@ class Decimal128(BsonDecimal128):
     def decimal_encoder(val: 'Decimal128') -> Decimal:
         return val.to_decimal()
 
+# field value conversion when constructing model from trusted document, None means keep as is
+TTrustedReadCoercion = Callable[[Any], Any] | None
+
+class _TrustedReadUnsupported(Exception):
+    pass
+
+def _TrustedReadCoercion(annotation: Any) -> TTrustedReadCoercion:
+    """
+    Raise `_TrustedReadUnsupported` when the value must go through validation
+    """
+
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return _TrustedReadCoercion(get_args(annotation)[0])
+    if (origin is Union) or (origin is UnionType):
+        args = [x for x in get_args(annotation) if x is not NoneType]
+        if len(args) == 1:
+            return _TrustedReadCoercion(args[0])
+        # ambiguous union is only safe when no member need conversion
+        if any(_TrustedReadCoercion(x) is not None for x in args):
+            raise _TrustedReadUnsupported()
+        return None
+    if origin in (list, set, tuple, dict):
+        args = get_args(annotation)
+        if len(args) == 0:
+            return None
+        if origin is dict:
+            itemCoercion = _TrustedReadCoercion(args[1])
+            if itemCoercion is None:
+                return None
+            return lambda v: {k: itemCoercion(x) if x is not None else x for k, x in v.items()} if isinstance(v, dict) else v # type: ignore
+        if (origin is tuple) or (origin is set):
+            if all(_TrustedReadCoercion(x) is None for x in args if x is not Ellipsis):
+                return None
+            raise _TrustedReadUnsupported()
+        itemCoercion = _TrustedReadCoercion(args[0])
+        if itemCoercion is None:
+            return None
+        return lambda v: [itemCoercion(x) if x is not None else x for x in v] if isinstance(v, list) else v # type: ignore
+    if origin is not None:
+        # Literal and other typing construct
+        return None
+    if not inspect.isclass(annotation):
+        return None
+    if issubclass(annotation, BaseModel):
+        return lambda v: annotation.FromDb(v) if isinstance(v, dict) else v # type: ignore
+    if issubclass(annotation, _BaseModel):
+        return lambda v: annotation.model_validate(v) if isinstance(v, dict) else v # type: ignore
+    if issubclass(annotation, Enum):
+        return annotation
+    if annotation is float:
+        return lambda v: float(v) if isinstance(v, int) else v
+    if issubclass(annotation, (date, time)) and (not issubclass(annotation, datetime)):
+        # mongodb only store datetime
+        raise _TrustedReadUnsupported()
+    return None
+
 class BaseModel(_BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
@@ -160,6 +222,54 @@ class BaseModel(_BaseModel):
     def Projection(cls):
         return {s if m.alias is None else m.alias: 1 for s, m in cls.model_fields.items()}
     
+    @classmethod
+    @lru_cache(maxsize=None)
+    def TrustedReadPlan(cls) -> tuple[tuple[str, str, TTrustedReadCoercion, FieldInfo], ...] | None:
+        """
+        (document key, field name, coercion, field info) per field, None if the model need validation
+        """
+
+        decorators = cls.__pydantic_decorators__
+        if (len(decorators.field_validators) > 0) or (len(decorators.model_validators) > 0) or (len(decorators.validators) > 0) or (len(decorators.root_validators) > 0):
+            return None
+        if (len(cls.__private_attributes__) > 0) or (cls.model_config.get("extra") == "allow"):
+            return None
+        try:
+            return tuple(
+                (s if m.alias is None else m.alias, s, _TrustedReadCoercion(m.annotation), m)
+                for s, m in cls.model_fields.items()
+            )
+        except _TrustedReadUnsupported:
+            return None
+
+    @classmethod
+    def FromDb(cls, data: dict[str, Any]) -> Self:
+        """
+        Construct from our own database document without validation.
+        - Only convert what validation would change: alias, enum, nested model and int to float
+        - Fallback to validation if the model has validator or field type that can not be trusted
+        """
+
+        plan = cls.TrustedReadPlan()
+        if plan is None:
+            return cls(**data)
+        values: dict[str, Any] = {}
+        fieldsSet: set[str] = set()
+        for key, name, coercion, field in plan:
+            if key in data:
+                value = data[key]
+                values[name] = coercion(value) if (coercion is not None) and (value is not None) else value
+                fieldsSet.add(name)
+            elif not field.is_required():
+                values[name] = field.get_default(call_default_factory=True)
+        # same as model_construct, without its generic per-call work
+        instance = cls.__new__(cls)
+        object.__setattr__(instance, "__dict__", values)
+        object.__setattr__(instance, "__pydantic_fields_set__", fieldsSet)
+        object.__setattr__(instance, "__pydantic_extra__", None)
+        object.__setattr__(instance, "__pydantic_private__", None)
+        return instance
+
     @classmethod
     def model_validate(
         cls,
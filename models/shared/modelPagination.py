@@ -33,6 +33,10 @@ class MsPagination(BaseModel):
         default=QuerySortingOrder.Ascending,
         description="Urutan"
     )
+    cursor: str | None = Field(
+        default=None,
+        description="Kursor halaman (mode keyset). Isi `*` untuk halaman pertama, lalu isi dengan `nextCursor` dari respon sebelumnya. Jika diisi, `page` diabaikan"
+    )
 
     @classmethod
     def QueryParam(
@@ -56,13 +60,19 @@ class MsPagination(BaseModel):
         order: QuerySortingOrder = Query(
             default=QuerySortingOrder.Ascending,
             description="Urutan"
+        ),
+        cursor: str | None = Query(
+            default=None,
+            max_length=4096,
+            description="Kursor halaman (mode keyset). Isi `*` untuk halaman pertama, lalu isi dengan `nextCursor` dari respon sebelumnya. Jika diisi, `page` diabaikan"
         )
     ):
         return cls(
             size=size,
             page=page,
             sortby=sortby,
-            order=order
+            order=order,
+            cursor=cursor
         )
     
 class MsPaginationSort(BaseModel):
@@ -91,6 +101,10 @@ class MsPagination2(BaseModel):
         default=None,
         title="Sort"
     )
+    cursor: Optional[str] = Body(
+        default=None,
+        max_length=4096
+    )
 
     @classmethod
     def QueryParam(
@@ -110,12 +124,18 @@ class MsPagination2(BaseModel):
             default=None,
             title="Sort",
             description="Array urutan nama kolom"
+        ),
+        cursor: Optional[str] = Body(
+            default=None,
+            max_length=4096,
+            description="Kursor halaman (mode keyset). Isi `*` untuk halaman pertama, lalu isi dengan `nextCursor` dari respon sebelumnya. Jika diisi, `page` diabaikan"
         )
     ):
         return cls(
             sort=sort,
             size=size,
-            page=page
+            page=page,
+            cursor=cursor
         )
     
 TGenericPaginationModel = TypeVar("TGenericPaginationModel", bound=BaseModel) # must derived from BaseModel
@@ -144,13 +164,21 @@ class MsPaginationResult(BaseModel, Generic[TGenericPaginationModel]):
     )
     total: int = Field(
         default=...,
-        description="Total item.\n**Total hanya dikalkulasi jika `page` bernilai `1`.\nJika `page` bernilai lebih dari `1`, maka nilai `Total` akan selalu `-1`**",
+        description="Total item.\n**Total hanya dikalkulasi jika `page` bernilai `1` (mode keyset: `cursor` bernilai `*`).\nJika `page` bernilai lebih dari `1`, maka nilai `Total` akan selalu `-1`**",
         examples=[10]
     )
+    totalCapped: bool = Field(
+        default=False,
+        description="Jika `true`, penghitungan dihentikan pada batas maksimum dan total item lebih dari `total` (contoh: `10000+`)"
+    )
     items: List[TGenericPaginationModel] = Field(
         default=...,
         description="Daftar item"
     )
+    nextCursor: Optional[str] = Field(
+        default=None,
+        description="Kursor halaman berikutnya (mode keyset), `null` jika tidak ada halaman berikutnya atau tidak menggunakan mode keyset"
+    )
 
 class MsPaginationResult2(BaseModel, Generic[TGenericPaginationModel]):
 
@@ -171,11 +199,19 @@ class MsPaginationResult2(BaseModel, Generic[TGenericPaginationModel]):
     )
     total: int = Field(
         default=...,
-        description="Total item. **Total hanya dikalkulasi jika `page` bernilai `1`. Jika `page` bernilai lebih dari `1`, maka nilai `Total` akan selalu `-1`**",
+        description="Total item. **Total hanya dikalkulasi jika `page` bernilai `1` (mode keyset: `cursor` bernilai `*`). Jika `page` bernilai lebih dari `1`, maka nilai `Total` akan selalu `-1`**",
         examples=[10]
     )
+    totalCapped: bool = Field(
+        default=False,
+        description="Jika `true`, penghitungan dihentikan pada batas maksimum dan total item lebih dari `total` (contoh: `10000+`)"
+    )
     items: List[TGenericPaginationModel] = Field(
         default=...,
         description="Daftar item"
     )
+    nextCursor: Optional[str] = Field(
+        default=None,
+        description="Kursor halaman berikutnya (mode keyset), `null` jika tidak ada halaman berikutnya atau tidak menggunakan mode keyset"
+    )
 
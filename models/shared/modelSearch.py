@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class NameSearchMode(str, Enum):
+    contains = "contains"
+    prefix = "prefix"
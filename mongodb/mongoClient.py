@@ -5,6 +5,7 @@ from urllib.parse import quote_plus
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import WriteConcern
 
+from classes.classMongoCommandListener import mongoCommandListener
 from classes.classMongoDb import TMongoClientSession, TMongoDatabase, TMongoClient
 from config.config import settings
 
@@ -52,9 +53,9 @@ def CreateConnectionString() -> str:
 def CreateMongoDbClient(loop: asyncio.AbstractEventLoop | None = None) -> TMongoClient:
     connectionString = CreateConnectionString()
     if loop:
-        return AsyncIOMotorClient(connectionString, document_class=dict[str, Any], tz_aware=True, io_loop=loop)
+        return AsyncIOMotorClient(connectionString, document_class=dict[str, Any], tz_aware=True, io_loop=loop, event_listeners=[mongoCommandListener])
     else:
-        return AsyncIOMotorClient(connectionString, document_class=dict[str, Any], tz_aware=True)
+        return AsyncIOMotorClient(connectionString, document_class=dict[str, Any], tz_aware=True, event_listeners=[mongoCommandListener])
 
 MGDB_CLIENT: TMongoClient = CreateMongoDbClient(asyncio.get_running_loop())
 
@@ -9,13 +9,42 @@ class MongoIndexKey:
         self.sort = sort
 
 class MongoIndex:
-    def __init__(self, indexName: str, keys: list[MongoIndexKey], **kwargs: Any) -> None:
+    def __init__(
+        self,
+        indexName: str,
+        keys: list[MongoIndexKey],
+        partialFilterExpression: Mapping[str, Any] | None = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        - partialFilterExpression: only document matching it are indexed,
+          query must contain the same condition to use (or hint) the index
+        """
+
         self.indexName = indexName
         self.keys = keys
+        if partialFilterExpression is not None:
+            kwargs["partialFilterExpression"] = partialFilterExpression
         self.kwargs = kwargs
 
+    @property
+    def partialFilterExpression(self) -> Mapping[str, Any] | None:
+        return self.kwargs.get("partialFilterExpression")
+
 # ---------------------------------------------------------------------------------------------------------
 index_id = "_id_"
+collation_simple = {"locale": "simple"}
+"""
+Binary comparison. Index on `nameNormalized` use it explicitly,
+regex can only use index bounds when query and index collation are simple
+"""
+partial_not_deleted = {"isDeleted": False}
+"""
+Index only live document. Soft deleted document does not grow the index,
+query must filter `isDeleted: False`, lookup with `ignoreDeleted` use `_id`
+"""
+# Index backing a paginated list ends with `_id`: keyset pages sort on `_id` last (`KeysetSort`),
+# so the page is read in index order instead of a blocking sort of every matching document
 # ---------------------------------------------------------------------------------------------------------
 class index_global_config(Enum):
     index_name = MongoIndex(
@@ -152,6 +181,42 @@ class index_master_data(Enum):
             MongoIndexKey("name", pymongo.ASCENDING)
         ]
     )
+    isDeleted_companyId_name_id = MongoIndex(
+        "index_isDeleted_companyId_name_id",
+        [
+            MongoIndexKey("isDeleted", pymongo.ASCENDING),
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("name", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ]
+    )
+    isDeleted_companyId_id = MongoIndex(
+        "index_isDeleted_companyId_id",
+        [
+            MongoIndexKey("isDeleted", pymongo.ASCENDING),
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ]
+    )
+    # also keep live names unique, master data name is not scoped per company
+    nameNormalized = MongoIndex(
+        "index_nameNormalized_notDeleted",
+        [
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple,
+        partialFilterExpression=partial_not_deleted,
+        unique=True
+    )
+    isDeleted_companyId_nameNormalized = MongoIndex(
+        "index_isDeleted_companyId_nameNormalized",
+        [
+            MongoIndexKey("isDeleted", pymongo.ASCENDING),
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple
+    )
 # ---------------------------------------------------------------------------------------------------------
 
 class index_uom_category(Enum):
@@ -180,20 +245,30 @@ class index_uom(Enum):
             MongoIndexKey("name", pymongo.ASCENDING)
         ]
     )
-    isDeleted_companyId_name = MongoIndex(
-        "index_isDeleted_companyId_name",
+    isDeleted_companyId_name_id = MongoIndex(
+        "index_isDeleted_companyId_name_id",
         [
             MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING),
-            MongoIndexKey("name", pymongo.ASCENDING)
+            MongoIndexKey("name", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
         ]
     )
-    isDeleted_companyId_categoryId = MongoIndex(
-        "index_isDeleted_companyId_categoryId",
+    isDeleted_companyId_id = MongoIndex(
+        "index_isDeleted_companyId_id",
         [
             MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING),
-            MongoIndexKey("categoryId", pymongo.ASCENDING)
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ]
+    )
+    isDeleted_companyId_categoryId_id = MongoIndex(
+        "index_isDeleted_companyId_categoryId_id",
+        [
+            MongoIndexKey("isDeleted", pymongo.ASCENDING),
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("categoryId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
         ]
     )
     isDeleted_companyId_isActive_categoryId_name = MongoIndex(
@@ -206,6 +281,17 @@ class index_uom(Enum):
             MongoIndexKey("name", pymongo.ASCENDING)
         ]
     )
+    # also keep live names unique per company
+    companyId_nameNormalized = MongoIndex(
+        "index_companyId_nameNormalized_notDeleted",
+        [
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple,
+        partialFilterExpression=partial_not_deleted,
+        unique=True
+    )
 # ---------------------------------------------------------------------------------------------------------
 class index_generic_material_category(Enum):
     isDeleted_name = MongoIndex(
@@ -232,12 +318,21 @@ class index_generic_material(Enum):
             MongoIndexKey("name", pymongo.ASCENDING)
         ]
     )
-    isDeleted_companyId_name = MongoIndex(
-        "index_isDeleted_companyId_name",
+    isDeleted_companyId_name_id = MongoIndex(
+        "index_isDeleted_companyId_name_id",
         [
             MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING),
-            MongoIndexKey("name", pymongo.ASCENDING)
+            MongoIndexKey("name", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ]
+    )
+    isDeleted_companyId_id = MongoIndex(
+        "index_isDeleted_companyId_id",
+        [
+            MongoIndexKey("isDeleted", pymongo.ASCENDING),
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
         ]
     )
     isDeleted_companyId_name_categoryId = MongoIndex(
@@ -249,6 +344,17 @@ class index_generic_material(Enum):
             MongoIndexKey("categoryId", pymongo.ASCENDING)
         ]
     )
+    # also keep live names unique per company
+    companyId_nameNormalized = MongoIndex(
+        "index_companyId_nameNormalized_notDeleted",
+        [
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple,
+        partialFilterExpression=partial_not_deleted,
+        unique=True
+    )
 # ---------------------------------------------------------------------------------------------------------
 
 class index_master_data_follower(Enum):
@@ -259,12 +365,21 @@ class index_master_data_follower(Enum):
             MongoIndexKey("name", pymongo.ASCENDING)
         ]
     )
-    isDeleted_masterDataId_companyId  = MongoIndex(
-        "index_isDeleted_masterDataId_companyId",
+    isDeleted_masterDataId_companyId_id = MongoIndex(
+        "index_isDeleted_masterDataId_companyId_id",
         [
             MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
-            MongoIndexKey("companyId", pymongo.ASCENDING)
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ]
+    )
+    isDeleted_masterDataId_id = MongoIndex(
+        "index_isDeleted_masterDataId_id",
+        [
+            MongoIndexKey("isDeleted", pymongo.ASCENDING),
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
         ]
     )
     isDeleted_companyId = MongoIndex(
@@ -292,62 +407,90 @@ class index_master_data_follower(Enum):
 # ---------------------------------------------------------------------------------------------------------
 
 class index_lead(Enum):
-    isDeleted_masterDataId = MongoIndex(
-        "index_isDeleted_masterDataId",
+    masterDataId_id = MongoIndex(
+        "index_masterDataId_id_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
-            MongoIndexKey("masterDataId", pymongo.ASCENDING)
-        ]
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_companyId = MongoIndex(
-        "index_isDeleted_companyId",
+    companyId = MongoIndex(
+        "index_companyId_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_name = MongoIndex(
-        "index_isDeleted_name",
+    name = MongoIndex(
+        "index_name_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("name", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_companyId = MongoIndex(
-        "index_isDeleted_masterDataId_companyId",
+    masterDataId_companyId = MongoIndex(
+        "index_masterDataId_companyId_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_name = MongoIndex(
-        "index_isDeleted_masterDataId_name",
+    masterDataId_name_id = MongoIndex(
+        "index_masterDataId_name_id_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
-            MongoIndexKey("name", pymongo.ASCENDING)
-        ]
+            MongoIndexKey("name", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_companyId_name = MongoIndex(
-        "index_isDeleted_masterDataId_companyId_name",
+    masterDataId_companyId_name = MongoIndex(
+        "index_masterDataId_companyId_name_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING),
             MongoIndexKey("name", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_name_type_partnerId_status_tags = MongoIndex(
-        "index_isDeleted_masterDataId_name_type_partnerId_status_tags",
+    masterDataId_status = MongoIndex(
+        "index_masterDataId_status_notDeleted",
+        [
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("status", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
+    )
+    masterDataId_name_type_partnerId_status_tags = MongoIndex(
+        "index_masterDataId_name_type_partnerId_status_tags_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
             MongoIndexKey("name", pymongo.ASCENDING),
             MongoIndexKey("type", pymongo.ASCENDING),
             MongoIndexKey("partnerId", pymongo.ASCENDING),
             MongoIndexKey("status", pymongo.ASCENDING),
             MongoIndexKey("tags", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
+    )
+    # also keep live names unique per master data
+    masterDataId_nameNormalized = MongoIndex(
+        "index_masterDataId_nameNormalized_notDeleted",
+        [
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple,
+        partialFilterExpression=partial_not_deleted,
+        unique=True
+    )
+    # $lookup of partner tree lead count, equality on partnerId alone
+    partnerId = MongoIndex(
+        "index_partnerId",
+        [
+            MongoIndexKey("partnerId", pymongo.ASCENDING)
         ]
     )
 
@@ -400,73 +543,106 @@ class index_lead_tag(Enum):
             MongoIndexKey("name", pymongo.ASCENDING)
         ]
     )
+    # also keep live names unique per master data
+    masterDataId_nameNormalized = MongoIndex(
+        "index_masterDataId_nameNormalized_notDeleted",
+        [
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple,
+        partialFilterExpression=partial_not_deleted,
+        unique=True
+    )
 
 # ---------------------------------------------------------------------------------------------------------
 class index_partner(Enum):
-    isDeleted_masterDataId = MongoIndex(
-        "index_isDeleted_masterDataId",
+    masterDataId_id = MongoIndex(
+        "index_masterDataId_id_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
-            MongoIndexKey("masterDataId", pymongo.ASCENDING)
-        ]
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_companyId = MongoIndex(
-        "index_isDeleted_companyId",
+    companyId = MongoIndex(
+        "index_companyId_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_name = MongoIndex(
-        "index_isDeleted_masterDataId_name",
+    masterDataId_name_id = MongoIndex(
+        "index_masterDataId_name_id_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
-            MongoIndexKey("name", pymongo.ASCENDING)
-        ]
+            MongoIndexKey("name", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_companyId = MongoIndex(
-        "index_isDeleted_masterDataId_companyId",
+    masterDataId_companyId_id = MongoIndex(
+        "index_masterDataId_companyId_id_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
-            MongoIndexKey("companyId", pymongo.ASCENDING)
-        ]
+            MongoIndexKey("companyId", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_companyId_type = MongoIndex(
-        "index_isDeleted_masterDataId_companyId_type",
+    masterDataId_companyId_type = MongoIndex(
+        "index_masterDataId_companyId_type_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING),
             MongoIndexKey("type", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_companyId_name = MongoIndex(
-        "index_isDeleted_masterDataId_companyId_name",
+    masterDataId_companyId_name_id = MongoIndex(
+        "index_masterDataId_companyId_name_id_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
             MongoIndexKey("companyId", pymongo.ASCENDING),
-            MongoIndexKey("name", pymongo.ASCENDING)
-        ]
+            MongoIndexKey("name", pymongo.ASCENDING),
+            MongoIndexKey("_id", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_masterDataId_name_type_parentId = MongoIndex(
-        "index_isDeleted_masterDataId_name_type_parentId",
+    masterDataId_name_type_parentId = MongoIndex(
+        "index_masterDataId_name_type_parentId_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("masterDataId", pymongo.ASCENDING),
             MongoIndexKey("name", pymongo.ASCENDING),
             MongoIndexKey("type", pymongo.ASCENDING),
             MongoIndexKey("parentId", pymongo.ASCENDING)
-        ]
+        ],
+        partialFilterExpression=partial_not_deleted
     )
-    isDeleted_name_type_parentId = MongoIndex(
-        "index_isDeleted_name_type_parentId",
+    name_type_parentId = MongoIndex(
+        "index_name_type_parentId_notDeleted",
         [
-            MongoIndexKey("isDeleted", pymongo.ASCENDING),
             MongoIndexKey("name", pymongo.ASCENDING),
             MongoIndexKey("type", pymongo.ASCENDING),
             MongoIndexKey("parentId", pymongo.ASCENDING)
+        ],
+        partialFilterExpression=partial_not_deleted
+    )
+    # also keep live names unique per master data
+    masterDataId_nameNormalized = MongoIndex(
+        "index_masterDataId_nameNormalized_notDeleted",
+        [
+            MongoIndexKey("masterDataId", pymongo.ASCENDING),
+            MongoIndexKey("nameNormalized", pymongo.ASCENDING)
+        ],
+        collation=collation_simple,
+        partialFilterExpression=partial_not_deleted,
+        unique=True
+    )
+    # connectToField of partner tree $graphLookup, not partial so every lookup step can use it
+    parentId = MongoIndex(
+        "index_parentId",
+        [
+            MongoIndexKey("parentId", pymongo.ASCENDING)
         ]
     )
\ No newline at end of file
@@ -9,9 +9,19 @@ from rabbitmq.MsRabbitMqConsts import RabbitMqRoutingKeyUserService
 def CreateRabbitMqConnectionString() -> str:
     return f"amqp://{settings.rabbitmq.username}:{settings.rabbitmq.password}@{settings.rabbitmq.host}:{settings.rabbitmq.port}/{quote_plus(settings.rabbitmq.virtual_host)}"
 
+def RabbitMqPrefetchCount() -> int:
+    """
+    `prefetch_count` only apply with batch or worker lanes.
+    Otherwise a task per message run concurrently and replication of one `_id` lose its order, keep one message in flight
+    """
+
+    if (settings.rabbitmq.batchSize > 1) or (settings.rabbitmq.workerLanes > 0):
+        return settings.rabbitmq.prefetch_count
+    return 1
+
 rabbitMqClient = MsRabbitMqClient(
     amqp_url=CreateRabbitMqConnectionString(),
-    prefetch_count=1,
+    prefetch_count=RabbitMqPrefetchCount(),
     reconnect=True,
     reconnectDelaySec=settings.rabbitmq.reconnectDelaySec,
     ioloop=asyncio.get_running_loop(),
@@ -23,6 +33,7 @@ rabbitMqClient = MsRabbitMqClient(
 
 queueDefault  = rabbitMqClient.AddQueue(
     name=settings.rabbitmq.queueName,
+    workerLanes=settings.rabbitmq.workerLanes,
     queueDurable=True if settings.project.environment != MsEnvironment.development else False,
     queueAutoDelete=True if settings.project.environment == MsEnvironment.development else False,
     consumerAllowConsuming=True
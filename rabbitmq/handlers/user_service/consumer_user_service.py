@@ -1,11 +1,14 @@
 import json
+from typing import TypeVar
 from pika.spec import Basic, BasicProperties
+from auth.authUser import AuthUser
 from config.config import settings
-from classes.rabbitmq.classRabbitMqClient import MsRabbitMqHandlerResult, MsRabbitMqQueue
+from classes.rabbitmq.classRabbitMqClient import MsRabbitMqHandlerResult, MsRabbitMqMessage, MsRabbitMqQueue
 from models.account.modelAccountConsume import AccountConsume
 from models.account_external.modelAccountExternalConsume import AccountExternalConsume
 from models.company.modelCompanyConsume import CompanyConsume
 from models.company_category.modelCompanyCategoryConsume import CompanyCategoryConsume
+from models.shared.modelDataType import BaseModel
 from models.shared.modelEnvironment import MsEnvironment
 from rabbitmq.MsRabbitMq import rabbitMqClient, queueDefault
 from rabbitmq.MsRabbitMqConsts import RabbitMqRoutingKeyUserService
@@ -42,10 +45,17 @@ async def consumer_user_service_company_category(
         msLogger.exception(f"Consumer::{queue.name}::{routingKey}::CompanyCategoryConsume\n", modelError, False)
         return MsRabbitMqHandlerResult.ack
     
-    await CompanyCategoryRepository.CreateOrUpdate(
-        data.id,
-        data
-    )
+    if settings.rabbitmq.replicationVersioned:
+        result = await CompanyCategoryRepository.Replicate([data])
+        if len(result.appliedIds) == 0:
+            # stale redelivery or same version, cached user still valid
+            return MsRabbitMqHandlerResult.ack
+    else:
+        await CompanyCategoryRepository.CreateOrUpdate(
+            data.id,
+            data
+        )
+    AuthUser.InvalidateCompanyCategory(data.id)
     return MsRabbitMqHandlerResult.ack
 
 @rabbitMqClient.RegisterHandler(queueDefault, RabbitMqRoutingKeyUserService.company)
@@ -74,10 +84,17 @@ async def consumer_user_service_company(
         msLogger.exception(f"Consumer::{queue.name}::{routingKey}::CompanyConsume\n", modelError, False)
         return MsRabbitMqHandlerResult.ack
     
-    await CompanyRepository.CreateOrUpdate(
-        data.id,
-        data
-    )
+    if settings.rabbitmq.replicationVersioned:
+        result = await CompanyRepository.Replicate([data])
+        if len(result.appliedIds) == 0:
+            # stale redelivery or same version, cached user still valid
+            return MsRabbitMqHandlerResult.ack
+    else:
+        await CompanyRepository.CreateOrUpdate(
+            data.id,
+            data
+        )
+    AuthUser.InvalidateCompany(data.id)
     return MsRabbitMqHandlerResult.ack
 
 @rabbitMqClient.RegisterHandler(queueDefault, RabbitMqRoutingKeyUserService.account)
@@ -106,10 +123,17 @@ async def consumer_user_service_account(
         msLogger.exception(f"Consumer::{queue.name}::{routingKey}::AccountConsume\n", modelError, False)
         return MsRabbitMqHandlerResult.ack
     
-    await AccountRepository.CreateOrUpdate(
-        data.id,
-        data
-    )
+    if settings.rabbitmq.replicationVersioned:
+        result = await AccountRepository.Replicate([data])
+        if len(result.appliedIds) == 0:
+            # stale redelivery or same version, cached user still valid
+            return MsRabbitMqHandlerResult.ack
+    else:
+        await AccountRepository.CreateOrUpdate(
+            data.id,
+            data
+        )
+    AuthUser.InvalidateAccount(data.id)
     return MsRabbitMqHandlerResult.ack
 
 @rabbitMqClient.RegisterHandler(queueDefault, RabbitMqRoutingKeyUserService.account_external)
@@ -138,9 +162,108 @@ async def consumer_user_service_account_external(
         msLogger.exception(f"Consumer::{queue.name}::{routingKey}::AccountExternalConsume\n", modelError, False)
         return MsRabbitMqHandlerResult.ack
     
-    await AccountExternalRepository.CreateOrUpdate(
-        data.id,
-        data
-    )
+    if settings.rabbitmq.replicationVersioned:
+        result = await AccountExternalRepository.Replicate([data])
+        if len(result.appliedIds) == 0:
+            # stale redelivery or same version, cached user still valid
+            return MsRabbitMqHandlerResult.ack
+    else:
+        await AccountExternalRepository.CreateOrUpdate(
+            data.id,
+            data
+        )
+    AuthUser.InvalidateAccount(data.id)
+    return MsRabbitMqHandlerResult.ack
+
+
+# -------------------------------------------------------
+# Batch mode (settings.rabbitmq.batchSize > 1), one bulk_write per batch
+
+TConsume = TypeVar("TConsume", bound=BaseModel)
+
+def ParseBatch(queue: MsRabbitMqQueue, messages: list[MsRabbitMqMessage], model: type[TConsume]) -> list[TConsume]:
+    """
+    Invalid message is logged and skipped, it is acked with the batch like the single message handler
+    """
+
+    ret: list[TConsume] = []
+    for message in messages:
+        routingKey = str(message.method.routing_key)
+        try:
+            dataJson = json.loads(message.body)
+        except Exception as jsonError:
+            msLogger.exception(f"Consumer::{queue.name}::{routingKey}::Invalid_Json\n", jsonError, False)
+            continue
+        try:
+            ret.append(model(**dataJson))
+        except Exception as modelError:
+            msLogger.exception(f"Consumer::{queue.name}::{routingKey}::{model.__name__}\n", modelError, False)
+    if settings.project.environment == MsEnvironment.development:
+        msLogger.data(f"Consumer::{queue.name}::batch; messages: {len(messages)}; valid: {len(ret)}")
+    return ret
+
+async def consumer_user_service_company_category_batch(
+    queue: MsRabbitMqQueue,
+    messages: list[MsRabbitMqMessage]
+) -> MsRabbitMqHandlerResult:
+    datas = ParseBatch(queue, messages, CompanyCategoryConsume)
+    if settings.rabbitmq.replicationVersioned:
+        ids = (await CompanyCategoryRepository.Replicate(datas)).appliedIds
+    else:
+        await CompanyCategoryRepository.BulkCreateOrUpdate(datas)
+        ids = [data.id for data in datas]
+    AuthUser.InvalidateMany("companyCategoryId", ids)
+    return MsRabbitMqHandlerResult.ack
+
+async def consumer_user_service_company_batch(
+    queue: MsRabbitMqQueue,
+    messages: list[MsRabbitMqMessage]
+) -> MsRabbitMqHandlerResult:
+    datas = ParseBatch(queue, messages, CompanyConsume)
+    if settings.rabbitmq.replicationVersioned:
+        ids = (await CompanyRepository.Replicate(datas)).appliedIds
+    else:
+        await CompanyRepository.BulkCreateOrUpdate(datas)
+        ids = [data.id for data in datas]
+    AuthUser.InvalidateMany("companyId", ids)
+    return MsRabbitMqHandlerResult.ack
+
+async def consumer_user_service_account_batch(
+    queue: MsRabbitMqQueue,
+    messages: list[MsRabbitMqMessage]
+) -> MsRabbitMqHandlerResult:
+    datas = ParseBatch(queue, messages, AccountConsume)
+    if settings.rabbitmq.replicationVersioned:
+        ids = (await AccountRepository.Replicate(datas)).appliedIds
+    else:
+        await AccountRepository.BulkCreateOrUpdate(datas)
+        ids = [data.id for data in datas]
+    AuthUser.InvalidateMany("accountId", ids)
+    return MsRabbitMqHandlerResult.ack
+
+async def consumer_user_service_account_external_batch(
+    queue: MsRabbitMqQueue,
+    messages: list[MsRabbitMqMessage]
+) -> MsRabbitMqHandlerResult:
+    datas = ParseBatch(queue, messages, AccountExternalConsume)
+    if settings.rabbitmq.replicationVersioned:
+        ids = (await AccountExternalRepository.Replicate(datas)).appliedIds
+    else:
+        await AccountExternalRepository.BulkCreateOrUpdate(datas)
+        ids = [data.id for data in datas]
+    AuthUser.InvalidateMany("accountId", ids)
     return MsRabbitMqHandlerResult.ack
 
+if settings.rabbitmq.batchSize > 1:
+    for routingKey, batchHandler in [
+        (RabbitMqRoutingKeyUserService.company_category, consumer_user_service_company_category_batch),
+        (RabbitMqRoutingKeyUserService.company, consumer_user_service_company_batch),
+        (RabbitMqRoutingKeyUserService.account, consumer_user_service_account_batch),
+        (RabbitMqRoutingKeyUserService.account_external, consumer_user_service_account_external_batch)
+    ]:
+        rabbitMqClient.RegisterBatchHandler(
+            queueDefault,
+            routingKey,
+            batchSize=settings.rabbitmq.batchSize,
+            batchWaitMs=settings.rabbitmq.batchWaitMs
+        )(batchHandler)
@@ -4,6 +4,9 @@ from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.account.modelAccountCompany import AccountCompany
 from models.account.modelAccountConsume import AccountConsume
 from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBaseModel
+from pymongo import UpdateOne
+from pymongo.results import BulkWriteResult
+from utils.util_replication import ReplicationUpsert, ReplicationWriteResult
 from mongodb.mongoIndex import index_id, index_account
 from models.account.modelAccount import AccountRole, AccountView
 from mongodb.mongoCollection import TbAccount
@@ -30,7 +33,7 @@ class AccountRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -57,7 +60,7 @@ class AccountRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -83,7 +86,7 @@ class AccountRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def EmailExists(
@@ -107,7 +110,7 @@ class AccountRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def PhoneExists(
@@ -131,7 +134,7 @@ class AccountRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -220,7 +223,7 @@ class AccountRepository:
         if not ret:
             return None
         else:
-            return resultClass(**ret)
+            return resultClass.FromDb(ret)
     
     @staticmethod
     async def RoleSystemCount(
@@ -306,7 +309,7 @@ class AccountRepository:
             if (companyIds is not None) and (isinstance(companyIds, list)) and (len(companyIds) > 0):
                 company = companyIds[0]
                 if isinstance(company, dict):
-                    return resultClass(**company)
+                    return resultClass.FromDb(company)
         return None
     
     @staticmethod
@@ -357,4 +360,55 @@ class AccountRepository:
             return accountId
         else:
             return ObjectId(ret.upserted_id)
-    
\ No newline at end of file
+
+    @staticmethod
+    async def BulkCreateOrUpdate(
+        params: list[AccountConsume],
+        *,
+        coll: TMongoCollection = TbAccount,
+        session: TMongoClientSession | None = None
+    ) -> BulkWriteResult | None:
+        """
+        `CreateOrUpdate` of many documents in one unordered `bulk_write`.
+        - Keep only the last param per id, unordered write of the same id has no defined order
+        """
+
+        latest: dict[ObjectId, AccountConsume] = {}
+        for param in params:
+            latest[param.id] = param
+        if len(latest) == 0:
+            return None
+        return await coll.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": id
+                    },
+                    {
+                        "$set": param.model_dump(by_alias=False, exclude={"id"})
+                    },
+                    upsert=True,
+                    hint=index_id
+                )
+                for id, param in latest.items()
+            ],
+            ordered=False,
+            session=session
+        )
+
+    @staticmethod
+    async def Replicate(
+        params: list[AccountConsume],
+        *,
+        coll: TMongoCollection = TbAccount,
+        session: TMongoClientSession | None = None
+    ) -> ReplicationWriteResult:
+        """
+        Version aware `BulkCreateOrUpdate`, stale (older `updatedTime`) and unchanged documents are not written
+        """
+
+        return await ReplicationUpsert(
+            coll,
+            [(param.id, param.model_dump(by_alias=False, exclude={"id"})) for param in params],
+            session=session
+        )
@@ -4,6 +4,9 @@ from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.account_external.modelAccountExternalCompanyCategory import AccountExternalCompanyCategory
 from models.account_external.modelAccountExternalConsume import AccountExternalConsume
 from models.shared.modelDataType import ObjectId, TGenericBaseModel
+from pymongo import UpdateOne
+from pymongo.results import BulkWriteResult
+from utils.util_replication import ReplicationUpsert, ReplicationWriteResult
 from mongodb.mongoIndex import index_id
 from models.account_external.modelAccountExternal import AccountExternalView
 from mongodb.mongoCollection import TbAccountExternal
@@ -27,7 +30,7 @@ class AccountExternalRepository:
             query, resultClass.Projection(), session=session, hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
 
@@ -54,7 +57,7 @@ class AccountExternalRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -131,7 +134,7 @@ class AccountExternalRepository:
             ):
                 companyCategory = companyCategoryIds[0]
                 if isinstance(companyCategory, dict):
-                    return resultClass(**companyCategory)
+                    return resultClass.FromDb(companyCategory)
         return None
 
     @staticmethod
@@ -193,4 +196,55 @@ class AccountExternalRepository:
             return accountId
         else:
             return ObjectId(ret.upserted_id)
-    
\ No newline at end of file
+
+    @staticmethod
+    async def BulkCreateOrUpdate(
+        params: list[AccountExternalConsume],
+        *,
+        coll: TMongoCollection = TbAccountExternal,
+        session: TMongoClientSession | None = None
+    ) -> BulkWriteResult | None:
+        """
+        `CreateOrUpdate` of many documents in one unordered `bulk_write`.
+        - Keep only the last param per id, unordered write of the same id has no defined order
+        """
+
+        latest: dict[ObjectId, AccountExternalConsume] = {}
+        for param in params:
+            latest[param.id] = param
+        if len(latest) == 0:
+            return None
+        return await coll.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": id
+                    },
+                    {
+                        "$set": param.model_dump(by_alias=False, exclude={"id"})
+                    },
+                    upsert=True,
+                    hint=index_id
+                )
+                for id, param in latest.items()
+            ],
+            ordered=False,
+            session=session
+        )
+
+    @staticmethod
+    async def Replicate(
+        params: list[AccountExternalConsume],
+        *,
+        coll: TMongoCollection = TbAccountExternal,
+        session: TMongoClientSession | None = None
+    ) -> ReplicationWriteResult:
+        """
+        Version aware `BulkCreateOrUpdate`, stale (older `updatedTime`) and unchanged documents are not written
+        """
+
+        return await ReplicationUpsert(
+            coll,
+            [(param.id, param.model_dump(by_alias=False, exclude={"id"})) for param in params],
+            session=session
+        )
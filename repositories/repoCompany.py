@@ -8,6 +8,9 @@ from models.shared.modelDataType import ObjectId, TGenericBaseModel
 from models.company.modelCompany import CompanyView
 from models.company.modelCompanyConfig import CompanyConfigView
 from mongodb.mongoCollection import TbCompany
+from pymongo import UpdateOne
+from pymongo.results import BulkWriteResult
+from utils.util_replication import ReplicationUpsert, ReplicationWriteResult
 from mongodb.mongoIndex import index_id, index_company
 
 
@@ -34,7 +37,7 @@ class CompanyRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def GetByInitial(
@@ -56,7 +59,7 @@ class CompanyRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
 
     @staticmethod
     async def GetConfig(
@@ -79,7 +82,7 @@ class CompanyRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def InitialExists(
@@ -184,7 +187,7 @@ class CompanyRepository:
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
     
     @staticmethod
     async def GetByIdsAsync(
@@ -247,6 +250,55 @@ class CompanyRepository:
             return ObjectId(ret.upserted_id)
         else:
             return None
-    
 
-    
\ No newline at end of file
+    @staticmethod
+    async def BulkCreateOrUpdate(
+        params: list[CompanyConsume],
+        *,
+        coll: TMongoCollection = TbCompany,
+        session: TMongoClientSession | None = None
+    ) -> BulkWriteResult | None:
+        """
+        `CreateOrUpdate` of many documents in one unordered `bulk_write`.
+        - Keep only the last param per id, unordered write of the same id has no defined order
+        """
+
+        latest: dict[ObjectId, CompanyConsume] = {}
+        for param in params:
+            latest[param.id] = param
+        if len(latest) == 0:
+            return None
+        return await coll.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": id
+                    },
+                    {
+                        "$set": param.model_dump(by_alias=False, exclude={"id"})
+                    },
+                    upsert=True,
+                    hint=index_id
+                )
+                for id, param in latest.items()
+            ],
+            ordered=False,
+            session=session
+        )
+
+    @staticmethod
+    async def Replicate(
+        params: list[CompanyConsume],
+        *,
+        coll: TMongoCollection = TbCompany,
+        session: TMongoClientSession | None = None
+    ) -> ReplicationWriteResult:
+        """
+        Version aware `BulkCreateOrUpdate`, stale (older `updatedTime`) and unchanged documents are not written
+        """
+
+        return await ReplicationUpsert(
+            coll,
+            [(param.id, param.model_dump(by_alias=False, exclude={"id"})) for param in params],
+            session=session
+        )
@@ -6,6 +6,9 @@ from models.company_category.modelCompanyCategory import CompanyCategoryId
 from models.company_category.modelCompanyCategoryConsume import CompanyCategoryConsume
 from models.shared.modelDataType import ObjectId, TBaseModelObjectId, TGenericBaseModel
 from mongodb.mongoCollection import TbCompanyCategory
+from pymongo import UpdateOne
+from pymongo.results import BulkWriteResult
+from utils.util_replication import ReplicationUpsert, ReplicationWriteResult
 from mongodb.mongoIndex import index_id, index_company_category
 
 
@@ -32,7 +35,7 @@ class CompanyCategoryRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def GetByName(
@@ -54,7 +57,7 @@ class CompanyCategoryRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -116,7 +119,7 @@ class CompanyCategoryRepository:
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
     
     @staticmethod
     async def GetByIdsAsync(
@@ -187,4 +190,56 @@ class CompanyCategoryRepository:
         elif ret.upserted_id is not None:
             return ObjectId(ret.upserted_id)
         else:
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    async def BulkCreateOrUpdate(
+        params: list[CompanyCategoryConsume],
+        *,
+        coll: TMongoCollection = TbCompanyCategory,
+        session: TMongoClientSession | None = None
+    ) -> BulkWriteResult | None:
+        """
+        `CreateOrUpdate` of many documents in one unordered `bulk_write`.
+        - Keep only the last param per id, unordered write of the same id has no defined order
+        """
+
+        latest: dict[ObjectId, CompanyCategoryConsume] = {}
+        for param in params:
+            latest[param.id] = param
+        if len(latest) == 0:
+            return None
+        return await coll.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": id
+                    },
+                    {
+                        "$set": param.model_dump(by_alias=False, exclude={"id"})
+                    },
+                    upsert=True,
+                    hint=index_id
+                )
+                for id, param in latest.items()
+            ],
+            ordered=False,
+            session=session
+        )
+
+    @staticmethod
+    async def Replicate(
+        params: list[CompanyCategoryConsume],
+        *,
+        coll: TMongoCollection = TbCompanyCategory,
+        session: TMongoClientSession | None = None
+    ) -> ReplicationWriteResult:
+        """
+        Version aware `BulkCreateOrUpdate`, stale (older `updatedTime`) and unchanged documents are not written
+        """
+
+        return await ReplicationUpsert(
+            coll,
+            [(param.id, param.model_dump(by_alias=False, exclude={"id"})) for param in params],
+            session=session
+        )
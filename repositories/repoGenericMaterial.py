@@ -1,12 +1,14 @@
 from datetime import datetime
-import re
 from typing import Any
 from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.generic_material.modelGenericMaterial import GenericMaterialCreateCommandRequest, GenericMaterialView
 from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBaseModel
+from models.shared.modelSearch import NameSearchMode
 from mongodb.mongoCollection import TbGenericMaterial
 from mongodb.mongoIndex import index_id, index_generic_material
 from pymongo.results import InsertOneResult
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameSearchQuery, SetNameNormalized
 
 class GenericMaterialRepository:
 
@@ -29,7 +31,7 @@ class GenericMaterialRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -38,6 +40,7 @@ class GenericMaterialRepository:
         name: str | None ,
         categoryId: ObjectId | None,
         companyId: ObjectId,
+        nameSearch: NameSearchMode = NameSearchMode.contains,
         *,
         coll: TMongoCollection = TbGenericMaterial,
         session: TMongoClientSession | None = None,
@@ -47,9 +50,8 @@ class GenericMaterialRepository:
                 "isDeleted": False,
                 "companyId": companyId
             }
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "categoryId": categoryId if categoryId is not None else None,
         })
 
@@ -58,11 +60,11 @@ class GenericMaterialRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_generic_material.isDeleted_companyId_name_categoryId.value.indexName
+            hint=SelectIndexHint(index_generic_material, query, logName="generic_material")
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
 
     @staticmethod
     async def GetByIdAndCompanyId(
@@ -87,7 +89,7 @@ class GenericMaterialRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -111,12 +113,12 @@ class GenericMaterialRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_generic_material.isDeleted_companyId_name.value.indexName
+            hint=index_generic_material.isDeleted_companyId_name_id.value.indexName
         )
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -131,7 +133,7 @@ class GenericMaterialRepository:
                 "_id": id
             },
             {
-                "$set": param
+                "$set": SetNameNormalized(param)
             },
             session=session,
             hint=index_id
@@ -168,7 +170,7 @@ class GenericMaterialRepository:
         coll: TMongoCollection = TbGenericMaterial,
         session: TMongoClientSession | None = None
     ):
-        d = param.model_dump(by_alias=False, exclude={"id"})
+        d = SetNameNormalized(param.model_dump(by_alias=False, exclude={"id"}))
         ret = await coll.update_one(
             {
                 "_id": id
@@ -193,7 +195,7 @@ class GenericMaterialRepository:
         session: TMongoClientSession | None = None
     ):
         ret: InsertOneResult = await coll.insert_one(
-            request.model_dump(),
+            SetNameNormalized(request.model_dump()),
             session=session
         )
         if (ret.inserted_id is None):
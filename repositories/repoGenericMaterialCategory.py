@@ -29,7 +29,7 @@ class GenericMaterialCategoryRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -65,7 +65,7 @@ class GenericMaterialCategoryRepository:
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
 
     @staticmethod
     async def GetByIdAndCompanyId(
@@ -90,7 +90,7 @@ class GenericMaterialCategoryRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -119,7 +119,7 @@ class GenericMaterialCategoryRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
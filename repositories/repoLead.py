@@ -1,14 +1,16 @@
 from datetime import datetime
-import re
 from typing import Any
 from models.lead.enumLead import LeadStatus, LeadType
 from models.lead.modelLead import LeadCreateCommandRequest, LeadView
 from models.shared.modelDataType import ObjectId
+from models.shared.modelSearch import NameSearchMode
 from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBaseModel
 from mongodb.mongoCollection import TbLead
 from mongodb.mongoIndex import index_id, index_lead
 from pymongo.results import InsertOneResult
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameSearchQuery, SetNameNormalized
 
 class LeadRepository:
 
@@ -31,7 +33,7 @@ class LeadRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -56,10 +58,10 @@ class LeadRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_lead.isDeleted_companyId.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -83,10 +85,10 @@ class LeadRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_lead.isDeleted_masterDataId.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -112,10 +114,10 @@ class LeadRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_lead.isDeleted_masterDataId_companyId.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -127,6 +129,7 @@ class LeadRepository:
         partnerId: ObjectId | None,
         status: LeadStatus | None,
         tags: list[str] | None,
+        nameSearch: NameSearchMode = NameSearchMode.contains,
         *,
         coll: TMongoCollection = TbLead,
         session: TMongoClientSession | None = None,
@@ -136,9 +139,8 @@ class LeadRepository:
             "isDeleted": False,
             "masterDataId": masterDataId
         }
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "type": type if type is not None else None,
             "partnerId": partnerId if partnerId is not None else None,
             "status": status if status is not None else None,
@@ -153,11 +155,11 @@ class LeadRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_lead.isDeleted_masterDataId_name_type_partnerId_status_tags.value.indexName
+            hint=SelectIndexHint(index_lead, query, logName="lead")
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None)  # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
         
     # @staticmethod
     # async def GetByIdAndCompanyIdAndMasterDataIdAndType(
@@ -186,7 +188,7 @@ class LeadRepository:
     #         hint=index_lead.isDeleted_masterDataId_companyId_type.value.indexName
     #     )
     #     if dataRaw is not None:
-    #         return resultClass(**dataRaw)
+    #         return resultClass.FromDb(dataRaw)
     #     else:
     #         return None
 
@@ -209,12 +211,12 @@ class LeadRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_lead.isDeleted_masterDataId_name.value.indexName
+            hint=index_lead.masterDataId_name_id.value.indexName
         )
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -229,7 +231,7 @@ class LeadRepository:
                 "_id": id
             },
             {
-                "$set": param
+                "$set": SetNameNormalized(param)
             },
             session=session,
             hint=index_id
@@ -263,7 +265,7 @@ class LeadRepository:
         session: TMongoClientSession | None = None
     )  :
         ret: InsertOneResult = await coll.insert_one(
-            request.model_dump(),
+            SetNameNormalized(request.model_dump()),
             session=session
         )
         if (ret.inserted_id is None):
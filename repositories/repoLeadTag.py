@@ -6,6 +6,7 @@ from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBas
 from mongodb.mongoCollection import TbLeadTag
 from mongodb.mongoIndex import index_id, index_lead_tag
 from pymongo.results import InsertOneResult
+from utils.util_search import SetNameNormalized
 
 
 class LeadTagRepository:
@@ -29,7 +30,7 @@ class LeadTagRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -77,7 +78,7 @@ class LeadTagRepository:
             hint=index_lead_tag.isDeleted_companyId.value.indexName
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -104,7 +105,7 @@ class LeadTagRepository:
             hint=index_lead_tag.isDeleted_masterDataId.value.indexName
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -133,7 +134,7 @@ class LeadTagRepository:
             hint=index_lead_tag.isDeleted_masterDataId_companyId.value.indexName
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -162,7 +163,7 @@ class LeadTagRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -177,7 +178,7 @@ class LeadTagRepository:
                 "_id": id
             },
             {
-                "$set": param
+                "$set": SetNameNormalized(param)
             },
             session=session,
             hint=index_id
@@ -211,7 +212,7 @@ class LeadTagRepository:
         coll: TMongoCollection = TbLeadTag,
         session: TMongoClientSession | None = None
     ) -> ObjectId :
-        d = param.model_dump(by_alias=False, exclude={"id"})
+        d = SetNameNormalized(param.model_dump(by_alias=False, exclude={"id"}))
         ret = await coll.update_one(
             {
                 "_id": id
@@ -236,7 +237,7 @@ class LeadTagRepository:
         session: TMongoClientSession | None = None
     ):
         ret: InsertOneResult = await coll.insert_one(
-            request.model_dump(),
+            SetNameNormalized(request.model_dump()),
             session=session
         )
         if (ret.inserted_id is None):
@@ -1,12 +1,14 @@
 from datetime import datetime
-import re
 from typing import Any
 from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.master_data.modelMasterData import MasterDataCreateParam, MasterDataView
 from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBaseModel
+from models.shared.modelSearch import NameSearchMode
 from mongodb.mongoCollection import TbMasterData
 from mongodb.mongoIndex import index_id, index_master_data
 from pymongo.results import InsertOneResult
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameSearchQuery, SetNameNormalized
 
 
 class MasterDataRepository:
@@ -30,13 +32,14 @@ class MasterDataRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
     @staticmethod
     async def Combo(
         name: str | None ,
+        nameSearch: NameSearchMode = NameSearchMode.contains,
         *,
         coll: TMongoCollection = TbMasterData,
         session: TMongoClientSession | None = None,
@@ -45,26 +48,18 @@ class MasterDataRepository:
         query:dict[str, Any]= {
                 "isDeleted": False
             }
-        if name is not None:
-            name = name.strip()
-            if len(name) > 0:
-                namePattern = re.compile(re.escape(name), re.IGNORECASE)
-                query.update(
-                    {
-                        "name": { "$regex": namePattern}
-                    }
-                )
+        query.update(NameSearchQuery(name, nameSearch))
 
         print(query)
         cursor = coll.find(
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_master_data.isDeleted_name.value.indexName
+            hint=SelectIndexHint(index_master_data, query, logName="master_data")
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
 
     @staticmethod
     async def GetByIdAndCompanyId(
@@ -89,7 +84,7 @@ class MasterDataRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -116,7 +111,7 @@ class MasterDataRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -142,7 +137,7 @@ class MasterDataRepository:
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -157,7 +152,7 @@ class MasterDataRepository:
                 "_id": id
             },
             {
-                "$set": param
+                "$set": SetNameNormalized(param)
             },
             session=session,
             hint=index_id
@@ -194,7 +189,7 @@ class MasterDataRepository:
         coll: TMongoCollection = TbMasterData,
         session: TMongoClientSession | None = None
     ):
-        d = param.model_dump(by_alias=False, exclude={"id"})
+        d = SetNameNormalized(param.model_dump(by_alias=False, exclude={"id"}))
         ret = await coll.update_one(
             {
                 "_id": id
@@ -219,7 +214,7 @@ class MasterDataRepository:
         session: TMongoClientSession | None = None
     ):
         ret: InsertOneResult = await coll.insert_one(
-            request.model_dump(),
+            SetNameNormalized(request.model_dump()),
             session=session
         )
         if (ret.inserted_id is None):
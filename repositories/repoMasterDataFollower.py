@@ -30,7 +30,7 @@ class MasterDataFollowerRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -57,7 +57,7 @@ class MasterDataFollowerRepository:
             hint=index_master_data_follower.isDeleted_companyId.value.indexName
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -81,10 +81,10 @@ class MasterDataFollowerRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_master_data_follower.isDeleted_masterDataId_companyId.value.indexName
+            hint=index_master_data_follower.isDeleted_masterDataId_companyId_id.value.indexName
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -113,7 +113,7 @@ class MasterDataFollowerRepository:
             hint=index_master_data_follower.isDeleted_status.value.indexName
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -4,9 +4,12 @@ from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.partner.enumPartnerType import PartnerType
 from models.partner.modelPartner import PartnerCreateCommandRequest, PartnerView
 from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBaseModel
-from mongodb.mongoCollection import TbPartner
+from mongodb.mongoCollection import TbLead, TbPartner
 from mongodb.mongoIndex import index_id, index_partner
-from pymongo.results import InsertOneResult
+from pymongo import ReturnDocument, UpdateMany, UpdateOne
+from pymongo.results import BulkWriteResult, InsertOneResult
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import SetNameNormalized
 
 class PartnerRepository:
 
@@ -50,7 +53,7 @@ class PartnerRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -75,10 +78,10 @@ class PartnerRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_partner.isDeleted_companyId.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -102,10 +105,10 @@ class PartnerRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_partner.isDeleted_masterDataId.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -131,10 +134,10 @@ class PartnerRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_partner.isDeleted_masterDataId_companyId.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -162,13 +165,112 @@ class PartnerRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_partner.isDeleted_masterDataId_companyId_type.value.indexName
+            hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
 
+    @staticmethod
+    async def GetByIdsAndMasterDataId(
+        ids: list[ObjectId],
+        masterDataId: ObjectId,
+        *,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = PartnerView
+    ):
+        query: dict[str, Any] = {
+            "_id": {"$in": ids},
+            "masterDataId": masterDataId,
+            "isDeleted": False
+        }
+        cursor = coll.find(
+            query,
+            resultClass.Projection(),
+            session=session,
+            hint=index_id
+        )
+        itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
+        return [resultClass.FromDb(item) for item in itemsRaw]
+
+    @staticmethod
+    async def Tree(
+        masterDataId: ObjectId,
+        rootId: ObjectId | None = None,
+        *,
+        coll: TMongoCollection = TbPartner,
+        leadColl: TMongoCollection = TbLead,
+        session: TMongoClientSession | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Partner hierarchy in one aggregation.
+        - rootId: subtree of this partner, null for every tree of the master data (partner without parent)
+        - return: one document per root with `descendants` (`depth` 0 is direct child of the root)
+            and `leadCounts` ({_id: partnerId, count}) of the root and its descendants
+        - `$lookup` with `localField` and `pipeline` need MongoDB 5.0
+        """
+
+        notDeleted: dict[str, Any] = {
+            "masterDataId": masterDataId,
+            "isDeleted": False
+        }
+        query: dict[str, Any] = dict(notDeleted)
+        if rootId is not None:
+            query["_id"] = rootId
+        else:
+            query["parentId"] = None
+        nodeFields = ["_id", "name", "type", "parentId", "tags"]
+
+        pipeline: list[dict[str, Any]] = [
+            {"$match": query},
+            {
+                "$graphLookup": {
+                    "from": coll.name,
+                    "startWith": "$_id",
+                    "connectFromField": "_id",
+                    "connectToField": "parentId",
+                    "as": "descendants",
+                    "depthField": "depth",
+                    "restrictSearchWithMatch": notDeleted
+                }
+            },
+            {
+                "$project": {
+                    **{f: 1 for f in nodeFields},
+                    **{f"descendants.{f}": 1 for f in nodeFields + ["depth"]}
+                }
+            },
+            # ids of the whole subtree, matched against lead.partnerId
+            {"$addFields": {"subtreeIds": {"$concatArrays": [["$_id"], "$descendants._id"]}}},
+            {
+                "$lookup": {
+                    "from": leadColl.name,
+                    "localField": "subtreeIds",
+                    "foreignField": "partnerId",
+                    "pipeline": [
+                        {"$match": {"isDeleted": False}},
+                        {"$group": {"_id": "$partnerId", "count": {"$sum": 1}}}
+                    ],
+                    "as": "leadCounts"
+                }
+            },
+            {"$project": {"subtreeIds": 0}}
+        ]
+
+        options: dict[str, Any] = {}
+        hint = SelectIndexHint(index_partner, query, logName="partner_tree")
+        # aggregate send `hint` as is, null is rejected by the server
+        if hint is not None:
+            options["hint"] = hint
+        cursor = coll.aggregate(
+            pipeline,
+            session=session,
+            **options
+        )
+        return await cursor.to_list(None) # type: ignore
+
     @staticmethod
     async def NameExists(
         name: str,
@@ -188,12 +290,12 @@ class PartnerRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_partner.isDeleted_masterDataId_name.value.indexName
+            hint=index_partner.masterDataId_name_id.value.indexName
         )
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -208,13 +310,47 @@ class PartnerRepository:
                 "_id": id
             },
             {
-                "$set": param
+                "$set": SetNameNormalized(param)
             },
             session=session,
             hint=index_id
         )
         return (ret.matched_count == 1)
     
+    @staticmethod
+    async def UpdateAndGet(
+        id: ObjectId,
+        param: dict[str, Any],
+        *,
+        query: dict[str, Any] | None = None,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = PartnerView
+    ):
+        """
+        `Update` and read the document after update in one round trip.
+        - query: extra condition beside `_id` (ex: companyId, isDeleted)
+        - return: null when no document match
+        """
+
+        dataRaw = await coll.find_one_and_update(
+            {
+                **(query or {}),
+                "_id": id
+            },
+            {
+                "$set": SetNameNormalized(param)
+            },
+            projection=resultClass.Projection(),
+            return_document=ReturnDocument.AFTER,
+            session=session,
+            hint=index_id
+        )
+        if dataRaw is not None:
+            return resultClass.FromDb(dataRaw)
+        else:
+            return None
+
     @staticmethod
     async def UpdateByUser(
         id: ObjectId,
@@ -233,7 +369,135 @@ class PartnerRepository:
             coll=coll,
             session=session
         )
+
+    @staticmethod
+    async def UpdateByUserAndGet(
+        id: ObjectId,
+        param: dict[str, Any],
+        updatedBy: ObjectId,
+        updatedTime: datetime,
+        *,
+        query: dict[str, Any] | None = None,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = PartnerView
+    ):
+        param["updatedBy"] = updatedBy
+        param["updatedTime"] = updatedTime
+        return await PartnerRepository.UpdateAndGet(
+            id,
+            param,
+            query=query,
+            coll=coll,
+            session=session,
+            resultClass=resultClass
+        )
     
+    @staticmethod
+    async def _UpdateChildIds(
+        id: ObjectId,
+        operator: str,
+        childIds: Any,
+        param: dict[str, Any] | None,
+        coll: TMongoCollection,
+        session: TMongoClientSession | None
+    ):
+        update: dict[str, Any] = {operator: {"childIds": childIds}}
+        if param:
+            update["$set"] = param
+        ret = await coll.update_one(
+            {
+                "_id": id
+            },
+            update,
+            session=session,
+            hint=index_id
+        )
+        return (ret.matched_count == 1)
+
+    @staticmethod
+    async def AddChild(
+        id: ObjectId,
+        childId: ObjectId,
+        param: dict[str, Any] | None = None,
+        *,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None
+    ):
+        """
+        `$addToSet` childId to `childIds` of partner `id`, without reading the parent.
+        - param: extra field to `$set` (ex: updatedBy, updatedTime)
+        """
+
+        return await PartnerRepository._UpdateChildIds(id, "$addToSet", childId, param, coll, session)
+
+    @staticmethod
+    async def RemoveChild(
+        id: ObjectId,
+        childId: ObjectId,
+        param: dict[str, Any] | None = None,
+        *,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None
+    ):
+        """
+        `$pull` childId from `childIds` of partner `id`, without reading the parent.
+        - param: extra field to `$set` (ex: updatedBy, updatedTime)
+        """
+
+        return await PartnerRepository._UpdateChildIds(id, "$pull", childId, param, coll, session)
+
+    @staticmethod
+    async def BulkRelink(
+        relinks: list[tuple[ObjectId, ObjectId | None, ObjectId | None]],
+        param: dict[str, Any] | None = None,
+        *,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None
+    ) -> BulkWriteResult | None:
+        """
+        Move partners to other parent in one `bulk_write`.
+        - relinks: (partner id, old parent id, new parent id)
+        - Grouped per parent: one `$pull`/`$addToSet $each` per parent and one `parentId` update per new parent
+        - param: extra field to `$set` on every updated document (ex: updatedBy, updatedTime)
+        """
+
+        param = param or {}
+        byOldParent: dict[ObjectId, list[ObjectId]] = {}
+        byNewParent: dict[ObjectId | None, list[ObjectId]] = {}
+        for id, oldParentId, newParentId in relinks:
+            if oldParentId == newParentId:
+                continue
+            if oldParentId is not None:
+                byOldParent.setdefault(oldParentId, []).append(id)
+            byNewParent.setdefault(newParentId, []).append(id)
+        if len(byNewParent) == 0:
+            return None
+
+        requests: list[UpdateOne | UpdateMany] = []
+        for newParentId, ids in byNewParent.items():
+            requests.append(UpdateMany(
+                {"_id": {"$in": ids}},
+                {"$set": {**param, "parentId": newParentId}},
+                hint=index_id
+            ))
+        for oldParentId, ids in byOldParent.items():
+            requests.append(UpdateOne(
+                {"_id": oldParentId},
+                {"$pull": {"childIds": {"$in": ids}}, **({"$set": param} if param else {})},
+                hint=index_id
+            ))
+        for newParentId, ids in byNewParent.items():
+            if newParentId is None:
+                continue
+            requests.append(UpdateOne(
+                {"_id": newParentId},
+                {"$addToSet": {"childIds": {"$each": ids}}, **({"$set": param} if param else {})},
+                hint=index_id
+            ))
+        # every request touch other document or other array element, order does not matter
+        return await coll.bulk_write(requests, ordered=False, session=session)
+
     @staticmethod
     async def Create(
         request: PartnerCreateCommandRequest,
@@ -242,10 +506,32 @@ class PartnerRepository:
         session: TMongoClientSession | None = None
     )  :
         ret: InsertOneResult = await coll.insert_one(
-            request.model_dump(),
+            SetNameNormalized(request.model_dump()),
             session=session
         )
         if (ret.inserted_id is None):
             return None
         else:
-            return ObjectId(ret.inserted_id)
\ No newline at end of file
+            return ObjectId(ret.inserted_id)
+
+    @staticmethod
+    async def CreateAndGet(
+        request: PartnerCreateCommandRequest,
+        *,
+        coll: TMongoCollection = TbPartner,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = PartnerView
+    ):
+        """
+        `Create` and build the result from the inserted document, without reading it back
+        """
+
+        document = SetNameNormalized(request.model_dump())
+        ret: InsertOneResult = await coll.insert_one(
+            document,
+            session=session
+        )
+        if (ret.inserted_id is None):
+            return None
+        document["_id"] = ret.inserted_id
+        return resultClass.FromDb(document)
@@ -1,12 +1,15 @@
 from datetime import datetime
-import re
 from typing import Any
 from classes.classMongoDb import TMongoClientSession, TMongoCollection
 from models.shared.modelDataType import BaseModelObjectId, ObjectId, TGenericBaseModel
+from models.shared.modelSearch import NameSearchMode
 from models.uom.modelUoM import UoMCreateCommandRequest, UoMView
 from mongodb.mongoCollection import TbUom
 from mongodb.mongoIndex import index_id, index_uom
+from pymongo import ReturnDocument
 from pymongo.results import InsertOneResult
+from utils.util_query_plan import SelectIndexHint
+from utils.util_search import NameSearchQuery, SetNameNormalized
 
 class UoMRepository:
 
@@ -29,7 +32,7 @@ class UoMRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
         
@@ -39,6 +42,7 @@ class UoMRepository:
         categoryId: ObjectId | None,
         isActive: bool | None,
         companyId: ObjectId,
+        nameSearch: NameSearchMode = NameSearchMode.contains,
         *,
         coll: TMongoCollection = TbUom,
         session: TMongoClientSession | None = None,
@@ -48,9 +52,8 @@ class UoMRepository:
                 "isDeleted": False,
                 "companyId": companyId
             }
+        query.update(NameSearchQuery(name, nameSearch))
         query.update({
-            "name": {"$regex": re.compile(re.escape(name.strip()), re.IGNORECASE)} 
-            if name and name.strip() else None,
             "categoryId": categoryId if categoryId is not None else None,
             "isActive": isActive if isActive is not None else None
         })
@@ -63,11 +66,11 @@ class UoMRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_uom.isDeleted_companyId_isActive_categoryId_name.value.indexName
+            hint=SelectIndexHint(index_uom, query, logName="uom")
         )
         itemsRaw: list[dict[str, Any]] = await cursor.to_list(None) # type: ignore
 
-        return [resultClass(**item) for item in itemsRaw]
+        return [resultClass.FromDb(item) for item in itemsRaw]
 
     @staticmethod
     async def GetByIdAndCompanyId(
@@ -92,7 +95,7 @@ class UoMRepository:
             hint=index_id
         )
         if dataRaw is not None:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
         else:
             return None
     
@@ -116,12 +119,12 @@ class UoMRepository:
             query,
             resultClass.Projection(),
             session=session,
-            hint=index_uom.isDeleted_companyId_name.value.indexName
+            hint=index_uom.isDeleted_companyId_name_id.value.indexName
         )
         if not dataRaw:
             return None
         else:
-            return resultClass(**dataRaw)
+            return resultClass.FromDb(dataRaw)
     
     @staticmethod
     async def Update(
@@ -136,13 +139,47 @@ class UoMRepository:
                 "_id": id
             },
             {
-                "$set": param
+                "$set": SetNameNormalized(param)
             },
             session=session,
             hint=index_id
         )
         return (ret.matched_count == 1)
     
+    @staticmethod
+    async def UpdateAndGet(
+        id: ObjectId,
+        param: dict[str, Any],
+        *,
+        query: dict[str, Any] | None = None,
+        coll: TMongoCollection = TbUom,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = UoMView
+    ):
+        """
+        `Update` and read the document after update in one round trip.
+        - query: extra condition beside `_id` (ex: companyId, isDeleted)
+        - return: null when no document match
+        """
+
+        dataRaw = await coll.find_one_and_update(
+            {
+                **(query or {}),
+                "_id": id
+            },
+            {
+                "$set": SetNameNormalized(param)
+            },
+            projection=resultClass.Projection(),
+            return_document=ReturnDocument.AFTER,
+            session=session,
+            hint=index_id
+        )
+        if dataRaw is not None:
+            return resultClass.FromDb(dataRaw)
+        else:
+            return None
+
     @staticmethod
     async def UpdateByUser(
         id: ObjectId,
@@ -162,6 +199,29 @@ class UoMRepository:
             coll=coll,
             session=session
         )
+
+    @staticmethod
+    async def UpdateByUserAndGet(
+        id: ObjectId,
+        param: dict[str, Any],
+        updatedBy: ObjectId,
+        updatedTime: datetime,
+        *,
+        query: dict[str, Any] | None = None,
+        coll: TMongoCollection = TbUom,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = UoMView
+    ):
+        param["updatedBy"] = updatedBy
+        param["updatedTime"] = updatedTime
+        return await UoMRepository.UpdateAndGet(
+            id,
+            param,
+            query=query,
+            coll=coll,
+            session=session,
+            resultClass=resultClass
+        )
     
 
 
@@ -173,7 +233,7 @@ class UoMRepository:
         coll: TMongoCollection = TbUom,
         session: TMongoClientSession | None = None
     ):
-        d = param.model_dump(by_alias=False, exclude={"id"})
+        d = SetNameNormalized(param.model_dump(by_alias=False, exclude={"id"}))
         ret = await coll.update_one(
             {
                 "_id": id
@@ -198,10 +258,32 @@ class UoMRepository:
         session: TMongoClientSession | None = None
     ):
         ret: InsertOneResult = await coll.insert_one(
-            request.model_dump(),
+            SetNameNormalized(request.model_dump()),
             session=session
         )
         if (ret.inserted_id is None):
             return None
         else:
             return ObjectId(ret.inserted_id)
+
+    @staticmethod
+    async def CreateAndGet(
+        request: UoMCreateCommandRequest,
+        *,
+        coll: TMongoCollection = TbUom,
+        session: TMongoClientSession | None = None,
+        resultClass: type[TGenericBaseModel] = UoMView
+    ):
+        """
+        `Create` and build the result from the inserted document, without reading it back
+        """
+
+        document = SetNameNormalized(request.model_dump())
+        ret: InsertOneResult = await coll.insert_one(
+            document,
+            session=session
+        )
+        if (ret.inserted_id is None):
+            return None
+        document["_id"] = ret.inserted_id
+        return resultClass.FromDb(document)
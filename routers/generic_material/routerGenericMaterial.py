@@ -9,6 +9,7 @@ from models.service_membership.modelCredentialLocation import CredentialLocation
 from models.service_membership.modelMembershipAuth import VerifyEndpointCompanyResult
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.shared.modelResponse import SuccessMessage
 from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPNotFoundException
 
@@ -36,6 +37,10 @@ async def ApiRouter_Generic_Material_Find(
         default=None,
         description="Generic Material Name"
     ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     categoryId: ObjectId = Query(
         None,
         description="Generic Material Category Id"
@@ -45,7 +50,8 @@ async def ApiRouter_Generic_Material_Find(
         name,
         categoryId,
         credential.companyId,
-        paging
+        paging,
+        nameSearch=nameSearch
     )
     return ResponsePagingGenericMaterialView(type=SuccessMessage.SUCCESS_READ, data=data)
 
@@ -66,13 +72,18 @@ async def ApiRouter_Generic_Material_Combo(
         None,
         description="Category Name"
     ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     categoryId: ObjectId = Query(
         None,
         description="Category Name"
     )
 ):
     data = await GenericMaterialController.Combo(
-        name,categoryId, credential.companyId
+        name,categoryId, credential.companyId,
+        nameSearch=nameSearch
     )
     return ResponseComboGenericMaterialView(type=SuccessMessage.SUCCESS_READ, data=data)
 
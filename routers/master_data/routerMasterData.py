@@ -9,6 +9,7 @@ from models.service_membership.modelCredentialLocation import CredentialLocation
 from models.service_membership.modelMembershipAuth import VerifyEndpointCompanyResult
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.shared.modelResponse import SuccessMessage
 from models.shared.modelSample import SampleModel
 from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPNotFoundException
@@ -36,12 +37,17 @@ async def ApiRouter_Master_Data_Find(
     name: str = Query(
         default=None,
         description="Master Data's Name"
+    ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
     )
 ) -> ResponsePagingMasterDataView:
     data= await MasterDataController.Find(
         name=name,
         companyId= credential.companyId,
-        paging=paging
+        paging=paging,
+        nameSearch=nameSearch
     )
     return ResponsePagingMasterDataView(type=SuccessMessage.SUCCESS_READ, data=data)
 
@@ -61,10 +67,15 @@ async def ApiRouter_Master_Data_Combo(
     name: str = Query(
         default=None,
         description="Master Data's Name"
+    ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
     )
 ):
     data= await MasterDataController.Combo(
-        name=name
+        name=name,
+        nameSearch=nameSearch
     )
     return ResponseComboMasterDataView(type=SuccessMessage.SUCCESS_READ, data=data)
 
@@ -8,6 +8,7 @@ from models.service_membership.modelCredentialLocation import CredentialLocation
 from models.service_membership.modelMembershipAuth import VerifyEndpointCompanyResult
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.shared.modelResponse import SuccessMessage
 from utils.util_http_exception import MsHTTPBadRequestException
 
@@ -38,6 +39,10 @@ async def ApiRouter_Follower_Partner_FindByConfig(
         None,
         description="Partner Name"
         ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     type: PartnerType = Query(
         None,
         description="Partner Type"
@@ -58,6 +63,7 @@ async def ApiRouter_Follower_Partner_FindByConfig(
             parentId,
             tags,
             credential.companyId,
-            paging
+            paging,
+            nameSearch=nameSearch
         )
         return ResponsePagingPartnerView(type=SuccessMessage.SUCCESS_READ, data=data)
\ No newline at end of file
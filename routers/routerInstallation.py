@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from helpers.helperInstall import InstallHelper
 
 ApiRouter_Install = APIRouter(
@@ -16,5 +16,13 @@ ApiRouter_Install = APIRouter(
     }
 )
 async def ApiRouter_Install_Install(
+    dryRun: bool = Query(
+        False,
+        description="Hanya tampilkan perubahan index tanpa menjalankannya"
+    ),
+    dropStale: bool = Query(
+        False,
+        description="Hapus index yang tidak dideklarasikan"
+    )
 ):
-    return await InstallHelper.StartInstall()
+    return await InstallHelper.StartInstall(dryRun, dropStale)
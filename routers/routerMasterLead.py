@@ -9,6 +9,7 @@ from models.service_membership.modelCredentialLocation import CredentialLocation
 from models.service_membership.modelMembershipAuth import VerifyEndpointCompanyResult
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.shared.modelResponse import SuccessMessage
 from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPNotFoundException
 from utils.validation.validationPhoneNumber import ValidatePhoneNumber
@@ -41,6 +42,10 @@ async def ApiRouter_Master_Lead_Find(
         None,
         description="Lead Name"
         ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     type: LeadType = Query(
         None,
         description="Lead Type"
@@ -66,7 +71,8 @@ async def ApiRouter_Master_Lead_Find(
         status,
         tags,
         credential.companyId,
-        paging
+        paging,
+        nameSearch=nameSearch
     )
     return ResponsePagingLeadView(type=SuccessMessage.SUCCESS_READ, data=data)
 
@@ -91,6 +97,10 @@ async def ApiRouter_Master_Lead_Combo(
         None,
         description="Lead Name"
         ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     type: LeadType = Query(
         None,
         description="Lead Type"
@@ -115,7 +125,8 @@ async def ApiRouter_Master_Lead_Combo(
         partnerId,
         status,
         tags,
-        credential.companyId
+        credential.companyId,
+        nameSearch=nameSearch
     )
     return ResponseComboLeadView(type=SuccessMessage.SUCCESS_READ, data=data)
 
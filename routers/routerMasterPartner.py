@@ -4,11 +4,12 @@ from fastapi import APIRouter, Depends, Path, Query
 from auth.authUser import AuthUserDep
 from controller.controllerMasterPartner import MasterPartnerController
 from models.partner.enumPartnerType import PartnerType
-from models.partner.modelPartner import PartnerCreateWebRequest, PartnerUpdateWebRequest, ResponsePagingPartnerView, ResponsePartnerView
+from models.partner.modelPartner import PartnerCreateWebRequest, PartnerRelinkWebRequest, PartnerUpdateWebRequest, ResponsePagingPartnerView, ResponsePartnerTree, ResponsePartnerView
 from models.service_membership.modelCredentialLocation import CredentialLocation
 from models.service_membership.modelMembershipAuth import VerifyEndpointCompanyResult
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.shared.modelResponse import SuccessMessage
 from utils.util_http_exception import MsHTTPBadRequestException
 
@@ -39,6 +40,10 @@ async def ApiRouter_Master_Partner_Find(
         None,
         description="Partner Name"
         ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     type: PartnerType = Query(
         None,
         description="Partner Type"
@@ -59,10 +64,40 @@ async def ApiRouter_Master_Partner_Find(
         parentId,
         tags,
         credential.companyId,
-        paging
+        paging,
+        nameSearch=nameSearch
     )
     return ResponsePagingPartnerView(type=SuccessMessage.SUCCESS_READ, data=data)
 
+@ApiRouter_Master_Partner.get(
+    path="/tree/{masterDataId}",
+    response_model=ResponsePartnerTree,
+    operation_id="tree_master_partner",
+    summary="Master Partner Hierarchy",
+    openapi_extra={
+        "x-credentialLocations": [
+            CredentialLocation.company
+        ]
+    }     
+)
+async def ApiRouter_Master_Partner_Tree(
+    credential: Annotated[VerifyEndpointCompanyResult, Depends(AuthUserDep.VerifyEndpointCompany)],
+    masterDataId: ObjectId = Path(
+        default=...,
+        description="Master Data Id"
+    ),
+    rootId: ObjectId = Query(
+        None,
+        description="Root Partner Id, only return the subtree of this partner"
+    )
+):
+    data = await MasterPartnerController.Tree(
+        credential.companyId,
+        masterDataId,
+        rootId
+    )
+    return ResponsePartnerTree(type=SuccessMessage.SUCCESS_READ, data=data)
+
 @ApiRouter_Master_Partner.get(
     path="/get/{masterDataId}/{id}",
     response_model=ResponsePartnerView,
@@ -165,6 +200,33 @@ async def ApiRouter_Master_Partner_Update_By_Id(
     )
     return ResponsePartnerView(type=SuccessMessage.SUCCESS_UPDATED, data=updatedData)
 
+@ApiRouter_Master_Partner.put(
+    path="/relink/{masterDataId}",
+    response_model=ResponsePartnerView,
+    operation_id="relink_master_partner",
+    summary="Move Master Partners To Other Parent",
+    openapi_extra={
+        "x-credentialLocations": [
+            CredentialLocation.company
+        ]
+    }   
+)
+async def ApiRouter_Master_Partner_Relink(
+    credential: Annotated[VerifyEndpointCompanyResult, Depends(AuthUserDep.VerifyEndpointCompany)],
+    request: PartnerRelinkWebRequest,
+    masterDataId: ObjectId = Path(
+        default=...,
+        description="Master Data Id"
+    )
+):
+    parent = await MasterPartnerController.Relink(
+        credential.companyId,
+        masterDataId,
+        request,
+        credential.accountId
+    )
+    return ResponsePartnerView(type=SuccessMessage.SUCCESS_UPDATED, data=parent)
+
 @ApiRouter_Master_Partner.delete(
     path="/delete/{masterDataId}/{id}",
     response_model=ResponsePartnerView,
@@ -8,6 +8,7 @@ from models.service_membership.modelCredentialLocation import CredentialLocation
 from models.service_membership.modelMembershipAuth import VerifyEndpointCompanyResult
 from models.shared.modelDataType import ObjectId
 from models.shared.modelPagination import MsPagination
+from models.shared.modelSearch import NameSearchMode
 from models.shared.modelResponse import SuccessMessage
 from models.uom.modelUoM import ResponseComboUoMView, ResponsePagingUoMView, ResponseUoMView, UoMCreateWebRequest
 from utils.util_http_exception import MsHTTPBadRequestException, MsHTTPNotFoundException
@@ -36,6 +37,10 @@ async def ApiRouter_UoM_Find(
         default=None,
         description="Unit Of Measure Name"
     ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     categoryId: ObjectId = Query( 
         None,
         description="Unit Of Measure Category Id"
@@ -50,7 +55,8 @@ async def ApiRouter_UoM_Find(
         categoryId,
         isActive,
         credential.companyId,
-        paging
+        paging,
+        nameSearch=nameSearch
     )
     return ResponsePagingUoMView(type=SuccessMessage.SUCCESS_READ, data=data)
 
@@ -71,6 +77,10 @@ async def ApiRouter_UoM_Combo(
         default=None,
         description="Unit Of Measure Name"
     ),
+    nameSearch: NameSearchMode = Query(
+        NameSearchMode.contains,
+        description="Mode pencarian nama. `contains`: nama mengandung kata kunci, `prefix`: nama diawali kata kunci (lebih cepat, memakai index)"
+    ),
     categoryId: ObjectId = Query( 
         None,
         description="Unit Of Measure Category Id"
@@ -81,7 +91,8 @@ async def ApiRouter_UoM_Combo(
     )
 ):
     data = await UoMController.Combo(
-        name, categoryId, isActive, credential.companyId
+        name, categoryId, isActive, credential.companyId,
+        nameSearch=nameSearch
     )
     return ResponseComboUoMView(type=SuccessMessage.SUCCESS_READ, data=data)
 
@@ -130,13 +141,12 @@ async def ApiRouter_UoM_Create(
             type="EMPTY_FIELD_NAME",
             message="Nama belum diisi"
         )
-    new= await UoMController.Create(
+    ret = await UoMController.Create(
         credential.companyId,
         request,
         datetime.now(timezone.utc).replace(tzinfo=None),
         credential.accountId
     )
-    ret = await UoMController.GetByIdAndCompanyId(new, credential.companyId)
 
     return ResponseUoMView(type=SuccessMessage.SUCCESS_CREATED, data=ret)
 
@@ -0,0 +1,106 @@
+import json
+from typing import Any
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from utils.security.ms_security import MsSecurity
+
+class MsJwtInvalid(Exception):
+    def __init__(self, reason: str) -> None:
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"Invalid jwt; {self.reason}"
+    def __str__(self) -> str:
+        return self.__repr__()
+
+class MsJwtDecoded:
+    def __init__(
+        self,
+        header: dict[str, Any],
+        payload: dict[str, Any],
+        signingInput: bytes,
+        signature: bytes
+    ) -> None:
+        self.header = header
+        self.payload = payload
+        self.signingInput = signingInput
+        self.signature = signature
+
+    @property
+    def alg(self) -> str | None:
+        alg = self.header.get("alg")
+        return alg if isinstance(alg, str) else None
+
+    @property
+    def kid(self) -> str | None:
+        kid = self.header.get("kid")
+        return kid if isinstance(kid, str) else None
+
+class MsJwt:
+
+    # https://www.rfc-editor.org/rfc/rfc7518#section-3.1
+    RsaAlgorithms: dict[str, hashes.HashAlgorithm] = {
+        "RS256": hashes.SHA256(),
+        "RS384": hashes.SHA384(),
+        "RS512": hashes.SHA512()
+    }
+
+    @staticmethod
+    def IsJwt(token: str) -> bool:
+        return token.count(".") == 2
+
+    @staticmethod
+    def Decode(token: str) -> MsJwtDecoded:
+        """
+        Decode jwt without verifying the signature
+        """
+
+        parts = token.split(".")
+        if len(parts) != 3:
+            raise MsJwtInvalid("not a compact jws")
+        try:
+            header = json.loads(MsSecurity.b64decode_url(parts[0]))
+            payload = json.loads(MsSecurity.b64decode_url(parts[1]))
+            signature = MsSecurity.b64decode_url(parts[2])
+        except Exception:
+            raise MsJwtInvalid("malformed segment")
+        if (not isinstance(header, dict)) or (not isinstance(payload, dict)):
+            raise MsJwtInvalid("header or payload is not an object")
+        return MsJwtDecoded(
+            header, # type: ignore
+            payload, # type: ignore
+            (parts[0] + "." + parts[1]).encode(encoding="ascii"),
+            signature
+        )
+
+    @staticmethod
+    def VerifyRsa(decoded: MsJwtDecoded, publicKey: rsa.RSAPublicKey) -> bool:
+        alg = decoded.alg
+        if alg is None:
+            return False
+        hashAlgorithm = MsJwt.RsaAlgorithms.get(alg)
+        if hashAlgorithm is None:
+            return False
+        try:
+            publicKey.verify(
+                decoded.signature,
+                decoded.signingInput,
+                padding.PKCS1v15(),
+                hashAlgorithm
+            )
+        except InvalidSignature:
+            return False
+        return True
+
+    @staticmethod
+    def RsaPublicKeyFromJwk(jwk: dict[str, Any]) -> rsa.RSAPublicKey:
+        # https://www.rfc-editor.org/rfc/rfc7518#section-6.3.1
+        if jwk.get("kty") != "RSA":
+            raise MsJwtInvalid("jwk is not an RSA key")
+        try:
+            n = int.from_bytes(MsSecurity.b64decode_url(jwk["n"]), "big")
+            e = int.from_bytes(MsSecurity.b64decode_url(jwk["e"]), "big")
+        except Exception:
+            raise MsJwtInvalid("malformed RSA jwk")
+        return rsa.RSAPublicNumbers(e, n).public_key()
@@ -27,6 +27,8 @@ class MsHTTPExceptionType(str, Enum):
     INVALID_EMAIL_ADDRESS = "INVALID_EMAIL_ADDRESS"
     EMPTY_EMAIL_ADDRESS = "EMPTY_EMAIL_ADDRESS"
     EMAIL_ADDRESS_TOO_LONG = "EMAIL_ADDRESS_TOO_LONG"
+
+    INVALID_PAGINATION_CURSOR = "INVALID_PAGINATION_CURSOR"
     # place other error 400 here
     
     # 401
@@ -42,6 +44,7 @@ class MsHTTPExceptionType(str, Enum):
     # place other error 403 here
     CREDENTIAL_LOCATION_COMPANY_FORBIDDEN = "CREDENTIAL_LOCATION_COMPANY_FORBIDDEN"
     CREDENTIAL_LOCATION_SYSTEM_FORBIDDEN = "CREDENTIAL_LOCATION_SYSTEM_FORBIDDEN"
+    UNAUTHORIZED_ROLE_OR_PERMISSION = "UNAUTHORIZED_ROLE_OR_PERMISSION"
     
     # 404
     NOT_FOUND = "NOT_FOUND"
@@ -162,6 +165,8 @@ class MsHTTPExceptionMessage(str, Enum):
     INVALID_EMAIL_ADDRESS = "Alamat email tidak sesuai format"
     EMPTY_EMAIL_ADDRESS = "Alamat email belum diisi"
     EMAIL_ADDRESS_TOO_LONG_F = "Alamat email terlalu panjang, maksimal {maxEmail} karakter"
+
+    INVALID_PAGINATION_CURSOR = "Kursor halaman tidak valid atau tidak sesuai dengan urutan yang diminta"
     # place other error 400 here
 
     # 401
@@ -1,45 +1,240 @@
+import asyncio
 import json
+import re
+from base64 import urlsafe_b64encode
 from typing import Any
+from bson import json_util
+from bson.regex import Regex
 from fastapi.encoders import jsonable_encoder
 import pymongo
+from classes.classMongoCommandListener import mongoCommandListener
 from classes.classMongoDb import TMongoClientSession, TMongoCollection
+from classes.classTtlLruCache import MsTtlLruCache
+from config.config import settings
 from models.shared.modelPagination import MsPagination, MsPagination2, MsPaginationResult, MsPaginationResult2, QuerySortingOrder, TGenericPaginationModel
+from utils.security.ms_security import MsSecurity
+from utils.util_http_exception import MsHTTPBadRequestException
+from utils.util_http_response import MsHTTPExceptionMessage, MsHTTPExceptionType
 from utils.util_logger import msLogger
 
+# list of (field, pymongo.ASCENDING | pymongo.DESCENDING)
+TPaginationSort = list[tuple[str, int]]
 
-async def Paginate(
+PAGINATION_CURSOR_FIRST = "*"
+
+PaginationCountCache: MsTtlLruCache[tuple[int, int, bool]] = MsTtlLruCache(
+    maxSize=settings.pagination.countCacheMaxSize,
+    ttlSeconds=settings.pagination.countCacheTtlSeconds
+)
+"""
+(write generation, total, totalCapped) per (namespace, filter, countCap).
+Entry created before the last write (or transaction commit) to the collection is ignored.
+Write of other instance is only covered by `countCacheTtlSeconds`
+"""
+
+
+def _InvalidCursor() -> MsHTTPBadRequestException:
+    return MsHTTPBadRequestException(
+        type=MsHTTPExceptionType.INVALID_PAGINATION_CURSOR,
+        message=MsHTTPExceptionMessage.INVALID_PAGINATION_CURSOR
+    )
+
+def _GetFieldValue(document: dict[str, Any], field: str) -> Any:
+    value: Any = document
+    for key in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key) # type: ignore
+    return value
+
+def KeysetSort(sort: TPaginationSort) -> TPaginationSort:
+    """
+    Sort with `_id` as the last key, so every document has an unique position
+    """
+
+    if len(sort) == 0:
+        return [("_id", pymongo.ASCENDING)]
+    if any(field == "_id" for field, _ in sort):
+        return sort
+    return sort + [("_id", sort[-1][1])]
+
+def EncodeCursor(sort: TPaginationSort, document: dict[str, Any]) -> str:
+    raw = json_util.dumps(
+        {
+            "s": sort,
+            "v": [_GetFieldValue(document, field) for field, _ in sort]
+        },
+        json_options=json_util.CANONICAL_JSON_OPTIONS
+    )
+    return urlsafe_b64encode(raw.encode(encoding="utf-8")).rstrip(b"=").decode(encoding="ascii")
+
+def DecodeCursor(sort: TPaginationSort, cursor: str) -> list[Any]:
+    """
+    return: last sort key values of previous page
+    """
+
+    try:
+        data: dict[str, Any] | Any = json_util.loads(MsSecurity.b64decode_url(cursor))
+    except Exception:
+        raise _InvalidCursor()
+    if (not isinstance(data, dict)) or (not isinstance(data.get("v"), list)):
+        raise _InvalidCursor()
+    # cursor only valid for the same sort it was created with
+    if data.get("s") != [[field, direction] for field, direction in sort]:
+        raise _InvalidCursor()
+    values: list[Any] = data["v"]
+    if len(values) != len(sort):
+        raise _InvalidCursor()
+    # value of a sort key, never a query document (operator) or a regex
+    if any(isinstance(value, (dict, re.Pattern, Regex)) for value in values):
+        raise _InvalidCursor()
+    return values
+
+def SeekFilter(sort: TPaginationSort, values: list[Any]) -> dict[str, Any]:
+    """
+    Documents positioned after `values` in `sort` order.
+    (k0 > v0) or (k0 = v0 and k1 > v1) or ...; null sort before any other value
+    """
+
+    branches: list[dict[str, Any]] = []
+    for i, (field, direction) in enumerate(sort):
+        value = values[i]
+        after: dict[str, Any] | None
+        if direction == pymongo.ASCENDING:
+            after = {field: {"$ne": None}} if value is None else {field: {"$gt": value}}
+        else:
+            after = None if value is None else {"$or": [{field: {"$lt": value}}, {field: None}]}
+        if after is not None:
+            branch = {sort[j][0]: {"$eq": values[j]} for j in range(i)}
+            if len(branch) == 0:
+                branches.append(after)
+            else:
+                branches.append({"$and": [branch, after]})
+    if len(branches) == 0:
+        # last document in order, nothing after it
+        return {"_id": {"$exists": False}}
+    if len(branches) == 1:
+        return branches[0]
+    return {"$or": branches}
+
+def PaginationSort(params: MsPagination) -> TPaginationSort:
+    """
+    Sort of `Paginate`, also used to choose the index hint.
+    - Keyset mode (`cursor` filled) sort on `_id` last, the hint must cover it too
+    """
+
+    sort: TPaginationSort = []
+    if (params.sortby is not None) and (len(params.sortby) > 0):
+        sort = [(params.sortby, pymongo.ASCENDING if params.order == QuerySortingOrder.Ascending else pymongo.DESCENDING)]
+    if params.cursor is not None:
+        return KeysetSort(sort)
+    return sort
+
+async def CountTotal(
     collection: TMongoCollection,
     query_filter: dict[str, Any],
-    params: MsPagination,
-    resultItemsClass: type[TGenericPaginationModel],
     session: TMongoClientSession | None = None,
-    hint: str | None = None,
-    filterItem: bool = True,
-    explain: bool = False,
+    countCap: int | None = None
+) -> tuple[int, bool]:
+    """
+    return: total, totalCapped
+    - countCap: stop counting after `countCap` documents
+    - session: counted inside the session, a transaction see its own uncommitted writes
+    - Cached only without session, the total of a transaction is never shared
+    """
+
+    cacheKey: tuple[str, str, int | None] | None = None
+    generation = 0
+    if (settings.pagination.countCacheEnabled) and (session is None):
+        try:
+            cacheKey = (
+                collection.full_name,
+                json_util.dumps(query_filter, json_options=json_util.CANONICAL_JSON_OPTIONS),
+                countCap
+            )
+        except Exception:
+            cacheKey = None
+        if cacheKey is not None:
+            generation = mongoCommandListener.WriteGeneration(collection.full_name)
+            cached = PaginationCountCache.Get(cacheKey)
+            if (cached is not None) and (cached[0] == generation):
+                return cached[1], cached[2]
+
+    if (countCap is not None) and (countCap > 0):
+        total = await collection.count_documents(query_filter, session=session, limit=countCap + 1)
+        totalCapped = total > countCap
+        if totalCapped:
+            total = countCap
+    else:
+        total = await collection.count_documents(query_filter, session=session)
+        totalCapped = False
+
+    if cacheKey is not None:
+        PaginationCountCache.Set(cacheKey, (generation, total, totalCapped))
+    return total, totalCapped
+
+async def _FindPage(
+    collection: TMongoCollection,
+    query_filter: dict[str, Any],
+    projection: dict[str, Any],
+    sort: TPaginationSort,
+    size: int,
+    page: int,
+    pageCursor: str | None,
+    session: TMongoClientSession | None,
+    hint: str | None,
+    explain: bool,
+    countCap: int | None,
     **kwargs: Any
-) -> MsPaginationResult[TGenericPaginationModel]:
+) -> tuple[list[dict[str, Any]], int, bool, str | None]:
     """
-    - Http method GET
-    - Single sorting field. if one of `sortby` or `order` is null, sorting query ignored
+    return: items, total, totalCapped, nextCursor
+    - Offset mode when `pageCursor` is null, keyset mode otherwise
     """
-    
-    if params.page == 1:
-        total = await collection.count_documents(query_filter)
+
+    findFilter = query_filter
+    if pageCursor is None:
+        isFirstPage = page == 1
+        offset = size * (page - 1)
+        limit = size
     else:
-        total = -1
-    offset = params.size * (params.page - 1)
+        sort = KeysetSort(sort)
+        isFirstPage = pageCursor == PAGINATION_CURSOR_FIRST
+        if not isFirstPage:
+            findFilter = {"$and": [query_filter, SeekFilter(sort, DecodeCursor(sort, pageCursor))]}
+        offset = 0
+        # one more item to know whether next page exists
+        limit = size + 1
+        if len(projection) > 0:
+            projection = dict(projection)
+            for field, _ in sort:
+                if not any((field == p) or field.startswith(p + ".") for p in projection):
+                    projection[field] = 1
+
     cursor = collection.find(
-        query_filter,
-        resultItemsClass.Projection() if filterItem else {},
+        findFilter,
+        projection,
         skip=offset,
-        limit=params.size,
+        limit=limit,
         session=session,
         hint=hint,
         **kwargs
     )
-    if (params.sortby is not None) and (len(params.sortby) > 0):
-        cursor.sort(params.sortby, pymongo.ASCENDING if params.order == QuerySortingOrder.Ascending else pymongo.DESCENDING)
-    items: list[dict[str, Any]] = await cursor.to_list(length=params.size) # type: ignore
+    if len(sort) > 0:
+        cursor.sort(sort)
+
+    total = -1
+    totalCapped = False
+    if isFirstPage:
+        countTotal = CountTotal(collection, query_filter, session, countCap)
+        # operations of one session must not run concurrently
+        if (session is None) and (settings.pagination.concurrentCount):
+            (total, totalCapped), items = await asyncio.gather(countTotal, cursor.to_list(length=limit))
+        else:
+            total, totalCapped = await countTotal
+            items = await cursor.to_list(length=limit)
+    else:
+        items = await cursor.to_list(length=limit)
 
     if explain:
         try:
@@ -49,13 +244,56 @@ async def Paginate(
             msLogger.critical("Error process mongo explain")
             msLogger.critical(str(err))
 
+    nextCursor = None
+    if (pageCursor is not None) and (len(items) > size):
+        items = items[:size]
+        nextCursor = EncodeCursor(sort, items[-1])
+    return items, total, totalCapped, nextCursor
+
+async def Paginate(
+    collection: TMongoCollection,
+    query_filter: dict[str, Any],
+    params: MsPagination,
+    resultItemsClass: type[TGenericPaginationModel],
+    session: TMongoClientSession | None = None,
+    hint: str | None = None,
+    filterItem: bool = True,
+    explain: bool = False,
+    countCap: int | None = None,
+    **kwargs: Any
+) -> MsPaginationResult[TGenericPaginationModel]:
+    """
+    - Http method GET
+    - Single sorting field. if one of `sortby` or `order` is null, sorting query ignored
+    - Keyset mode if `cursor` is filled, the cost of every page is constant
+    - countCap: override `settings.pagination.countCap`
+    """
+
+    sort = PaginationSort(params)
+    items, total, totalCapped, nextCursor = await _FindPage(
+        collection,
+        query_filter,
+        resultItemsClass.Projection() if filterItem else {},
+        sort,
+        params.size,
+        params.page,
+        params.cursor,
+        session,
+        hint,
+        explain,
+        countCap if countCap is not None else settings.pagination.countCap,
+        **kwargs
+    )
+
     return MsPaginationResult[resultItemsClass](
         sortby=params.sortby,
         size=params.size,
         page=params.page,
         order=params.order,
         total=total,
-        items=[resultItemsClass(**item) for item in items]
+        totalCapped=totalCapped,
+        items=[resultItemsClass.FromDb(item) for item in items],
+        nextCursor=nextCursor
     )
 
 async def Paginate2(
@@ -67,56 +305,51 @@ async def Paginate2(
     hint: str | None = None,
     filterItem: bool = True,
     explain: bool = False,
+    countCap: int | None = None,
     **kwargs: Any
 ) -> MsPaginationResult2[TGenericPaginationModel]:
     """
     - Http method POST/PUT
     - Allow multiple sorting condition
+    - Keyset mode if `cursor` is filled, the cost of every page is constant
+    - countCap: override `settings.pagination.countCap`
     """
-    
-    if params.page == 1:
-        total = await collection.count_documents(query_filter)
-    else:
-        total = -1
-    offset = params.size * (params.page - 1)
-    cursor = collection.find(
-        query_filter,
-        resultItemsClass.Projection() if filterItem else {},
-        skip=offset,
-        limit=params.size,
-        session=session,
-        hint=hint,
-        **kwargs
-    )
+
+    sort: TPaginationSort = []
     if (params.sort is not None) and (len(params.sort) > 0):
         i = 0
         while i < len(params.sort):
-            sort = params.sort[i]
-            sort.sortby = sort.sortby.strip()
-            if len(sort.sortby) == 0:
+            sortItem = params.sort[i]
+            sortItem.sortby = sortItem.sortby.strip()
+            if len(sortItem.sortby) == 0:
                 params.sort.pop(i)
                 continue
-            
-            params.sort[i] = sort
+
+            params.sort[i] = sortItem
             i += 1
 
-        if len(params.sort) > 0:
-            sort = [(p.sortby, pymongo.ASCENDING if p.order == QuerySortingOrder.Ascending else pymongo.DESCENDING) for p in params.sort]
-            cursor.sort(sort)
-    items: list[dict[str, Any]] = await cursor.to_list(length=params.size) # type: ignore
+        sort = [(p.sortby, pymongo.ASCENDING if p.order == QuerySortingOrder.Ascending else pymongo.DESCENDING) for p in params.sort]
+    items, total, totalCapped, nextCursor = await _FindPage(
+        collection,
+        query_filter,
+        resultItemsClass.Projection() if filterItem else {},
+        sort,
+        params.size,
+        params.page,
+        params.cursor,
+        session,
+        hint,
+        explain,
+        countCap if countCap is not None else settings.pagination.countCap,
+        **kwargs
+    )
 
-    if explain:
-        try:
-            explained: Any = await cursor.explain()
-            msLogger.data("pagination explain: \n" + json.dumps(jsonable_encoder(explained), indent=2))
-        except Exception as err:
-            msLogger.critical("Error process mongo explain")
-            msLogger.critical(str(err))
-    
     return MsPaginationResult2[resultItemsClass](
         sort=params.sort,
         size=params.size,
         page=params.page,
         total=total,
-        items=[resultItemsClass(**item) for item in items]
-    )
\ No newline at end of file
+        totalCapped=totalCapped,
+        items=[resultItemsClass.FromDb(item) for item in items],
+        nextCursor=nextCursor
+    )
@@ -0,0 +1,168 @@
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Iterable
+import pymongo
+from config.config import settings
+from models.shared.modelEnvironment import MsEnvironment
+from mongodb.mongoIndex import MongoIndex
+from utils.util_logger import msLogger
+
+# (field, kind) sorted by field
+TFilterShape = tuple[tuple[str, str], ...]
+
+FILTER_EQUALITY = "E"
+FILTER_RANGE = "R"
+FILTER_OTHER = "O"
+
+_FilterKindRank = {FILTER_EQUALITY: 0, FILTER_RANGE: 1, FILTER_OTHER: 2}
+
+_EqualityOperators = frozenset(["$eq", "$in", "$all"])
+_RangeOperators = frozenset(["$gt", "$gte", "$lt", "$lte"])
+
+
+def _IsAnchoredRegex(value: Any, options: Any = None) -> bool:
+    # case sensitive `^prefix` has index bounds, any other regex scan the whole range
+    if isinstance(value, re.Pattern):
+        return value.pattern.startswith("^") and (not value.flags & re.IGNORECASE) # type: ignore
+    if isinstance(value, str):
+        return value.startswith("^") and ("i" not in (options or ""))
+    return False
+
+def _FilterKind(value: Any) -> str:
+    if isinstance(value, re.Pattern):
+        return FILTER_RANGE if _IsAnchoredRegex(value) else FILTER_OTHER
+    if (not isinstance(value, dict)) or (len(value) == 0) or (not all(str(k).startswith("$") for k in value)): # type: ignore
+        return FILTER_EQUALITY
+    operators = set(value.keys()) # type: ignore
+    if operators <= _EqualityOperators:
+        return FILTER_EQUALITY
+    if "$regex" in operators:
+        return FILTER_RANGE if _IsAnchoredRegex(value["$regex"], value.get("$options")) else FILTER_OTHER # type: ignore
+    if operators & _RangeOperators:
+        return FILTER_RANGE
+    return FILTER_OTHER
+
+def FilterShape(query_filter: dict[str, Any]) -> TFilterShape:
+    """
+    Kind of condition per field: equality, range or other.
+    - Only top level fields and `$and` are used, a field inside `$or`/`$nor` never bound the index
+    """
+
+    kinds: dict[str, str] = {}
+
+    def walk(query: dict[str, Any]):
+        for field, value in query.items():
+            if field == "$and" and isinstance(value, list):
+                for sub in value: # type: ignore
+                    if isinstance(sub, dict):
+                        walk(sub) # type: ignore
+                continue
+            if field.startswith("$"):
+                continue
+            kind = _FilterKind(value)
+            # strongest condition win when a field appear twice
+            previous = kinds.get(field)
+            if (previous is None) or (_FilterKindRank[kind] < _FilterKindRank[previous]):
+                kinds[field] = kind
+
+    walk(query_filter)
+    return tuple(sorted(kinds.items()))
+
+def _PartialFilterMatch(index: MongoIndex, shape: dict[str, str], query_filter: dict[str, Any]) -> bool:
+    partial: dict[str, Any] | None = index.kwargs.get("partialFilterExpression")
+    if partial is None:
+        return True
+    # only simple `{field: value}` expression can be proven from the filter
+    for field, value in partial.items():
+        if (shape.get(field) != FILTER_EQUALITY) or (query_filter.get(field) != value):
+            return False
+    return True
+
+def _PartialFieldCount(index: MongoIndex) -> int:
+    return len(index.partialFilterExpression or {})
+
+def _IndexScore(index: MongoIndex, shape: dict[str, str], sort: tuple[tuple[str, int], ...]) -> tuple[int, int, int, int, int]:
+    """
+    Equality, Sort, Range order.
+    return: equality prefix, sort without memory, range bound, other filtered key, -key count
+    - Field of a matching partial filter count as equality, the index only hold those documents
+    """
+
+    keys = [(k.field, k.sort) for k in index.keys]
+    i = 0
+    while (i < len(keys)) and (shape.get(keys[i][0]) == FILTER_EQUALITY):
+        i += 1
+    equality = i
+
+    sortCovered = 0
+    remainingSort = [s for s in sort if shape.get(s[0]) != FILTER_EQUALITY]
+    if len(remainingSort) > 0:
+        indexSort = keys[i:i + len(remainingSort)]
+        if [f for f, _ in indexSort] == [f for f, _ in remainingSort]:
+            same = all(d == s for (_, d), (_, s) in zip(indexSort, remainingSort))
+            reverse = all(d == -s for (_, d), (_, s) in zip(indexSort, remainingSort))
+            if same or reverse:
+                sortCovered = 1
+                i += len(remainingSort)
+
+    rangeBound = 1 if (i < len(keys)) and (shape.get(keys[i][0]) == FILTER_RANGE) else 0
+    filtered = sum(1 for field, _ in keys[equality:] if field in shape)
+    return equality + _PartialFieldCount(index), sortCovered, rangeBound, filtered, -len(keys)
+
+@lru_cache(maxsize=1024)
+def _SelectIndex(
+    indexes: tuple[MongoIndex, ...],
+    shape: TFilterShape,
+    sort: tuple[tuple[str, int], ...],
+    partialCandidates: tuple[str, ...]
+) -> tuple[MongoIndex | None, tuple[int, ...] | None]:
+    shapeDict = dict(shape)
+    best: MongoIndex | None = None
+    bestScore: tuple[int, ...] | None = None
+    for index in indexes:
+        if ("partialFilterExpression" in index.kwargs) and (index.indexName not in partialCandidates):
+            continue
+        score = _IndexScore(index, shapeDict, sort)
+        if (bestScore is None) or (score > bestScore):
+            best = index
+            bestScore = score
+    # no equality and no range on the leading key, the index does not narrow anything
+    if (best is None) or (bestScore is None) or ((bestScore[0] - _PartialFieldCount(best) == 0) and (bestScore[2] == 0)):
+        return None, bestScore
+    return best, bestScore
+
+def SelectIndexHint(
+    indexes: type[Enum] | Iterable[MongoIndex],
+    query_filter: dict[str, Any],
+    sort: Iterable[tuple[str, int]] | None = None,
+    logName: str | None = None
+) -> str | None:
+    """
+    Pick the declared index which bound the most of `query_filter` and `sort`.
+    - indexes: index enum of the collection (ex: `index_lead`) or list of `MongoIndex`
+    - return: index name for `hint`, or null to let MongoDB query planner choose
+    - Unique `_id` lookup always left to MongoDB
+    """
+
+    shape = FilterShape(query_filter)
+    shapeDict = dict(shape)
+    if shapeDict.get("_id") == FILTER_EQUALITY:
+        return None
+
+    candidates: tuple[MongoIndex, ...] = tuple(
+        i.value if isinstance(i, Enum) else i for i in indexes # type: ignore
+    )
+    partialCandidates = tuple(
+        i.indexName for i in candidates
+        if ("partialFilterExpression" in i.kwargs) and _PartialFilterMatch(i, shapeDict, query_filter)
+    )
+    sortKey = tuple((field, pymongo.ASCENDING if direction >= 0 else pymongo.DESCENDING) for field, direction in (sort or []))
+    index, score = _SelectIndex(candidates, shape, sortKey, partialCandidates)
+
+    if settings.project.environment == MsEnvironment.development:
+        msLogger.data(
+            f"index hint {logName or ''}: {index.indexName if index is not None else 'planner'}"
+            f"; filter {dict(shape)}; sort {list(sortKey)}; score {score}"
+        )
+    return index.indexName if index is not None else None
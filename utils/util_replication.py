@@ -0,0 +1,152 @@
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from classes.classMongoDb import TMongoClientSession, TMongoCollection
+from models.shared.modelDataType import ObjectId
+from mongodb.mongoIndex import index_id
+from utils.util_logger import msLogger
+
+REPLICATION_HASH_FIELD = "replicationHash"
+"""
+Hash of the replicated document as last written, a redelivery of the same version is skipped without write
+"""
+
+_DuplicateKeyCode = 11000
+
+
+@dataclass
+class ReplicationWriteResult:
+    applied: int = 0
+    skippedStale: int = 0
+    skippedNoop: int = 0
+    appliedIds: list[ObjectId] = field(default_factory=list) # type: ignore
+
+    def Add(self, other: 'ReplicationWriteResult'):
+        self.applied += other.applied
+        self.skippedStale += other.skippedStale
+        self.skippedNoop += other.skippedNoop
+
+    def Stats(self) -> dict[str, int]:
+        return {
+            "applied": self.applied,
+            "skippedStale": self.skippedStale,
+            "skippedNoop": self.skippedNoop
+        }
+
+ReplicationCounters: dict[str, ReplicationWriteResult] = {}
+"""
+Total per collection since start of the process
+"""
+
+
+def ReplicationHash(document: dict[str, Any]) -> str:
+    """
+    Every field take part, `updatedTime` included: a newer version with the same content is still applied,
+    otherwise an older version delivered after it would not be detected as stale
+    """
+
+    data = {k: v for k, v in document.items() if k != REPLICATION_HASH_FIELD}
+    raw = json_util.dumps(data, json_options=json_util.CANONICAL_JSON_OPTIONS, sort_keys=True)
+    return hashlib.sha256(raw.encode(encoding="utf-8")).hexdigest()
+
+def _Version(document: dict[str, Any]) -> datetime | None:
+    value = document.get("updatedTime")
+    if not isinstance(value, datetime):
+        return None
+    # stored datetime come back naive (UTC)
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def ReplicationStats() -> dict[str, dict[str, int]]:
+    return {name: result.Stats() for name, result in ReplicationCounters.items()}
+
+async def ReplicationUpsert(
+    coll: TMongoCollection,
+    documents: list[tuple[ObjectId, dict[str, Any]]],
+    *,
+    session: TMongoClientSession | None = None
+) -> ReplicationWriteResult:
+    """
+    Upsert (id, document) only when the incoming `updatedTime` is not older than the stored one,
+    and skip the write when the stored `replicationHash` is the same.
+    - Several documents of one id: only the newest is written, the others are stale
+    - Document without `updatedTime` is always newer (no version to compare)
+    - A newer write landing between the read and the write is caught by the `updatedTime` filter
+    """
+
+    ret = ReplicationWriteResult()
+
+    latest: dict[ObjectId, dict[str, Any]] = {}
+    for id, document in documents:
+        previous = latest.get(id)
+        if previous is not None:
+            ret.skippedStale += 1
+            previousVersion = _Version(previous)
+            version = _Version(document)
+            if (previousVersion is not None) and ((version is None) or (version < previousVersion)):
+                continue
+        latest[id] = document
+    if len(latest) == 0:
+        return ret
+
+    stored: dict[ObjectId, dict[str, Any]] = {
+        item["_id"]: item
+        async for item in coll.find(
+            {
+                "_id": {"$in": list(latest.keys())}
+            },
+            {
+                "updatedTime": 1,
+                REPLICATION_HASH_FIELD: 1
+            },
+            session=session,
+            hint=index_id
+        )
+    }
+
+    requests: list[UpdateOne] = []
+    requestIds: list[ObjectId] = []
+    for id, document in latest.items():
+        document = {**document, REPLICATION_HASH_FIELD: ReplicationHash(document)}
+        current = stored.get(id)
+        query: dict[str, Any] = {
+            "_id": id
+        }
+        if current is not None:
+            if current.get(REPLICATION_HASH_FIELD) == document[REPLICATION_HASH_FIELD]:
+                ret.skippedNoop += 1
+                continue
+            currentVersion = _Version(current)
+            version = _Version(document)
+            if (currentVersion is not None) and (version is not None) and (version < currentVersion):
+                ret.skippedStale += 1
+                continue
+        version = _Version(document)
+        if version is not None:
+            # missing or not newer, null also match a missing field
+            query["$or"] = [{"updatedTime": None}, {"updatedTime": {"$lte": version}}]
+        requests.append(UpdateOne(query, {"$set": document}, upsert=True, hint=index_id))
+        requestIds.append(id)
+
+    if len(requests) > 0:
+        failed: set[int] = set()
+        try:
+            await coll.bulk_write(requests, ordered=False, session=session)
+        except BulkWriteError as err:
+            for writeError in err.details.get("writeErrors", []):
+                # filter missed an existing document (newer version written meanwhile), upsert hit its _id
+                if writeError.get("code") == _DuplicateKeyCode:
+                    failed.add(writeError["index"])
+                else:
+                    raise
+        ret.skippedStale += len(failed)
+        ret.appliedIds = [id for i, id in enumerate(requestIds) if i not in failed]
+        ret.applied = len(ret.appliedIds)
+
+    ReplicationCounters.setdefault(coll.name, ReplicationWriteResult()).Add(ret)
+    if (ret.skippedStale > 0) or (ret.skippedNoop > 0):
+        msLogger.info(f"Replication {coll.name}; applied: {ret.applied}; skippedStale: {ret.skippedStale}; skippedNoop: {ret.skippedNoop}")
+    return ret
@@ -0,0 +1,69 @@
+import re
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Iterator
+from pymongo.errors import DuplicateKeyError
+from models.shared.modelSearch import NameSearchMode
+from utils.util_http_exception import MsHTTPConflictException
+
+NAME_NORMALIZED_FIELD = "nameNormalized"
+"""
+Lowercase copy of `name`, written next to it on every create/update.
+Compared with simple (binary) collation, so anchored regex can use the index bounds
+"""
+
+
+def NormalizeName(name: str) -> str:
+    # same normalization for stored value and search keyword
+    return " ".join(unicodedata.normalize("NFKC", name).split()).casefold()
+
+def SetNameNormalized(document: dict[str, Any]) -> dict[str, Any]:
+    """
+    Fill `nameNormalized` when the document (or `$set` param) contains `name`
+    """
+
+    if "name" in document:
+        name = document["name"]
+        document[NAME_NORMALIZED_FIELD] = NormalizeName(name) if isinstance(name, str) else None
+    return document
+
+def NameSearchQuery(name: str | None, mode: NameSearchMode = NameSearchMode.contains) -> dict[str, Any]:
+    """
+    - contains: case insensitive regex on `name`, can not use index bounds
+    - prefix: anchored regex on `nameNormalized`, index range scan
+    """
+
+    if name is None:
+        return {}
+    name = name.strip()
+    if len(name) == 0:
+        return {}
+    if mode == NameSearchMode.prefix:
+        return {NAME_NORMALIZED_FIELD: {"$regex": "^" + re.escape(NormalizeName(name))}}
+    return {"name": {"$regex": re.compile(re.escape(name), re.IGNORECASE)}}
+
+def IsNameDuplicateKey(err: DuplicateKeyError) -> bool:
+    """
+    Duplicate on an unique `nameNormalized` index (not `_id` or other unique key)
+    """
+
+    details: dict[str, Any] = err.details or {}
+    keyPattern: dict[str, Any] = details.get("keyPattern") or {}
+    if len(keyPattern) > 0:
+        return NAME_NORMALIZED_FIELD in keyPattern
+    # server without keyPattern in the error, index name is in the message
+    return NAME_NORMALIZED_FIELD in str(err)
+
+@contextmanager
+def NameConflict(type: str, message: str) -> Iterator[None]:
+    """
+    Raise `MsHTTPConflictException` when a write inside hit the unique `nameNormalized` index.
+    Replace the `NameExists` read before write, the index also close the race between two concurrent writes
+    """
+
+    try:
+        yield
+    except DuplicateKeyError as err:
+        if IsNameDuplicateKey(err):
+            raise MsHTTPConflictException(type, message) from err
+        raise